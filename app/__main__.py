@@ -1,17 +1,157 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from app.core.startup import StartupTimer
+
+# Таймер создаётся до остальных импортов, чтобы их время попало в отчёт о старте
+startup_timer = StartupTimer()
+
+import asyncio
+import signal
+import threading
+from contextlib import asynccontextmanager
+
+with startup_timer.phase("imports"):
+    from fastapi import Depends, FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse
+    
+    from app.core.config import settings
+    from app.api.routes.router import get_main_router
+    from app.core.logger import logger
+    from app.core.db import engine, replica_engine, has_replica
+    from app.core.metrics import MetricsMiddleware, install_query_tracking, metrics_endpoint
+    from app.core.responses import ORJSONResponse
+    from app.core.security import require_admin
+    from app.services.idempotency_service import IdempotencyService
+    from app.services.order_service import OrderService
+    from app.services.report_service import ReportService
+    from app.services.stock_service import StockService
+    from app.services.warmup_service import WarmupService
+
+
+def start_background_tasks() -> list[asyncio.Task]:
+    """
+    Запускает фоновые задачи приложения.
+    
+    Returns:
+        Запущенные задачи
+    """
+    tasks = [
+        # Фоновая очистка просроченных ключей идемпотентности
+        asyncio.create_task(IdempotencyService.run_cleanup_loop(), name="idempotency_cleanup"),
+        # Фоновое инкрементальное обновление агрегатов продаж
+        asyncio.create_task(ReportService.run_refresh_loop(), name="sales_refresh"),
+        # Фоновое выравнивание остатка между шардами популярных товаров
+        asyncio.create_task(StockService.run_consolidation_loop(), name="stock_consolidation"),
+    ]
+    # Фоновая отмена брошенных заказов с возвратом товаров на склад
+    if settings.order_expiry_ttl_minutes > 0:
+        tasks.append(asyncio.create_task(OrderService.run_expiry_loop(), name="order_expiry"))
+    return tasks
+
+
+async def stop_background_tasks(tasks: list[asyncio.Task]) -> None:
+    """
+    Отменяет фоновые задачи и дожидается их завершения.
+    
+    Отмена повторяется, пока задача не завершится: отмену, пришедшую в момент
+    открытия соединения с БД, драйвер может потерять (asyncio.wait_for в Python 3.11),
+    и цикл задачи тогда просто уходит на следующий круг.
+    
+    Args:
+        tasks: Запущенные задачи
+    """
+    pending = set(tasks)
+    while pending:
+        for task in pending:
+            task.cancel()
+        _, pending = await asyncio.wait(pending, timeout=0.1)
+
+
+def install_drain_handler(app: FastAPI) -> None:
+    """
+    Перехватывает SIGTERM поверх обработчика uvicorn.
+    
+    Экземпляр сразу перестаёт быть готовым (/api/health/ready отвечает 503),
+    а остановка сервера — прекращение приёма соединений и ожидание текущих
+    запросов — начинается через SERVER_DRAIN_DELAY_SECONDS: за это время
+    балансировщик успевает убрать экземпляр из ротации.
+    
+    Args:
+        app: Приложение
+    """
+    # Обработчики сигналов ставятся только из главного потока (как и у uvicorn)
+    if threading.current_thread() is not threading.main_thread():
+        return
+    stop_server = signal.getsignal(signal.SIGTERM)
+    if not callable(stop_server):
+        return
+    loop = asyncio.get_running_loop()
+    delay = settings.server_drain_delay_seconds
+
+    def drain(sig):
+        logger.info(f"SIGTERM: экземпляр выведен из готовности, остановка через {delay} с")
+        loop.call_later(delay, stop_server, sig, None)
+
+    def handle_term(sig, frame):
+        app.state.ready = False
+        if delay > 0:
+            # Из обработчика сигнала только ставим задачу в цикл событий
+            loop.call_soon_threadsafe(drain, sig)
+        else:
+            stop_server(sig, frame)
+    
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Старт и остановка приложения.
+    
+    Трафик принимается только после прогрева: до выхода из этой функции
+    сервер не слушает запросы, а /api/health/ready отвечает 200 лишь после
+    установки app.state.ready и снова 503 после SIGTERM. Ошибка прогрева не останавливает старт —
+    приложение работает, но первые запросы платят за холодный пул.
+    """
+    # Инициализация БД будет происходить через Alembic миграции
+    if settings.startup_warmup:
+        try:
+            await asyncio.wait_for(
+                WarmupService.warm_up(startup_timer),
+                timeout=settings.startup_warmup_timeout_seconds
+            )
+        except Exception:
+            logger.exception("Прогрев при старте не удался")
+    
+    with startup_timer.phase("background_tasks"):
+        tasks = start_background_tasks()
+    
+    install_drain_handler(app)
+    app.state.ready = True
+    logger.info("🚀 Order Service запущен")
+    logger.info(f"Зарегистрированные маршруты: {len(app.routes)}")
+    logger.info(startup_timer.report())
+    
+    yield
+    
+    app.state.ready = False
+    logger.info("⏳ Завершение работы Order Service")
+    await stop_background_tasks(tasks)
+    await engine.dispose()
+    if has_replica():
+        await replica_engine.dispose()
 
-from app.core.config import settings
-from app.api.routes.router import main_router
-from app.core.logger import logger
 
 # Инициализация FastAPI
 app = FastAPI(
     title=settings.app_title,
     openapi_url="/api/openapi.json",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse if settings.fast_json_responses else JSONResponse,
+    lifespan=lifespan
 )
+app.state.ready = False
+app.state.startup_timer = startup_timer
 
 origins = [
     "http://localhost:3000",
@@ -27,18 +167,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # Чтобы фронтенд мог прочитать ETag и передать его в If-None-Match
 )
 
-# События старта и завершения
-@app.on_event("startup")
-async def startup():
-    logger.info("🚀 Order Service запущен")
-    logger.info(f"Зарегистрированные маршруты: {len(app.routes)}")
-    # Инициализация БД будет происходить через Alembic миграции
-
-@app.on_event("shutdown")
-async def shutdown():
-    logger.info("⏳ Завершение работы Order Service")
+# Метрики: латентность по маршрутам и учёт SQL-запросов на каждый запрос
+if settings.metrics_enabled:
+    install_query_tracking(engine)
+    if has_replica():
+        install_query_tracking(replica_engine)
+    app.add_middleware(MetricsMiddleware)
+    # Метрики, как и служебные /api/health/* (кроме ready), — только с X-Admin-Token
+    app.add_api_route(
+        "/metrics",
+        metrics_endpoint,
+        include_in_schema=False,
+        dependencies=[Depends(require_admin)]
+    )
 
 # Подключаем главный роутер
-app.include_router(main_router)
\ No newline at end of file
+with startup_timer.phase("routes"):
+    app.include_router(get_main_router())
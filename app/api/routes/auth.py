@@ -4,9 +4,16 @@
 from fastapi import APIRouter, Response, Depends
 
 from app.dto.base import BaseResponseModel
-from app.dto.auth import RegisterRequest, RegisterResponseData, ClientMeData
+from app.dto.auth import (
+    BulkRegisterRequest,
+    BulkRegisterResponseData,
+    ClientMeData,
+    RegisterRequest,
+    RegisterResponseData,
+)
 from app.services.auth_service import AuthService
-from app.core.security import get_current_client
+from app.core.rate_limit import rate_limit
+from app.core.security import get_current_client, require_admin
 from app.models.client import Client
 
 router = APIRouter()
@@ -37,6 +44,36 @@ async def register_client(
     return await AuthService.register(request=request, response=response)
 
 
+@router.post(
+    "/register/bulk",
+    description=(
+        "Регистрирует до 1000 клиентов одной транзакцией (например, субаккаунты B2B-партнёра) "
+        "и генерирует каждому API ключ. Клиенты создаются одним запросом к БД. "
+        "Требует заголовка X-Admin-Token."
+    ),
+    response_model=BaseResponseModel[BulkRegisterResponseData],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        200: {"description": "Клиенты созданы, ключи в порядке запроса"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    }
+)
+async def register_clients_bulk(
+    request: BulkRegisterRequest,
+    response: Response
+):
+    """
+    Пакетная регистрация клиентов
+    
+    - **clients**: Список клиентов (name, address), до 1000 за запрос
+    
+    Возвращает созданных клиентов с API ключами в порядке запроса
+    """
+    return await AuthService.register_bulk(request=request, response=response)
+
+
 @router.get(
     "/me",
     description=(
@@ -44,7 +81,11 @@ async def register_client(
         "Требует передачи API ключа в заголовке X-API-Key."
     ),
     response_model=BaseResponseModel[ClientMeData],
-    status_code=200
+    status_code=200,
+    dependencies=[Depends(rate_limit("profile"))],
+    responses={
+        429: {"description": "Превышен лимит запросов клиента (см. Retry-After)"},
+    }
 )
 async def get_client_profile(
     response: Response,
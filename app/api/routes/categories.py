@@ -0,0 +1,73 @@
+"""
+Маршруты для работы с иерархией категорий
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Response, Query
+
+from app.dto.base import BaseResponseModel
+from app.dto.category import CategorySubtreeResponse, CategoryProductCountsResponse
+from app.services.category_service import CategoryService
+
+router = APIRouter()
+
+
+@router.get(
+    "/{category_id}/subtree",
+    description=(
+        "Возвращает категорию и всех её потомков с глубиной относительно корня. "
+        "Отвечает одним запросом по closure table независимо от глубины дерева."
+    ),
+    response_model=BaseResponseModel[CategorySubtreeResponse],
+    status_code=200,
+    responses={
+        200: {"description": "Поддерево категории"},
+        404: {"description": "Категория не найдена"},
+    }
+)
+async def get_category_subtree(
+    category_id: int,
+    response: Response,
+    max_depth: Optional[int] = Query(
+        None, ge=0, description="Максимальная глубина относительно корня (по умолчанию — всё поддерево)"
+    )
+):
+    """
+    Поддерево категории
+    
+    - **category_id**: ID корневой категории (в URL)
+    - **max_depth**: Ограничение глубины (0 — только сама категория)
+    """
+    return await CategoryService.get_subtree(
+        category_id=category_id,
+        response=response,
+        max_depth=max_depth
+    )
+
+
+@router.get(
+    "/{category_id}/product-counts",
+    description=(
+        "Возвращает для каждой категории поддерева число товаров, привязанных к ней напрямую, "
+        "и число уникальных товаров во всей её ветке. Отвечает одним запросом."
+    ),
+    response_model=BaseResponseModel[CategoryProductCountsResponse],
+    status_code=200,
+    responses={
+        200: {"description": "Число товаров по категориям поддерева"},
+        404: {"description": "Категория не найдена"},
+    }
+)
+async def get_category_product_counts(
+    category_id: int,
+    response: Response
+):
+    """
+    Число товаров по категориям поддерева
+    
+    - **category_id**: ID корневой категории (в URL)
+    """
+    return await CategoryService.get_product_counts(
+        category_id=category_id,
+        response=response
+    )
@@ -0,0 +1,149 @@
+"""
+Служебные маршруты: состояние сервиса и его ресурсов.
+Без токена доступна только готовность (/ready) для балансировщика,
+остальная статистика — с X-Admin-Token.
+"""
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+
+from app.dto.base import BaseResponseModel
+from app.dto.health import PoolStatsData, AuthCacheStatsData, CacheStatsData, RateLimitStatsData, ReadinessData
+from app.core.db import get_pool_stats, replica_engine
+from app.core.rate_limit import get_rate_limit_stats
+from app.core.security import get_auth_cache_stats, require_admin
+from app.repositories.nomenclature_repository import NomenclatureRepository
+
+router = APIRouter()
+
+
+@router.get(
+    "/ready",
+    description=(
+        "Проверка готовности для балансировщика: 200 после завершения прогрева при старте, "
+        "503 во время остановки. В ответе — длительность фаз старта."
+    ),
+    response_model=BaseResponseModel[ReadinessData],
+    status_code=200,
+    responses={503: {"description": "Экземпляр не готов принимать трафик"}}
+)
+async def get_readiness(request: Request, response: Response):
+    """
+    Готовность экземпляра принимать трафик
+    """
+    state = request.app.state
+    ready = getattr(state, "ready", False)
+    timer = getattr(state, "startup_timer", None)
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return BaseResponseModel(
+        success=ready,
+        message="Ready" if ready else "Not ready",
+        data=ReadinessData(
+            ready=ready,
+            startup_seconds=timer.total if timer else 0.0,
+            phases=timer.phases if timer else {}
+        )
+    )
+
+
+@router.get(
+    "/pool",
+    description=(
+        "Возвращает состояние пула соединений с БД: размер, занятые соединения, "
+        "overflow и статистику ожидания свободного соединения. С replica=true — пул "
+        "реплики для чтения (без реплики — основной пул)."
+    ),
+    response_model=BaseResponseModel[PoolStatsData],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    }
+)
+async def get_db_pool_stats(
+    replica: bool = Query(False, description="Пул реплики для чтения вместо основного")
+):
+    """
+    Статистика пула соединений с БД
+    """
+    return BaseResponseModel(
+        success=True,
+        message="Pool stats retrieved",
+        data=PoolStatsData(**get_pool_stats(replica_engine if replica else None))
+    )
+
+
+@router.get(
+    "/auth-cache",
+    description=(
+        "Возвращает статистику кэша аутентификации: число закэшированных клиентов "
+        "и неверных ключей, попадания и промахи."
+    ),
+    response_model=BaseResponseModel[AuthCacheStatsData],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    }
+)
+async def get_auth_cache_stats_route():
+    """
+    Статистика кэша аутентификации по API ключу
+    """
+    return BaseResponseModel(
+        success=True,
+        message="Auth cache stats retrieved",
+        data=AuthCacheStatsData(**get_auth_cache_stats())
+    )
+
+
+@router.get(
+    "/rate-limit",
+    description=(
+        "Возвращает статистику ограничения запросов по API ключу в этом процессе: "
+        "число корзин, разрешённые и отклонённые запросы по группам маршрутов, "
+        "запросы в работе."
+    ),
+    response_model=BaseResponseModel[RateLimitStatsData],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    }
+)
+async def get_rate_limit_stats_route():
+    """
+    Статистика ограничения запросов
+    """
+    return BaseResponseModel(
+        success=True,
+        message="Rate limit stats retrieved",
+        data=RateLimitStatsData(**get_rate_limit_stats())
+    )
+
+
+@router.get(
+    "/nomenclature-cache",
+    description=(
+        "Возвращает статистику кэша номенклатуры: число записей, оценку занятой памяти, "
+        "попадания, промахи и вытеснения."
+    ),
+    response_model=BaseResponseModel[CacheStatsData],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    }
+)
+async def get_nomenclature_cache_stats():
+    """
+    Статистика кэша номенклатуры
+    """
+    return BaseResponseModel(
+        success=True,
+        message="Nomenclature cache stats retrieved",
+        data=CacheStatsData(**NomenclatureRepository.get_cache_stats())
+    )
@@ -1 +1,205 @@
-# Nomenclature API routes
\ No newline at end of file
+"""
+Маршруты для работы с номенклатурой (каталог товаров)
+"""
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import APIRouter, Request, Response, Depends, Query, Header
+
+from app.dto.base import BaseResponseModel
+from app.dto.nomenclature import (
+    CatalogPage,
+    CatalogSort,
+    ImportFormat,
+    NomenclatureImportResult,
+    NomenclatureItem,
+    StockShardsInfo,
+    StockShardsRequest,
+)
+from app.services.nomenclature_service import NomenclatureService
+from app.services.nomenclature_import_service import NomenclatureImportService
+from app.services.stock_service import StockService
+from app.core.security import require_admin
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    description=(
+        "Возвращает страницу каталога товаров. "
+        "Поддерживает фильтры по категории (включая подкатегории), наличию и диапазону цен. "
+        "Пагинация курсорная: для следующей страницы передайте next_cursor из ответа "
+        "с теми же фильтрами и сортировкой. "
+        "С заголовком If-None-Match, равным ETag прошлого ответа, неизменившаяся страница "
+        "возвращается как 304 без тела."
+    ),
+    response_model=BaseResponseModel[CatalogPage],
+    status_code=200,
+    responses={
+        200: {"description": "Страница каталога"},
+        304: {"description": "Страница не изменилась с указанного ETag"},
+        400: {"description": "Неверный курсор или диапазон цен"},
+    }
+)
+async def list_nomenclature(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из предыдущего ответа"),
+    sort: CatalogSort = Query("id", description="Порядок: id, price (по возрастанию) или -price (по убыванию)"),
+    category_id: Optional[int] = Query(None, description="Только товары категории и её подкатегорий"),
+    in_stock: bool = Query(False, description="Только товары в наличии"),
+    min_price: Optional[Decimal] = Query(None, ge=0, description="Минимальная цена"),
+    max_price: Optional[Decimal] = Query(None, ge=0, description="Максимальная цена"),
+    if_none_match: Optional[str] = Header(None, description="ETag из прошлого ответа")
+):
+    """
+    Каталог товаров
+    
+    - **limit**: Размер страницы (1-200)
+    - **cursor**: Курсор следующей страницы
+    - **sort**: Порядок выдачи (id / price / -price)
+    - **category_id**: Фильтр по категории с учётом подкатегорий
+    - **in_stock**: Только товары с ненулевым остатком
+    - **min_price** / **max_price**: Диапазон цен включительно
+    - **If-None-Match**: ETag прошлого ответа (заголовок, опционально)
+    
+    Стоимость запроса не зависит от номера страницы: выборка начинается
+    сразу после последнего товара предыдущей страницы по индексу.
+    """
+    return await NomenclatureService.list_catalog(
+        response=response,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        category_id=category_id,
+        in_stock=in_stock,
+        min_price=min_price,
+        max_price=max_price,
+        if_none_match=if_none_match
+    )
+
+
+@router.get(
+    "/{nomenclature_id}",
+    description=(
+        "Возвращает товар по ID: цену, остаток и версию записи. "
+        "Ответ берётся из in-process кэша номенклатуры; остаток может отставать "
+        "от изменений в других процессах не дольше TTL кэша. "
+        "ETag ответа — версия товара: с заголовком If-None-Match неизменившийся товар "
+        "возвращается как 304 без тела."
+    ),
+    response_model=BaseResponseModel[NomenclatureItem],
+    status_code=200,
+    responses={
+        200: {"description": "Товар"},
+        304: {"description": "Товар не изменился с указанного ETag"},
+        404: {"description": "Товар не найден"},
+    }
+)
+async def get_nomenclature_item(
+    nomenclature_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, description="ETag из прошлого ответа")
+):
+    """
+    Товар по ID
+    
+    - **nomenclature_id**: ID товара (в URL)
+    - **If-None-Match**: ETag прошлого ответа (заголовок, опционально)
+    """
+    return await NomenclatureService.get_item(
+        nomenclature_id=nomenclature_id,
+        response=response,
+        if_none_match=if_none_match
+    )
+
+
+@router.post(
+    "/import",
+    description=(
+        "Импортирует фид поставщика: добавляет новые артикулы, обновляет название, цену и остаток "
+        "существующих и (если задано category_ids) заменяет привязки к категориям. "
+        "Тело запроса — сам фид, читается потоком и передаётся в PostgreSQL через COPY; "
+        "поддерживается Content-Encoding: gzip. Фид применяется одной транзакцией целиком."
+    ),
+    response_model=BaseResponseModel[NomenclatureImportResult],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        200: {"description": "Фид импортирован"},
+        400: {"description": "Ошибка формата или данных фида (с номером строки)"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {
+                    "schema": {"type": "string"},
+                    "example": "sku,name,price,quantity,category_ids\nIPHONE15PRO,iPhone 15 Pro 256GB,99999.99,15,\"{1,4}\"\n"
+                },
+                "application/x-ndjson": {
+                    "schema": {"type": "string"},
+                    "example": '{"sku": "IPHONE15PRO", "name": "iPhone 15 Pro 256GB", "price": 99999.99, "quantity": 15, "category_ids": [1, 4]}\n'
+                },
+            }
+        }
+    }
+)
+async def import_nomenclature(
+    request: Request,
+    response: Response,
+    format: ImportFormat = Query("csv", description="Формат фида: csv или ndjson")
+):
+    """
+    Импорт фида номенклатуры
+    
+    - **format**: csv — заголовок `sku,name,price,quantity,category_ids`, категории как `{1,4}`;
+      ndjson — по объекту с теми же полями на строку
+    - **category_ids**: пусто / отсутствует — привязки не меняются, `{}` / `[]` — товар отвязывается от всех категорий
+    
+    При повторе артикула в фиде действует последняя строка.
+    """
+    return await NomenclatureImportService.import_upload(
+        request=request,
+        response=response,
+        fmt=format
+    )
+
+
+@router.put(
+    "/{nomenclature_id}/stock-shards",
+    description=(
+        "Включает шардирование остатка товара для распродаж: остаток делится на N строк, "
+        "и параллельные покупки списывают его из разных строк, не дожидаясь друг друга. "
+        "shards = 0 возвращает остаток в одну строку. Пока шардирование включено, остаток "
+        "в каталоге обновляется фоновой консолидацией. Требует заголовка X-Admin-Token."
+    ),
+    response_model=BaseResponseModel[StockShardsInfo],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        200: {"description": "Режим хранения остатка изменён"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+        404: {"description": "Товар не найден"},
+    }
+)
+async def set_stock_shards(
+    nomenclature_id: int,
+    request: StockShardsRequest,
+    response: Response
+):
+    """
+    Шардирование остатка товара
+    
+    - **nomenclature_id**: ID товара (в URL)
+    - **shards**: Число шардов, 0 — выключить
+    """
+    return await StockService.set_stock_shards(
+        nomenclature_id=nomenclature_id,
+        request=request,
+        response=response
+    )
@@ -1,12 +1,25 @@
 """
 Маршруты для работы с заказами
 """
-from fastapi import APIRouter, Response, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Response, Depends, Query, Header
 
 from app.dto.base import BaseResponseModel
-from app.dto.order import AddItemRequest, OrderResponse
+from app.dto.order import (
+    AddItemRequest,
+    AddItemsBatchRequest,
+    BatchAddItemsResponse,
+    BulkOrderStatusRequest,
+    BulkOrderStatusResponse,
+    OrderResponse,
+    OrderStatusChangeRequest,
+    OrderStatusInfo,
+    OrderView,
+)
 from app.services.order_service import OrderService
-from app.core.security import get_current_client
+from app.core.rate_limit import rate_limit
+from app.core.security import get_current_client, require_admin
 from app.models.client import Client
 
 router = APIRouter()
@@ -18,22 +31,37 @@ router = APIRouter()
         "Добавляет товар в заказ. "
         "Если товар уже есть в заказе, его количество увеличивается. "
         "Если товара нет на складе в нужном количестве — возвращается ошибка. "
+        "С заголовком Idempotency-Key повтор запроса возвращает сохранённый ответ "
+        "и не списывает товар повторно. "
         "Требует аутентификации через X-API-Key."
     ),
     response_model=BaseResponseModel[OrderResponse],
     status_code=200,
+    dependencies=[Depends(rate_limit("order_items"))],
     responses={
         200: {"description": "Товар успешно добавлен в заказ"},
         404: {"description": "Заказ или товар не найден"},
         403: {"description": "Заказ принадлежит другому клиенту"},
         423: {"description": "Заказ заблокирован для изменений (уже оплачен/отправлен)"},
         409: {"description": "Недостаточно товара на складе"},
+        422: {"description": "Idempotency-Key уже использован для другого запроса"},
+        429: {"description": "Превышен лимит запросов клиента (см. Retry-After)"},
     }
 )
 async def add_item_to_order(
     order_id: int,
     request: AddItemRequest,
     response: Response,
+    view: OrderView = Query(
+        "full",
+        description="Вид ответа: full — все позиции, summary — только итоги, line — итоги и изменённая позиция"
+    ),
+    idempotency_key: Optional[str] = Header(
+        None,
+        min_length=1,
+        max_length=255,
+        description="Ключ идемпотентности: повтор с тем же ключом вернёт сохранённый ответ"
+    ),
     current_client: Client = Depends(get_current_client)
 ):
     """
@@ -42,18 +70,191 @@ async def add_item_to_order(
     - **order_id**: ID заказа (в URL)
     - **nomenclature_id**: ID товара из номенклатуры
     - **quantity**: Количество товара (целое число > 0)
+    - **view**: Вид ответа (full / summary / line)
+    - **Idempotency-Key**: Ключ идемпотентности (заголовок, опционально)
     
-    Возвращает полный заказ со всеми позициями и общей суммой.
+    Возвращает заказ с общей суммой и числом позиций. По умолчанию — со всеми
+    позициями; summary и line не перечитывают позиции заказа.
     
     Бизнес-правила:
     - Заказ должен принадлежать текущему клиенту
     - Заказ должен быть в статусе 'created'
     - Товара должно быть достаточно на складе
     - Если товар уже в заказе — количество увеличивается
+    - Повтор с тем же Idempotency-Key отдаёт сохранённый ответ (заголовок Idempotent-Replayed: true)
     """
+    if idempotency_key is not None:
+        return await OrderService.add_item_to_order_idempotent(
+            order_id=order_id,
+            request=request,
+            current_client=current_client,
+            response=response,
+            idempotency_key=idempotency_key,
+            view=view
+        )
+    
     return await OrderService.add_item_to_order(
         order_id=order_id,
         request=request,
         current_client=current_client,
+        response=response,
+        view=view
+    )
+
+
+@router.get(
+    "/{order_id}",
+    description=(
+        "Возвращает заказ с позициями, итогами и версией. "
+        "ETag ответа — версия заказа: с заголовком If-None-Match неизменившийся заказ "
+        "возвращается как 304 без тела, позиции при этом не загружаются. "
+        "Требует аутентификации через X-API-Key."
+    ),
+    response_model=BaseResponseModel[OrderResponse],
+    status_code=200,
+    dependencies=[Depends(rate_limit("order_read"))],
+    responses={
+        200: {"description": "Заказ"},
+        304: {"description": "Заказ не изменился с указанного ETag"},
+        404: {"description": "Заказ не найден"},
+        403: {"description": "Заказ принадлежит другому клиенту"},
+        429: {"description": "Превышен лимит запросов клиента (см. Retry-After)"},
+    }
+)
+async def get_order(
+    order_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, description="ETag из прошлого ответа"),
+    current_client: Client = Depends(get_current_client)
+):
+    """
+    Получение заказа
+    
+    - **order_id**: ID заказа (в URL)
+    - **If-None-Match**: ETag прошлого ответа (заголовок, опционально)
+    
+    Для опроса состояния заказа: передавайте ETag последнего ответа,
+    пока заказ не меняется, ответ — 304.
+    """
+    return await OrderService.get_order(
+        order_id=order_id,
+        current_client=current_client,
+        response=response,
+        if_none_match=if_none_match
+    )
+
+
+@router.post(
+    "/{order_id}/items/batch",
+    description=(
+        "Добавляет в заказ несколько товаров одной транзакцией. "
+        "Позиции, которых нет в номенклатуре или недостаточно на складе, пропускаются "
+        "и возвращаются в results с причиной, остальные добавляются. "
+        "Требует аутентификации через X-API-Key."
+    ),
+    response_model=BaseResponseModel[BatchAddItemsResponse],
+    status_code=200,
+    dependencies=[Depends(rate_limit("order_items_batch"))],
+    responses={
+        200: {"description": "Пакет обработан, результаты по каждой позиции в results"},
+        404: {"description": "Заказ не найден"},
+        403: {"description": "Заказ принадлежит другому клиенту"},
+        423: {"description": "Заказ заблокирован для изменений (уже оплачен/отправлен)"},
+        429: {"description": "Превышен лимит запросов клиента (см. Retry-After)"},
+    }
+)
+async def add_items_to_order(
+    order_id: int,
+    request: AddItemsBatchRequest,
+    response: Response,
+    current_client: Client = Depends(get_current_client)
+):
+    """
+    Пакетное добавление товаров в заказ
+    
+    - **order_id**: ID заказа (в URL)
+    - **items**: Список позиций (nomenclature_id, quantity), до 500 за запрос
+    
+    Возвращает полный заказ и результат по каждой позиции запроса
+    (added / not_found / insufficient_stock).
+    """
+    return await OrderService.add_items_to_order(
+        order_id=order_id,
+        request=request,
+        current_client=current_client,
+        response=response
+    )
+
+
+@router.put(
+    "/{order_id}/status",
+    description=(
+        "Переводит заказ в другой статус: created → paid | cancelled, paid → shipped | cancelled, "
+        "shipped → completed. В теле передаётся версия заказа, которую видел вызывающий: "
+        "если заказ с тех пор изменился, возвращается 409 и ничего не меняется. "
+        "Отмена возвращает товары заказа на склад. Требует заголовка X-Admin-Token."
+    ),
+    response_model=BaseResponseModel[OrderStatusInfo],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        200: {"description": "Статус заказа изменён"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+        404: {"description": "Заказ не найден"},
+        409: {"description": "Заказ изменён после указанной версии или переход не разрешён"},
+    }
+)
+async def change_order_status(
+    order_id: int,
+    request: OrderStatusChangeRequest,
+    response: Response
+):
+    """
+    Изменение статуса заказа
+    
+    - **order_id**: ID заказа (в URL)
+    - **status**: Новый статус
+    - **version**: Версия заказа (из ответа с заказом)
+    """
+    return await OrderService.change_order_status(
+        order_id=order_id,
+        request=request,
+        response=response
+    )
+
+
+@router.post(
+    "/status/bulk",
+    description=(
+        "Переводит до 10000 заказов в один статус одним запросом к БД. Заказы, для которых "
+        "переход из текущего статуса не разрешён, и несуществующие заказы пропускаются "
+        "и возвращаются в results с причиной. Версии заказов не проверяются. "
+        "Требует заголовка X-Admin-Token."
+    ),
+    response_model=BaseResponseModel[BulkOrderStatusResponse],
+    status_code=200,
+    dependencies=[Depends(require_admin)],
+    responses={
+        200: {"description": "Запрос обработан, результаты по каждому заказу в results"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    }
+)
+async def change_orders_status_bulk(
+    request: BulkOrderStatusRequest,
+    response: Response
+):
+    """
+    Массовое изменение статуса заказов
+    
+    - **order_ids**: ID заказов, до 10000 за запрос
+    - **status**: Новый статус
+    
+    Возвращает число переведённых заказов и результат по каждому ID
+    (updated / not_found / invalid_transition) с текущим статусом и версией.
+    """
+    return await OrderService.change_orders_status_bulk(
+        request=request,
         response=response
     )
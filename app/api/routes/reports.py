@@ -0,0 +1,158 @@
+"""
+Маршруты отчётов по продажам (административные)
+"""
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Request, Response, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.dto.base import BaseResponseModel
+from app.dto.order import OrderStatus
+from app.dto.report import CategorySalesReport, OrderExportFormat, SalesRefreshResult, TopProductsReport
+from app.services.report_service import ReportService
+from app.services.order_export_service import OrderExportService
+from app.core.security import require_admin
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get(
+    "/top-products",
+    description=(
+        "Возвращает самые продаваемые товары за последние N дней с корневой категорией. "
+        "Строится по предрассчитанным дневным агрегатам: стоимость зависит от длины периода, "
+        "а не от объёма истории заказов. Данные отстают не больше чем на интервал обновления агрегатов."
+    ),
+    response_model=BaseResponseModel[TopProductsReport],
+    status_code=200,
+    responses={
+        200: {"description": "Рейтинг товаров"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    }
+)
+async def get_top_products(
+    response: Response,
+    days: int = Query(7, ge=1, le=366, description="Длина периода в днях, включая сегодняшний (UTC)"),
+    limit: int = Query(5, ge=1, le=100, description="Число товаров")
+):
+    """
+    Самые продаваемые товары
+    
+    - **days**: Период отчёта в днях
+    - **limit**: Размер рейтинга
+    """
+    return await ReportService.get_top_products(
+        response=response,
+        days=days,
+        limit=limit
+    )
+
+
+@router.get(
+    "/category-sales",
+    description=(
+        "Возвращает продажи по категориям одного уровня за последние N дней. "
+        "Продажи категории включают все её подкатегории; товар учитывается в категории один раз."
+    ),
+    response_model=BaseResponseModel[CategorySalesReport],
+    status_code=200,
+    responses={
+        200: {"description": "Продажи по категориям"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+        404: {"description": "Родительская категория не найдена"},
+    }
+)
+async def get_category_sales(
+    response: Response,
+    days: int = Query(7, ge=1, le=366, description="Длина периода в днях, включая сегодняшний (UTC)"),
+    parent_id: Optional[int] = Query(None, description="Дочерние категории этой категории (по умолчанию — корневые)")
+):
+    """
+    Продажи по категориям
+    
+    - **days**: Период отчёта в днях
+    - **parent_id**: Родительская категория
+    """
+    return await ReportService.get_category_sales(
+        response=response,
+        days=days,
+        parent_id=parent_id
+    )
+
+
+@router.post(
+    "/refresh",
+    description=(
+        "Немедленно обновляет агрегаты продаж (обычно они обновляются фоновой задачей). "
+        "С full=true агрегаты перестраиваются по всей истории заказов."
+    ),
+    response_model=BaseResponseModel[SalesRefreshResult],
+    status_code=200,
+    responses={
+        200: {"description": "Агрегаты обновлены"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+        409: {"description": "Обновление уже выполняется"},
+    }
+)
+async def refresh_sales(
+    response: Response,
+    full: bool = Query(False, description="Полная перестройка агрегатов")
+):
+    """
+    Обновление агрегатов продаж
+    
+    - **full**: Пересчитать все дни, а не только изменённые
+    """
+    return await ReportService.refresh_now(
+        response=response,
+        full=full
+    )
+
+
+@router.get(
+    "/orders-export",
+    description=(
+        "Выгружает заказы с позициями для сверки: NDJSON (заказ с позициями в строке) "
+        "или CSV (позиция заказа в строке). Ответ отдаётся потоком по мере чтения "
+        "серверного курсора и при Accept-Encoding: gzip сжимается на лету."
+    ),
+    response_class=StreamingResponse,
+    status_code=200,
+    responses={
+        200: {
+            "description": "Файл выгрузки",
+            "content": {"application/x-ndjson": {}, "text/csv": {}}
+        },
+        400: {"description": "date_from позже date_to"},
+        401: {"description": "Неверный токен администратора"},
+        403: {"description": "Административные эндпоинты отключены"},
+    }
+)
+async def export_orders(
+    request: Request,
+    format: OrderExportFormat = Query("ndjson", description="Формат выгрузки"),
+    date_from: Optional[date] = Query(None, description="Заказы, созданные с этого дня (UTC, включительно)"),
+    date_to: Optional[date] = Query(None, description="Заказы, созданные по этот день (UTC, включительно)"),
+    client_id: Optional[int] = Query(None, ge=1, description="Заказы клиента"),
+    status: Optional[OrderStatus] = Query(None, description="Заказы в статусе")
+):
+    """
+    Выгрузка заказов
+    
+    - **format**: ndjson или csv
+    - **date_from**, **date_to**: Период создания заказов
+    - **client_id**: Клиент
+    - **status**: Статус заказа
+    """
+    return await OrderExportService.export_orders(
+        request=request,
+        fmt=format,
+        date_from=date_from,
+        date_to=date_to,
+        client_id=client_id,
+        status=status
+    )
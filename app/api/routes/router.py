@@ -1,39 +1,82 @@
-from fastapi import APIRouter
-import pkgutil
+from functools import lru_cache
 import importlib
-import sys
-import pathlib
+import pkgutil
+
+from fastapi import APIRouter
+
+from app.core.config import settings
 
-# Добавляем корневую директорию в sys.path (на случай запуска без пакета)
-sys.path.append(str(pathlib.Path(__file__).parent.parent.parent))
+ROUTES_PACKAGE = "app.api.routes"
+
+# Явный список модулей с маршрутами: каждый подключается с префиксом /{модуль}.
+# Новый модуль маршрутов нужно добавить сюда (или включить ROUTES_AUTODISCOVER)
+ROUTE_MODULES = (
+    "auth",
+    "categories",
+    "clients",
+    "health",
+    "nomenclature",
+    "orders",
+    "reports",
+)
+
+
+def discover_route_modules() -> tuple[str, ...]:
+    """
+    Находит модули с маршрутами сканированием пакета routes.
+    
+    Returns:
+        Имена модулей пакета, кроме самого router.py, в алфавитном порядке
+    """
+    package = importlib.import_module(ROUTES_PACKAGE)
+    return tuple(sorted(
+        module_name
+        for _, module_name, _ in pkgutil.iter_modules(package.__path__)
+        if module_name != "router"  # Исключаем сам `router.py`
+    ))
 
 
 class MainRouter:
-    def __init__(self, prefix: str = "/api"):
-        """Инициализация главного роутера с автоподключением маршрутов"""
+    def __init__(self, prefix: str = "/api", autodiscover: bool = False):
+        """
+        Инициализация главного роутера.
+        
+        Args:
+            prefix: Общий префикс маршрутов
+            autodiscover: Искать модули сканированием пакета вместо списка ROUTE_MODULES
+        """
         self.router = APIRouter(prefix=prefix)
+        self.module_names = discover_route_modules() if autodiscover else ROUTE_MODULES
         self._load_routes()
 
     def _load_routes(self):
-        """Автоматически находит и подключает все модули с роутами"""
-        package_name = "app.api.routes"
-
-        # Перебираем все файлы в папке routes (кроме __init__.py и router.py)
-        package = importlib.import_module(package_name)
-        for _, module_name, _ in pkgutil.iter_modules(package.__path__):
-            if module_name not in ["router"]:  # Исключаем сам `router.py`
-                module = importlib.import_module(f"{package_name}.{module_name}")
-
-                # Если в модуле есть `router`, подключаем его
-                if hasattr(module, "router"):
-                    # Если у роутера нет тегов, добавляем автоматически
-                    router_tags = getattr(module.router, 'tags', None) or [module_name.capitalize()]
-                    self.router.include_router(
-                        module.router, 
-                        prefix=f"/{module_name}", 
-                        tags=router_tags
-                    )
-
-
-# Создаем главный роутер
-main_router = MainRouter().router
\ No newline at end of file
+        """Импортирует модули маршрутов и подключает их роутеры"""
+        for module_name in self.module_names:
+            module = importlib.import_module(f"{ROUTES_PACKAGE}.{module_name}")
+            
+            # Если в модуле есть `router`, подключаем его
+            if hasattr(module, "router"):
+                # Если у роутера нет тегов, добавляем автоматически
+                router_tags = getattr(module.router, 'tags', None) or [module_name.capitalize()]
+                self.router.include_router(
+                    module.router,
+                    prefix=f"/{module_name}",
+                    tags=router_tags
+                )
+
+
+@lru_cache
+def get_main_router(prefix: str = "/api") -> APIRouter:
+    """
+    Собирает главный роутер при первом вызове и дальше возвращает готовый.
+    
+    Модули маршрутов импортируются здесь, а не при импорте router.py,
+    поэтому их загрузка попадает в отчёт о времени старта отдельной фазой.
+    
+    Args:
+        prefix: Общий префикс маршрутов
+        
+    Returns:
+        APIRouter со всеми маршрутами приложения
+    """
+    return MainRouter(prefix, autodiscover=settings.routes_autodiscover).router
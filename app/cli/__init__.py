@@ -0,0 +1 @@
+# CLI commands module
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Импорт фида номенклатуры из файла (CSV / NDJSON, можно сжатый gzip).
+
+Формат определяется по расширению (.csv, .ndjson, .jsonl, в том числе с .gz)
+или задаётся явно. Файл читается кусками и передаётся в PostgreSQL через COPY,
+поэтому память не зависит от размера фида.
+
+Запуск:
+    python -m app.cli.import_nomenclature feed.csv
+    python -m app.cli.import_nomenclature feed.ndjson.gz
+    python -m app.cli.import_nomenclature supplier.txt --format csv
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core.db import engine
+from app.core.streaming import read_chunks
+from app.dto.nomenclature import ImportFormat
+from app.services.nomenclature_import_service import NomenclatureImportService
+
+FORMAT_BY_SUFFIX = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def detect_format(path: Path) -> Optional[ImportFormat]:
+    """Формат фида по расширению файла (без учёта .gz)"""
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes.pop()
+    return FORMAT_BY_SUFFIX.get(suffixes[-1]) if suffixes else None
+
+
+async def run(path: Path, fmt: ImportFormat) -> int:
+    """Импортирует файл и печатает результат; возвращает код выхода"""
+    try:
+        with path.open("rb") as file:
+            result = await NomenclatureImportService.import_feed(
+                chunks=read_chunks(file),
+                fmt=fmt,
+                gzipped=path.suffix.lower() == ".gz"
+            )
+    except HTTPException as exc:
+        print(f"Ошибка импорта: {exc.detail}", file=sys.stderr)
+        return 1
+    finally:
+        await engine.dispose()
+    
+    print(
+        f"Строк: {result.rows}, добавлено: {result.inserted}, изменено: {result.updated}, "
+        f"без изменений: {result.unchanged}\n"
+        f"Категории: привязано {result.categories_linked}, отвязано {result.categories_unlinked}, "
+        f"неизвестных {result.unknown_categories}\n"
+        f"Время: {result.elapsed_seconds} с, {result.rows_per_second} строк/с"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Импорт фида номенклатуры (CSV / NDJSON)")
+    parser.add_argument("path", type=Path, help="Файл фида (.csv, .ndjson, .jsonl, можно .gz)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Формат фида (по умолчанию — по расширению)")
+    args = parser.parse_args()
+    
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("не удалось определить формат по расширению, укажите --format")
+    sys.exit(asyncio.run(run(args.path, fmt)))
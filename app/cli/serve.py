@@ -0,0 +1,156 @@
+"""
+Запуск сервиса в продакшене: несколько процессов uvicorn без слежения за файлами.
+
+Адрес, число процессов и время на завершение запросов берутся из Settings
+(SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_GRACEFUL_TIMEOUT_SECONDS),
+аргументы командной строки их переопределяют.
+
+У каждого процесса свой пул соединений с БД, поэтому пул процесса уменьшается
+так, чтобы все процессы вместе оставались в пределах max_connections PostgreSQL
+за вычетом DB_RESERVED_CONNECTIONS (миграции, psql, мониторинг). Рассчитанные
+DB_POOL_SIZE и DB_MAX_OVERFLOW передаются процессам через переменные окружения.
+
+По SIGTERM процессы перестают принимать соединения, дожидаются текущих запросов
+(не дольше SERVER_GRACEFUL_TIMEOUT_SECONDS), останавливают фоновые задачи
+и только затем закрывают пул соединений.
+
+Запуск:
+    python -m app.cli.serve
+    SERVER_WORKERS=4 python -m app.cli.serve
+    python -m app.cli.serve --workers 4 --port 8000
+"""
+import argparse
+import os
+import sys
+
+import psycopg
+import uvicorn
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.logger import logger
+
+APP = "app.__main__:app"
+
+
+def resolve_workers(workers: int) -> int:
+    """Число процессов: заданное или по числу доступных процессу CPU"""
+    if workers > 0:
+        return workers
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def fetch_max_connections(url: str) -> int:
+    """
+    Спрашивает у PostgreSQL, сколько соединений доступно обычным пользователям.
+    
+    Args:
+        url: Адрес подключения к БД в формате SQLAlchemy
+        
+    Returns:
+        max_connections за вычетом соединений, зарезервированных для суперпользователя
+        и роли pg_use_reserved_connections
+    """
+    dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+    with psycopg.connect(dsn, connect_timeout=10) as conn:
+        return conn.execute(
+            "SELECT current_setting('max_connections')::int"
+            " - current_setting('superuser_reserved_connections')::int"
+            " - coalesce(current_setting('reserved_connections', true)::int, 0)"
+        ).fetchone()[0]
+
+
+def split_connection_budget(
+    workers: int,
+    max_connections: int,
+    reserved: int,
+    pool_size: int,
+    max_overflow: int
+) -> tuple[int, int]:
+    """
+    Делит соединения с БД между процессами.
+    
+    Пул процесса не больше настроенного: сначала уменьшается overflow,
+    затем постоянная часть пула.
+    
+    Args:
+        workers: Число процессов
+        max_connections: Сколько соединений принимает PostgreSQL
+        reserved: Сколько из них оставить другим клиентам
+        pool_size: Настроенный DB_POOL_SIZE
+        max_overflow: Настроенный DB_MAX_OVERFLOW
+        
+    Returns:
+        (pool_size, max_overflow) для одного процесса
+        
+    Raises:
+        ValueError: Соединений не хватает даже на одно на процесс
+    """
+    per_worker = (max_connections - reserved) // workers
+    if per_worker < 1:
+        raise ValueError(
+            f"{workers} workers do not fit into {max_connections} connections "
+            f"with {reserved} reserved: lower SERVER_WORKERS or DB_RESERVED_CONNECTIONS"
+        )
+    worker_pool_size = min(pool_size, per_worker)
+    worker_overflow = min(max_overflow, per_worker - worker_pool_size)
+    return worker_pool_size, worker_overflow
+
+
+def main(host: str, port: int, workers: int, graceful_timeout: float) -> int:
+    """Рассчитывает пул процесса и запускает uvicorn; возвращает код выхода"""
+    workers = resolve_workers(workers)
+    max_connections = settings.db_max_connections or fetch_max_connections(settings.database_url)
+    try:
+        pool_size, max_overflow = split_connection_budget(
+            workers,
+            max_connections,
+            settings.db_reserved_connections,
+            settings.db_pool_size,
+            settings.db_max_overflow
+        )
+    except ValueError as exc:
+        print(f"Ошибка запуска: {exc}", file=sys.stderr)
+        return 1
+    
+    # Процессы uvicorn запускаются заново и читают настройки из окружения;
+    # при одном процессе приложение импортируется здесь же и берёт их из settings
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    settings.db_pool_size = pool_size
+    settings.db_max_overflow = max_overflow
+    
+    logger.info(
+        f"Процессов: {workers}, пул на процесс: {pool_size} + {max_overflow} overflow, "
+        f"всего до {workers * (pool_size + max_overflow)} соединений из {max_connections} "
+        f"(резерв {settings.db_reserved_connections})"
+    )
+    uvicorn.run(
+        APP,
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=graceful_timeout,
+        log_level=settings.log_level.lower(),
+        proxy_headers=True,
+        lifespan="on",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Запуск сервиса в продакшене (несколько процессов uvicorn)")
+    parser.add_argument("--host", default=settings.server_host, help="Адрес (по умолчанию SERVER_HOST)")
+    parser.add_argument("--port", type=int, default=settings.server_port, help="Порт (по умолчанию SERVER_PORT)")
+    parser.add_argument(
+        "--workers", type=int, default=settings.server_workers,
+        help="Число процессов, 0 — по числу CPU (по умолчанию SERVER_WORKERS)"
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=settings.server_graceful_timeout_seconds,
+        help="Сколько ждать текущих запросов при остановке, сек (по умолчанию SERVER_GRACEFUL_TIMEOUT_SECONDS)"
+    )
+    args = parser.parse_args()
+    sys.exit(main(args.host, args.port, args.workers, args.graceful_timeout))
@@ -0,0 +1,193 @@
+"""
+In-process кэши: ограниченный по размеру LRU со сроком жизни записей
+и версионированный кэш поверх него
+"""
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    LRU-кэш с ограничением по числу записей, сроку жизни каждой записи
+    и (опционально) по суммарному размеру записей в байтах.
+    
+    Рассчитан на работу внутри одного event loop: все операции синхронные
+    и не отдают управление, поэтому блокировки не нужны.
+    
+    Attributes:
+        maxsize: Максимальное число записей, при превышении вытесняются самые старые по доступу
+        ttl: Срок жизни записи по умолчанию, сек (None — бессрочно)
+        max_bytes: Ограничение суммарного размера записей по оценке sizeof (None — без ограничения)
+        hits: Число попаданий
+        misses: Число промахов (включая просроченные записи)
+        evictions: Число записей, вытесненных по размеру
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[V], int] = sys.getsizeof
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._sizeof = sizeof
+        self._data: "OrderedDict[K, tuple[V, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K, default: Any = None) -> Optional[V]:
+        """Возвращает значение по ключу с учётом срока жизни и обновляет его позицию в LRU"""
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.misses += 1
+            return default
+        value, expires_at, _ = item
+        if expires_at is not None and expires_at <= self._clock():
+            self._remove(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: K, default: Any = None) -> Optional[V]:
+        """Возвращает значение без учёта в статистике и без изменения порядка LRU"""
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        value, expires_at, _ = item
+        if expires_at is not None and expires_at <= self._clock():
+            return default
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = _MISSING) -> None:
+        """
+        Сохраняет значение в кэш.
+        
+        Args:
+            key: Ключ
+            value: Значение
+            ttl: Срок жизни записи, сек; по умолчанию — ttl кэша
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key: K, default: Any = None) -> Optional[V]:
+        """Удаляет запись и возвращает её значение"""
+        if key not in self._data:
+            return default
+        return self._remove(key)
+
+    def _remove(self, key: K) -> V:
+        """Удаляет существующую запись с учётом её размера"""
+        value, _, size = self._data.pop(key)
+        self._bytes -= size
+        return value
+
+    def invalidate_where(self, predicate: Callable[[K, V], bool]) -> int:
+        """
+        Удаляет все записи, для которых predicate(key, value) истинен.
+        
+        Returns:
+            Число удалённых записей
+        """
+        keys = [key for key, (value, _, _) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Полностью очищает кэш"""
+        self._data.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.peek(key, _MISSING) is not _MISSING
+
+    def stats(self) -> dict:
+        """Статистика использования кэша"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class VersionedCache(Generic[K, V]):
+    """
+    Кэш записей с монотонно растущей версией поверх TTLCache.
+    
+    Запись заменяется только более новой версией, поэтому снимок, прочитанный
+    из БД до чужого коммита, не перезапишет уже закэшированный результат этого коммита.
+    
+    Attributes:
+        cache: Хранилище записей (LRU, TTL и ограничения размера)
+    """
+
+    def __init__(self, cache: TTLCache[K, V], version: Callable[[V], int]):
+        self.cache = cache
+        self._version = version
+
+    def get(self, key: K) -> Optional[V]:
+        """Возвращает запись или None"""
+        return self.cache.get(key)
+
+    def put(self, key: K, value: V) -> bool:
+        """
+        Сохраняет запись, если в кэше нет записи той же или более новой версии.
+        
+        Returns:
+            True, если запись сохранена
+        """
+        current = self.cache.peek(key)
+        if current is not None and self._version(current) >= self._version(value):
+            return False
+        self.cache.set(key, value)
+        return True
+
+    def discard(self, key: K) -> None:
+        """Удаляет запись"""
+        self.cache.pop(key)
+
+    def clear(self) -> None:
+        """Полностью очищает кэш"""
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        """Статистика использования кэша"""
+        return self.cache.stats()
@@ -1,3 +1,4 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +9,81 @@ class Settings(BaseSettings):
     
     # База данных
     database_url: str
+    database_replica_url: str = ""  # Реплика для чтения (пусто — всё читается с основной БД)
+    
+    # Пул соединений с БД
+    db_echo: bool = False                 # Логирование всех SQL-запросов (только для отладки)
+    db_pool_size: int = 10                # Постоянные соединения в пуле
+    db_max_overflow: int = 20             # Дополнительные соединения сверх pool_size при пиковой нагрузке
+    db_pool_timeout: float = 30.0         # Сколько ждать свободного соединения, сек
+    db_pool_recycle: int = 1800           # Пересоздавать соединения старше N секунд
+    db_pool_pre_ping: bool = True         # Проверять соединение перед выдачей из пула
+    db_statement_timeout_ms: int = 15000  # statement_timeout для PostgreSQL, мс (0 — без ограничения)
+    db_max_connections: int = 0           # max_connections PostgreSQL для расчёта пула процессов (0 — спросить у сервера)
+    db_reserved_connections: int = 10     # Соединения, которые процессы приложения оставляют миграциям, psql, мониторингу
+    
+    # Кэш аутентификации по API ключу
+    auth_cache_max_size: int = 10000           # Максимум закэшированных клиентов
+    auth_cache_ttl_seconds: float = 60.0       # Срок жизни записи о клиенте, сек
+    auth_negative_cache_max_size: int = 10000  # Максимум закэшированных неверных ключей
+    auth_negative_cache_ttl_seconds: float = 10.0  # Срок жизни записи о неверном ключе, сек
+    
+    # Кэш номенклатуры (цена, остаток) только для ответа GET /nomenclature/{id}: списание остатка
+    # и цена позиции заказа всегда берутся из БД. Кэш обновляется после коммита только в том
+    # процессе, где прошло изменение; остальные процессы (воркеры, экземпляры сервиса) отдают
+    # старые цену и остаток, пока не истечёт nomenclature_cache_ttl_seconds
+    nomenclature_cache_max_size: int = 50000               # Максимум закэшированных товаров
+    nomenclature_cache_max_bytes: int = 32 * 1024 * 1024   # Ограничение памяти кэша (оценка), байт
+    nomenclature_cache_ttl_seconds: float = 30.0           # Срок жизни записи, сек: граница устаревания при изменениях из других процессов
+    
+    # HTTP-кэширование (ETag / If-None-Match, Cache-Control)
+    catalog_cache_max_age_seconds: int = 10   # max-age ответов каталога для браузера и прокси, сек (0 — всегда проверять ETag)
+    
+    # Ограничение запросов по API ключу (в памяти процесса, до аутентификации и обращений к БД)
+    rate_limit_enabled: bool = True
+    rate_limits: dict[str, tuple[float, int]] = {  # Группа маршрутов → (запросов в секунду, ёмкость корзины)
+        "order_read": (20.0, 40),                   # GET /orders/{id}
+        "order_items": (10.0, 20),                  # POST /orders/{id}/items
+        "order_items_batch": (2.0, 5),              # POST /orders/{id}/items/batch
+        "profile": (5.0, 10),                       # GET /auth/me
+    }
+    rate_limit_tiers: dict[str, float] = {  # Тариф клиента (client.tier) → множитель лимитов
+        "standard": 1.0,
+        "partner": 5.0,
+    }
+    rate_limit_max_concurrent: int = 8       # Одновременных запросов одного клиента с учётом тарифа (0 — без ограничения)
+    rate_limit_max_keys: int = 100000        # Максимум корзин в памяти на группу маршрутов
+    
+    # Ключи идемпотентности (заголовок Idempotency-Key)
+    idempotency_key_ttl_hours: int = 24                   # Сколько хранить ответ в БД, ч
+    idempotency_cache_max_size: int = 10000               # Максимум ответов в in-process кэше
+    idempotency_cache_ttl_seconds: float = 300.0          # Срок жизни ответа в in-process кэше, сек
+    idempotency_cleanup_interval_seconds: float = 600.0   # Период удаления просроченных ключей из БД, сек
+    
+    # Административные эндпоинты (отчёты, импорт номенклатуры): заголовок X-Admin-Token.
+    # Пустое значение отключает их
+    admin_token: str = ""
+    
+    # Импорт фида номенклатуры: транзакция может идти минуты, поэтому свой statement_timeout
+    nomenclature_import_statement_timeout_ms: int = 0  # statement_timeout на время импорта, мс (0 — без ограничения)
+    
+    # Агрегаты продаж для отчётов
+    sales_refresh_interval_seconds: float = 300.0  # Период инкрементального обновления агрегатов, сек
+    sales_refresh_overlap_seconds: float = 300.0   # Перекрытие окна изменений: запас на долгие транзакции, сек
+    
+    # Шардированный остаток популярных товаров
+    stock_shard_consolidate_interval_seconds: float = 5.0  # Период выравнивания остатка между шардами, сек
+    
+    # Отмена брошенных заказов: заказ в статусе created без изменений дольше TTL
+    # отменяется, товар возвращается на склад
+    order_expiry_ttl_minutes: int = 1440               # Срок жизни заказа без изменений, мин (0 — не отменять)
+    order_expiry_batch_size: int = 500                 # Заказов в одной транзакции
+    order_expiry_batch_pause_seconds: float = 0.2      # Пауза между пачками, сек: ограничивает нагрузку на БД
+    order_expiry_interval_seconds: float = 60.0        # Период поиска брошенных заказов, сек
+    
+    # Выгрузка заказов (/api/reports/orders-export)
+    order_export_batch_size: int = 2000  # Строк на одно чтение из серверного курсора
+    order_export_gzip_level: int = 6     # Уровень сжатия gzip (1 — быстрее, 9 — плотнее)
     
     # Настройки JWT (если планируется авторизация)
     access_token_expire_minutes: int = 30
@@ -21,11 +97,48 @@ class Settings(BaseSettings):
         "http://127.0.0.1:8080"
     ]
     
+    # Метрики Prometheus (/metrics)
+    metrics_enabled: bool = True
+    
+    # Быстрые JSON-ответы: orjson для всех маршрутов, ответы по заказам собираются
+    # из ORM-объектов в словари без повторной валидации по response_model
+    fast_json_responses: bool = False
+    
+    # Старт приложения
+    startup_warmup: bool = True                   # Открыть пул и выполнить горячие запросы до приёма трафика
+    startup_warmup_timeout_seconds: float = 30.0  # Ограничение времени прогрева, сек
+    routes_autodiscover: bool = False             # Искать модули маршрутов сканированием пакета вместо ROUTE_MODULES
+    
+    # Запуск в продакшене (python -m app.cli.serve)
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0                         # Процессов uvicorn (0 — по числу CPU)
+    server_graceful_timeout_seconds: float = 30.0   # Сколько ждать текущих запросов при SIGTERM, сек
+    server_drain_delay_seconds: float = 0.0         # Сколько после SIGTERM принимать запросы, отвечая 503 на /api/health/ready, сек
+    
     # Настройки логирования
     log_level: str = "INFO"
     
     # Настройки pydantic модели
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8')
 
+    @field_validator("rate_limits")
+    @classmethod
+    def _check_rate_limits(cls, value: dict[str, tuple[float, int]]) -> dict[str, tuple[float, int]]:
+        """Частота и ёмкость корзины положительные: группу без ограничения просто не указывают"""
+        for group, (rate, burst) in value.items():
+            if rate <= 0 or burst < 1:
+                raise ValueError(f"rate_limits[{group}]: rate must be > 0 and burst >= 1, got {(rate, burst)}")
+        return value
+
+    @field_validator("rate_limit_tiers")
+    @classmethod
+    def _check_rate_limit_tiers(cls, value: dict[str, float]) -> dict[str, float]:
+        """Нулевой множитель дал бы корзину, которая никогда не пополняется"""
+        for tier, scale in value.items():
+            if scale <= 0:
+                raise ValueError(f"rate_limit_tiers[{tier}] must be > 0, got {scale}")
+        return value
+
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
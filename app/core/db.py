@@ -1,14 +1,182 @@
 # Database configuration and connection
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
-from sqlalchemy.pool import NullPool
 
 DATABASE_URL = settings.database_url  # Читаем из конфига адрес подключения к БД
+DATABASE_REPLICA_URL = settings.database_replica_url  # Реплика для чтения (пусто — читаем с основной БД)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, дополнительно считающий время ожидания свободного соединения.
+    В ожидание входит и открытие нового соединения, если пул ещё не заполнен.
+    
+    Стандартный QueuePool знает только текущее число занятых соединений,
+    но не сколько запросы простояли в очереди за ними — а именно это
+    показывает, что пул слишком мал.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0          # Сколько раз соединение выдавалось из пула
+        self.timeouts = 0           # Сколько раз не дождались соединения за pool_timeout
+        self.wait_time_total = 0.0  # Суммарное время ожидания, сек
+        self.wait_time_max = 0.0    # Максимальное время одного ожидания, сек
+
+    def reset_stats(self) -> None:
+        """Обнуляет счётчики, например после прогрева при старте"""
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            # Ошибки подключения и аутентификации — не таймаут ожидания пула
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_time_total += waited
+            if waited > self.wait_time_max:
+                self.wait_time_max = waited
+
+
+def create_engine_from_settings(url: str, readonly: bool = False) -> AsyncEngine:
+    """
+    Создаёт async engine с пулом соединений по настройкам из Settings.
+    
+    Args:
+        url: Адрес подключения к БД
+        readonly: Все транзакции только для чтения (engine реплики): запись
+            падает сразу, даже если вместо реплики подключена обычная БД
+            
+    Returns:
+        Настроенный AsyncEngine
+    """
+    connect_args = {}
+    if make_url(url).get_backend_name() == "postgresql":
+        options = []
+        if settings.db_statement_timeout_ms > 0:
+            # Ограничиваем время выполнения запроса на стороне сервера
+            options.append(f"-c statement_timeout={settings.db_statement_timeout_ms}")
+        if readonly:
+            options.append("-c default_transaction_read_only=on")
+        if options:
+            connect_args["options"] = " ".join(options)
+    
+    return create_async_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=TimedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
 
-engine = create_async_engine(DATABASE_URL, echo=True, poolclass=NullPool)
+def get_pool_stats(target: AsyncEngine | None = None) -> dict:
+    """
+    Возвращает текущее состояние пула соединений.
+    
+    Args:
+        target: Engine, по умолчанию основной
+        
+    Returns:
+        Словарь с размером пула, занятыми соединениями, overflow и временем ожидания
+    """
+    pool = (target or engine).pool
+    stats = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, TimedAsyncQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_time_total=round(pool.wait_time_total, 6),
+            wait_time_max=round(pool.wait_time_max, 6),
+            wait_time_avg=round(pool.wait_time_total / pool.checkouts, 6) if pool.checkouts else 0.0,
+        )
+    return stats
+
+
+engine = create_engine_from_settings(DATABASE_URL)
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+# Без реплики чтение идёт через основной engine
+replica_engine = create_engine_from_settings(DATABASE_REPLICA_URL, readonly=True) if DATABASE_REPLICA_URL else engine
+ReplicaSessionLocal = sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Запрос уже записал что-то в основную БД: его дальнейшее чтение идёт туда же,
+# иначе реплика с отставанием вернула бы данные без его же изменений
+_wrote_to_primary: ContextVar[bool] = ContextVar("wrote_to_primary", default=False)
+
+# Ключ session.info: сессия что-то изменила в БД (flush ORM-объектов или INSERT/UPDATE/DELETE)
+_SESSION_WROTE_KEY = "wrote"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session: Session, flush_context) -> None:
+    """Flush вызывается только при наличии изменений в объектах сессии"""
+    session.info[_SESSION_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml_write(orm_execute_state: ORMExecuteState) -> None:
+    """INSERT/UPDATE/DELETE через session.execute, в том числе с RETURNING"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_SESSION_WROTE_KEY] = True
+
+
+def session_wrote(session: AsyncSession) -> bool:
+    """Были ли в сессии изменения БД (UPDATE без подходящих строк тоже считается)"""
+    return session.info.get(_SESSION_WROTE_KEY, False)
+
+
+def has_replica() -> bool:
+    """Настроена ли отдельная реплика для чтения"""
+    return replica_engine is not engine
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    """Читает ли сессия с отдельной реплики, а не с основной БД"""
+    return has_replica() and session.bind is replica_engine
+
+
+def mark_primary_write() -> None:
+    """
+    Отмечает, что текущий запрос закоммитил изменения в основной БД.
+    Флаг живёт в контексте задачи asyncio, то есть в пределах одного HTTP-запроса.
+    """
+    _wrote_to_primary.set(True)
+
+
+def get_read_session_factory() -> sessionmaker:
+    """
+    Фабрика сессий для чтения: реплика, если она настроена и текущий запрос
+    ещё ничего не записал в основную БД, иначе основная БД.
+    """
+    if has_replica() and not _wrote_to_primary.get():
+        return ReplicaSessionLocal
+    return AsyncSessionLocal
+
 async def get_async_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         try:
@@ -17,4 +185,4 @@ async def get_async_session() -> AsyncSession:
             await session.rollback()  # Откатываем транзакцию при ошибке
             raise
         finally:
-            await session.close()     # Закрываем сессию
\ No newline at end of file
+            await session.close()     # Закрываем сессию
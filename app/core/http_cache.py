@@ -0,0 +1,111 @@
+"""
+Условные GET-запросы: ETag, If-None-Match и Cache-Control
+"""
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Response, status as http_status
+
+from app.core.config import settings
+
+# Заказ виден только владельцу и меняется в любой момент: кэшировать можно,
+# но каждый раз с проверкой ETag
+ORDER_CACHE_CONTROL = "private, no-cache"
+
+
+def catalog_cache_control() -> str:
+    """
+    Returns:
+        Cache-Control для публичных данных каталога (товары, страницы каталога, категории)
+    """
+    if settings.catalog_cache_max_age_seconds <= 0:
+        return "public, no-cache"
+    return f"public, max-age={settings.catalog_cache_max_age_seconds}"
+
+
+def make_etag(*parts) -> str:
+    """
+    Слабый ETag из частей, однозначно задающих состояние ресурса.
+    
+    Слабый, потому что одно и то же состояние может отдаваться разными байтами
+    (быстрый JSON, сжатие), а сравнение идёт только по данным.
+    
+    Args:
+        parts: Тип ресурса, ID, версия строки и т. п.
+        
+    Returns:
+        Значение заголовка ETag, например W/"order-1-3"
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def make_rows_etag(prefix: str, rows: Iterable) -> str:
+    """
+    ETag набора строк по их ID и версиям.
+    
+    Меняется, если изменилась любая строка, а также если строка появилась
+    в наборе или выпала из него.
+    
+    Args:
+        prefix: Тип ресурса
+        rows: Строки с полями id и version в порядке выдачи
+        
+    Returns:
+        Значение заголовка ETag
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for row in rows:
+        digest.update(f"{row.id}:{row.version};".encode())
+    return make_etag(prefix, digest.hexdigest())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет If-None-Match по правилам слабого сравнения (RFC 9110, 13.1.2).
+    
+    Args:
+        if_none_match: Значение заголовка If-None-Match (список ETag через запятую или *)
+        etag: Текущий ETag ресурса
+        
+    Returns:
+        True, если у клиента актуальная версия ресурса
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    """
+    Выставляет ETag и Cache-Control в ответе с телом.
+    
+    Args:
+        response: FastAPI Response объект
+        etag: Текущий ETag ресурса
+        cache_control: Значение Cache-Control
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """
+    Ответ 304 без тела: FastAPI отдаёт его как есть, без response_model.
+    
+    Args:
+        etag: Текущий ETag ресурса
+        cache_control: Значение Cache-Control
+        
+    Returns:
+        Response со статусом 304
+    """
+    return Response(
+        status_code=http_status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
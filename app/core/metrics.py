@@ -0,0 +1,299 @@
+"""
+Метрики сервиса в формате Prometheus: латентность и статусы по маршрутам,
+число и время SQL-запросов на каждый запрос
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.db import get_pool_stats
+from app.core.rate_limit import get_rate_limit_stats
+from app.core.security import get_auth_cache_stats
+from app.repositories.nomenclature_repository import NomenclatureRepository
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 7, 10, 15, 20, 30, 50, 100)
+QUERY_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    """Форматирует метки в виде {name="value",...} с экранированием"""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """Монотонный счётчик с метками"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Увеличивает счётчик для набора значений меток"""
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        """Строки метрики в текстовом формате Prometheus"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и метками"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # метки → [счётчики по корзинам (последняя — +Inf), сумма, количество]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Учитывает наблюдение для набора значений меток"""
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def render(self) -> list[str]:
+        """Строки метрики в текстовом формате Prometheus"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Реестр метрик и источников gauge-значений, собираемых в момент запроса /metrics"""
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        self._gauge_collectors: list[Callable[[], list[tuple[str, str, dict, float]]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """Создаёт и регистрирует счётчик"""
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        """Создаёт и регистрирует гистограмму"""
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_gauges(self, collector: Callable[[], list[tuple[str, str, dict, float]]]) -> None:
+        """
+        Регистрирует функцию, возвращающую текущие значения gauge-метрик.
+        
+        Args:
+            collector: Функция, возвращающая список (name, documentation, labels, value)
+        """
+        self._gauge_collectors.append(collector)
+
+    def render(self) -> str:
+        """Все метрики реестра в текстовом формате Prometheus"""
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        
+        # Сэмплы одной метрики должны идти подряд, поэтому группируем по имени
+        families: dict[str, tuple[str, list[str]]] = {}
+        for collector in self._gauge_collectors:
+            for name, documentation, labels, value in collector():
+                names = tuple(labels)
+                sample = f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {value}"
+                families.setdefault(name, (documentation, []))[1].append(sample)
+        for name, (documentation, samples) in families.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "Число HTTP-запросов", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Длительность обработки HTTP-запроса", ("method", "route")
+)
+db_queries_per_request = registry.histogram(
+    "http_request_db_queries", "Число SQL-запросов на один HTTP-запрос", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+db_time_per_request = registry.histogram(
+    "http_request_db_seconds", "Суммарное время SQL-запросов на один HTTP-запрос", ("method", "route"), QUERY_TIME_BUCKETS
+)
+db_queries_total = registry.counter(
+    "db_queries_total", "Число SQL-запросов (включая выполненные вне HTTP-запросов)"
+)
+
+
+def collect_service_gauges() -> list[tuple[str, str, dict, float]]:
+    """Текущее состояние пула соединений, in-process кэшей и ограничения запросов"""
+    pool = get_pool_stats()
+    gauges = [
+        ("db_pool_size", "Постоянный размер пула соединений", {}, pool["size"]),
+        ("db_pool_checked_out", "Соединения, выданные в работу", {}, pool["checked_out"]),
+        ("db_pool_overflow", "Текущий overflow пула", {}, pool["overflow"]),
+        ("db_pool_checkouts", "Сколько раз соединение выдавалось из пула", {}, pool.get("checkouts", 0)),
+        ("db_pool_timeouts", "Сколько раз не дождались соединения", {}, pool.get("timeouts", 0)),
+        ("db_pool_wait_seconds_total", "Суммарное время ожидания соединения", {}, pool.get("wait_time_total", 0.0)),
+    ]
+    for cache_name, stats in get_auth_cache_stats().items():
+        labels = {"cache": cache_name}
+        gauges.append(("auth_cache_size", "Число записей в кэше аутентификации", labels, stats["size"]))
+        gauges.append(("auth_cache_hits", "Попадания в кэш аутентификации", labels, stats["hits"]))
+        gauges.append(("auth_cache_misses", "Промахи кэша аутентификации", labels, stats["misses"]))
+    
+    rate_limit = get_rate_limit_stats()
+    for group, stats in rate_limit["groups"].items():
+        labels = {"group": group}
+        gauges.append(("rate_limit_keys", "Число корзин ограничения частоты", labels, stats["keys"]))
+        gauges.append(("rate_limit_rejected", "Запросы, отклонённые ограничением частоты", labels, stats["rejected"]))
+    gauges.append(("rate_limit_concurrent_active", "Запросы клиентов в работе", {}, rate_limit["concurrency"]["active"]))
+    gauges.append((
+        "rate_limit_concurrent_rejected", "Запросы, отклонённые ограничением одновременных запросов",
+        {}, rate_limit["concurrency"]["rejected"]
+    ))
+    
+    stats = NomenclatureRepository.get_cache_stats()
+    gauges.extend([
+        ("nomenclature_cache_size", "Число записей в кэше номенклатуры", {}, stats["size"]),
+        ("nomenclature_cache_bytes", "Оценка памяти кэша номенклатуры, байт", {}, stats["bytes"]),
+        ("nomenclature_cache_hits", "Попадания в кэш номенклатуры", {}, stats["hits"]),
+        ("nomenclature_cache_misses", "Промахи кэша номенклатуры", {}, stats["misses"]),
+        ("nomenclature_cache_evictions", "Вытеснения из кэша номенклатуры", {}, stats["evictions"]),
+    ])
+    return gauges
+
+
+registry.register_gauges(collect_service_gauges)
+
+
+class QueryStats:
+    """Счётчик SQL-запросов текущего HTTP-запроса"""
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def get_current_query_stats() -> Optional[QueryStats]:
+    """Возвращает счётчик SQL-запросов текущего HTTP-запроса (None вне запроса)"""
+    return _current_query_stats.get()
+
+
+def install_query_tracking(target: AsyncEngine) -> None:
+    """
+    Подключает учёт SQL-запросов к engine через события SQLAlchemy.
+    
+    Args:
+        target: Engine, запросы которого нужно считать
+    """
+    sync_engine = target.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started_at"].pop()
+        db_queries_total.inc()
+        stats = _current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += time.perf_counter() - started
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        # Запрос упал — снимаем метку времени, чтобы стек не рос
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started_at"):
+            connection.info["query_started_at"].pop()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware, собирающее латентность, статусы и SQL-статистику
+    по шаблону маршрута (например /api/orders/{order_id}/items).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = QueryStats()
+        token = _current_query_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_query_stats.reset(token)
+            
+            # Шаблон маршрута выставляет роутер; для несовпавших путей — общая метка,
+            # чтобы произвольные URL не плодили временные ряды
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            
+            http_requests_total.inc(method, route_path, str(status_code))
+            http_request_duration.observe(elapsed, method, route_path)
+            db_queries_per_request.observe(stats.count, method, route_path)
+            db_time_per_request.observe(stats.duration, method, route_path)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Отдаёт все метрики в текстовом формате Prometheus"""
+    return Response(
+        content=registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
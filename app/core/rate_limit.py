@@ -0,0 +1,255 @@
+"""
+Ограничение частоты и числа одновременных запросов по API ключу.
+
+Состояние хранится в памяти процесса (у каждого процесса uvicorn свои счётчики).
+Лимиты есть только у ключей, прошедших аутентификацию: ключ, которого нет в кэше
+клиентов, сначала проверяется (get_current_client заполняет кэш), поэтому
+перебор случайных ключей не создаёт корзин. Отказ по лимиту для уже проверенного
+ключа не стоит ни одного запроса к БД.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.security import client_cache, get_current_client
+from app.models.client import Client
+
+DEFAULT_TIER = "standard"  # Тариф клиента без тарифа в настройках
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket на каждый ключ: корзина ёмкостью burst пополняется со скоростью
+    rate токенов в секунду, каждый запрос забирает один токен.
+    
+    Состояние ключа — кортеж (токены, время обновления) в OrderedDict, упорядоченном
+    по давности обращения. Корзина, к которой не обращались burst / rate секунд,
+    уже полна и ничем не отличается от отсутствующей, поэтому такие ключи удаляются
+    с начала словаря при следующих вызовах. Сверх max_keys вытесняются самые давние.
+    
+    Рассчитан на работу внутри одного event loop: все операции синхронные
+    и не отдают управление, поэтому блокировки не нужны.
+    
+    Attributes:
+        rate: Пополнение корзины, токенов в секунду
+        burst: Ёмкость корзины
+        max_keys: Максимальное число корзин
+        allowed: Число разрешённых запросов
+        rejected: Число отклонённых запросов
+        evictions: Корзины, вытесненные по max_keys до того, как наполнились
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        max_keys: int,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def acquire(self, key: str, scale: float = 1.0) -> float:
+        """
+        Забирает токен из корзины ключа.
+        
+        Args:
+            key: Ключ (API ключ клиента)
+            scale: Множитель скорости и ёмкости корзины (тариф клиента)
+            
+        Returns:
+            0, если запрос разрешён, иначе через сколько секунд появится токен
+        """
+        now = self._clock()
+        rate = self.rate * scale
+        burst = self.burst * scale
+        
+        bucket = self._buckets.pop(key, None)
+        tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+            self.allowed += 1
+        else:
+            retry_after = (1 - tokens) / rate
+            self.rejected += 1
+        self._buckets[key] = (tokens, now)
+        
+        self._evict(now)
+        return retry_after
+
+    def _evict(self, now: float) -> None:
+        """Удаляет наполнившиеся корзины и лишние сверх max_keys"""
+        # Время наполнения не зависит от тарифа: скорость и ёмкость умножаются на одно число
+        full_before = now - self.burst / self.rate
+        while self._buckets:
+            key = next(iter(self._buckets))
+            updated = self._buckets[key][1]
+            if updated > full_before and len(self._buckets) <= self.max_keys:
+                break
+            del self._buckets[key]
+            if updated > full_before:
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def stats(self) -> dict:
+        """Статистика ограничителя"""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "keys": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+
+class ConcurrencyLimiter:
+    """
+    Число запросов каждого ключа, которые обрабатываются прямо сейчас.
+    Ключ хранится, только пока у него есть запросы в работе.
+    
+    Attributes:
+        rejected: Число запросов, отклонённых из-за лимита
+    """
+
+    def __init__(self):
+        self._active: dict[str, int] = {}
+        self.rejected = 0
+
+    def try_acquire(self, key: str, limit: int) -> bool:
+        """
+        Занимает слот ключа, если занято меньше limit.
+        
+        Returns:
+            True, если слот занят и его нужно освободить через release
+        """
+        active = self._active.get(key, 0)
+        if active >= limit:
+            self.rejected += 1
+            return False
+        self._active[key] = active + 1
+        return True
+
+    def release(self, key: str) -> None:
+        """Освобождает слот ключа"""
+        active = self._active.pop(key) - 1
+        if active:
+            self._active[key] = active
+
+    def stats(self) -> dict:
+        """Статистика ограничителя"""
+        return {
+            "keys": len(self._active),
+            "active": sum(self._active.values()),
+            "rejected": self.rejected,
+        }
+
+
+# Ограничители частоты по группам маршрутов (создаются при подключении маршрутов)
+limiters: dict[str, TokenBucketLimiter] = {}
+
+concurrency_limiter = ConcurrencyLimiter()
+
+
+def _tier_scale(client: Client) -> float:
+    """Множитель лимитов по тарифу клиента"""
+    tier = client.tier or DEFAULT_TIER
+    return settings.rate_limit_tiers.get(tier, settings.rate_limit_tiers.get(DEFAULT_TIER, 1.0))
+
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    """Ошибка 429 с Retry-After в целых секундах"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+def rate_limit(group: str) -> Callable[[Request], AsyncIterator[None]]:
+    """
+    Dependency-фабрика: ограничивает запросы группы маршрутов по заголовку X-API-Key.
+    
+    Подключается через dependencies маршрута: такие зависимости выполняются раньше
+    параметров эндпоинта, то есть раньше открытия сессии БД эндпоинта.
+    
+    Клиент берётся из кэша аутентификации; если ключа там нет, он проверяется
+    через get_current_client (неверный ключ получает 401 и попадает в кэш неверных
+    ключей, верный — в кэш клиентов, и эндпоинт его уже не перепроверяет). Затем
+    действует корзина ключа для группы из RATE_LIMITS (группы там нет — частота
+    не ограничивается) с множителем тарифа и общий для всех групп лимит
+    одновременных запросов ключа. Запросы без X-API-Key пропускаются:
+    их отклонит аутентификация.
+    
+    Args:
+        group: Название группы маршрутов в RATE_LIMITS
+        
+    Returns:
+        Dependency для Depends
+        
+    Raises:
+        HTTPException 401: Неверный API ключ
+        HTTPException 429: Превышен лимит частоты или одновременных запросов (с Retry-After)
+    """
+    limits = settings.rate_limits.get(group)
+    limiter = None
+    if limits is not None:
+        limiter = limiters.setdefault(
+            group, TokenBucketLimiter(limits[0], limits[1], settings.rate_limit_max_keys)
+        )
+
+    async def dependency(request: Request) -> AsyncIterator[None]:
+        api_key = request.headers.get("x-api-key")
+        if not settings.rate_limit_enabled or not api_key:
+            yield
+            return
+        
+        client = client_cache.peek(api_key)
+        if client is None:
+            client = await get_current_client(api_key)
+        
+        scale = _tier_scale(client)
+        if limiter is not None:
+            retry_after = limiter.acquire(api_key, scale)
+            if retry_after:
+                raise _too_many_requests(f"Rate limit exceeded for {group}", retry_after)
+        
+        if settings.rate_limit_max_concurrent <= 0:
+            yield
+            return
+        
+        max_concurrent = max(1, round(settings.rate_limit_max_concurrent * scale))
+        if not concurrency_limiter.try_acquire(api_key, max_concurrent):
+            raise _too_many_requests("Too many concurrent requests", 1)
+        try:
+            yield
+        finally:
+            concurrency_limiter.release(api_key)
+    
+    return dependency
+
+
+def get_rate_limit_stats() -> dict:
+    """
+    Статистика ограничения запросов.
+    
+    Returns:
+        Словарь со статистикой по группам маршрутов и по одновременным запросам
+    """
+    return {
+        "groups": {group: limiter.stats() for group, limiter in limiters.items()},
+        "concurrency": concurrency_limiter.stats(),
+    }
@@ -0,0 +1,34 @@
+"""
+Классы HTTP-ответов: JSON через orjson
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    """
+    Кодирует типы, которые orjson не поддерживает сам.
+    Decimal отдаётся строкой — так же, как его сериализует Pydantic.
+    """
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON-ответ, кодируемый orjson.
+    
+    Принимает как уже подготовленные FastAPI данные, так и готовые словари
+    с Decimal и вложенными Pydantic-моделями, которые можно вернуть из
+    эндпоинта напрямую, минуя повторную валидацию по response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
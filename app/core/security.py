@@ -2,11 +2,26 @@
 Утилиты безопасности: генерация API ключей, аутентификация
 """
 import secrets
+from typing import Optional
 from fastapi import Header, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.client import Client
-from app.core.db import AsyncSessionLocal
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, get_read_session_factory
+from app.repositories.clients_repository import ClientsRepository
+
+
+# Кэш API ключ → клиент. Клиенты хранятся в detached-состоянии и используются только для чтения.
+client_cache: TTLCache[str, Client] = TTLCache(
+    maxsize=settings.auth_cache_max_size,
+    ttl=settings.auth_cache_ttl_seconds
+)
+
+# Отдельный кэш неверных ключей, чтобы перебор ключей не вытеснял настоящих клиентов
+invalid_key_cache: TTLCache[str, bool] = TTLCache(
+    maxsize=settings.auth_negative_cache_max_size,
+    ttl=settings.auth_negative_cache_ttl_seconds
+)
 
 
 def generate_api_key() -> str:
@@ -20,11 +35,71 @@ def generate_api_key() -> str:
     return f"gen_{random_part}"
 
 
+def invalidate_api_key(api_key: str) -> None:
+    """
+    Сбрасывает закэшированный результат аутентификации для ключа.
+    Вызывать при смене ключа или выдаче нового.
+    
+    Args:
+        api_key: API ключ
+    """
+    client_cache.pop(api_key)
+    invalid_key_cache.pop(api_key)
+
+
+def invalidate_client(client_id: int) -> int:
+    """
+    Сбрасывает все закэшированные ключи клиента.
+    Вызывать при удалении клиента или изменении его данных.
+    
+    Args:
+        client_id: ID клиента
+        
+    Returns:
+        Число удалённых записей
+    """
+    return client_cache.invalidate_where(lambda _, client: client.id == client_id)
+
+
+def get_auth_cache_stats() -> dict:
+    """
+    Статистика кэшей аутентификации.
+    
+    Returns:
+        Словарь со статистикой кэша клиентов и кэша неверных ключей
+    """
+    return {
+        "clients": client_cache.stats(),
+        "invalid_keys": invalid_key_cache.stats(),
+    }
+
+
+async def _find_client(api_key: str) -> Optional[Client]:
+    """
+    Ищет клиента по API ключу на реплике, а если там его нет — в основной БД:
+    только что выданный ключ мог ещё не дойти до реплики, а отказ кэшируется.
+    
+    Args:
+        api_key: API ключ
+        
+    Returns:
+        Клиент или None, если ключ неверный
+    """
+    session_factory = get_read_session_factory()
+    async with session_factory() as session:
+        client = await ClientsRepository.get_by_api_key(session, api_key)
+    if client is None and session_factory is not AsyncSessionLocal:
+        async with AsyncSessionLocal() as session:
+            client = await ClientsRepository.get_by_api_key(session, api_key)
+    return client
+
+
 async def get_current_client(
     x_api_key: str = Header(..., description="API ключ для аутентификации")
 ) -> Client:
     """
     Dependency для получения текущего авторизованного клиента по API ключу.
+    Результат проверки ключа кэшируется, в том числе отрицательный.
     
     Args:
         x_api_key: Значение заголовка X-API-Key
@@ -35,18 +110,49 @@ async def get_current_client(
     Raises:
         HTTPException 401: Если ключ неверный или клиент не найден
     """
-    session: AsyncSession = AsyncSessionLocal()
-    try:
-        stmt = select(Client).where(Client.api_key == x_api_key)
-        result = await session.execute(stmt)
-        client = result.scalars().first()
-        
-        if client is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid API key"
-            )
-        
+    client = client_cache.get(x_api_key)
+    if client is not None:
         return client
-    finally:
-        await session.close()
+    
+    if invalid_key_cache.get(x_api_key):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key"
+        )
+    
+    client = await _find_client(x_api_key)
+    if client is None:
+        invalid_key_cache.set(x_api_key, True)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key"
+        )
+    
+    client_cache.set(x_api_key, client)
+    return client
+
+
+async def require_admin(
+    x_admin_token: str = Header(..., description="Токен администратора")
+) -> None:
+    """
+    Dependency для административных эндпоинтов: проверяет X-Admin-Token.
+    
+    Args:
+        x_admin_token: Значение заголовка X-Admin-Token
+        
+    Raises:
+        HTTPException 403: Административные эндпоинты отключены (admin_token не задан)
+        HTTPException 401: Неверный токен
+    """
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API is disabled"
+        )
+    
+    if not secrets.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
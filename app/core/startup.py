@@ -0,0 +1,44 @@
+"""
+Замер длительности фаз старта приложения
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StartupTimer:
+    """
+    Длительность фаз старта: импорт, маршруты, прогрев пула и запросов и т. д.
+    
+    Фазы записываются в порядке завершения; итог — время от создания таймера
+    до последней фазы, поэтому в него входит и то, что в фазы не попало.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}  # Фаза → длительность, сек
+        self.total = 0.0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Замеряет фазу старта.
+        
+        Args:
+            name: Название фазы
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            self.phases[name] = round(finished - started, 6)
+            self.total = round(finished - self.started, 6)
+
+    def report(self) -> str:
+        """
+        Returns:
+            Строка для лога: итог и длительность каждой фазы
+        """
+        phases = ", ".join(f"{name} {seconds:.3f} с" for name, seconds in self.phases.items())
+        return f"Старт за {self.total:.3f} с: {phases}"
@@ -0,0 +1,91 @@
+"""
+Потоковая обработка тел запросов и файлов кусками ограниченного размера
+"""
+import zlib
+from typing import AsyncIterator, BinaryIO
+
+# Размер куска при чтении файлов
+CHUNK_SIZE = 1 << 20
+
+
+async def gunzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Распаковывает gzip-поток по мере поступления кусков.
+    
+    Args:
+        chunks: Куски сжатого потока
+        
+    Yields:
+        Куски распакованных данных
+        
+    Raises:
+        zlib.error: Поток не является корректным gzip
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        # Ограничение выхода защищает от «gzip-бомб»: остаток разжимается на следующих итерациях
+        data = decompressor.decompress(chunk, CHUNK_SIZE)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, CHUNK_SIZE)
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+    if not decompressor.eof:
+        raise zlib.error("Truncated gzip stream")
+
+
+async def read_chunks(file: BinaryIO, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Читает файл кусками.
+    
+    Args:
+        file: Открытый в двоичном режиме файл
+        chunk_size: Размер куска, байт
+        
+    Yields:
+        Куски файла
+    """
+    while chunk := file.read(chunk_size):
+        yield chunk
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """
+    Сжимает поток в gzip по мере поступления кусков.
+    
+    Args:
+        chunks: Куски исходных данных
+        level: Уровень сжатия (1–9)
+        
+    Yields:
+        Куски сжатого потока
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Разрешает ли заголовок Accept-Encoding ответ в gzip.
+    
+    Args:
+        accept_encoding: Значение заголовка (например "gzip, deflate, br" или "gzip;q=0")
+        
+    Returns:
+        True, если gzip указан без q=0
+    """
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() != "gzip":
+            continue
+        _, _, quality = params.replace(" ", "").lower().partition("q=")
+        try:
+            return float(quality) > 0 if quality else True
+        except ValueError:
+            return False
+    return False
@@ -2,7 +2,7 @@
 DTO модели для аутентификации и регистрации клиентов
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 
 class RegisterRequest(BaseModel):
@@ -35,11 +35,34 @@ class RegisterResponseData(BaseModel):
         }
 
 
+class BulkRegisterRequest(BaseModel):
+    """Запрос на регистрацию нескольких клиентов (например, субаккаунтов партнёра)"""
+    clients: List[RegisterRequest] = Field(
+        ..., min_length=1, max_length=1000, description="Клиенты для регистрации (до 1000 за запрос)"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "clients": [
+                    {"name": "Партнёр — филиал 1", "address": "г. Москва, ул. Примерная, д. 1"},
+                    {"name": "Партнёр — филиал 2", "address": None}
+                ]
+            }
+        }
+
+
+class BulkRegisterResponseData(BaseModel):
+    """Данные ответа при регистрации нескольких клиентов"""
+    clients: List[RegisterResponseData] = Field(..., description="Созданные клиенты в порядке запроса")
+
+
 class ClientMeData(BaseModel):
     """Данные клиента для эндпоинта /me"""
     id: int = Field(..., description="ID клиента")
     name: str = Field(..., description="Имя клиента")
     address: Optional[str] = Field(None, description="Адрес клиента")
+    tier: str = Field(..., description="Тариф клиента (определяет лимиты запросов)")
 
     class Config:
         from_attributes = True
@@ -47,6 +70,7 @@ class ClientMeData(BaseModel):
             "example": {
                 "id": 1,
                 "name": "Иван Петров",
-                "address": "г. Москва, ул. Тверская, д. 15, кв. 42"
+                "address": "г. Москва, ул. Тверская, д. 15, кв. 42",
+                "tier": "standard"
             }
         }
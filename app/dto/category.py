@@ -0,0 +1,63 @@
+"""
+DTO модели для работы с иерархией категорий
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class CategoryNode(BaseModel):
+    """Категория в поддереве"""
+    id: int = Field(..., description="ID категории")
+    name: str = Field(..., description="Название категории")
+    slug: str = Field(..., description="Slug категории")
+    parent_id: Optional[int] = Field(None, description="ID родительской категории")
+    depth: int = Field(..., description="Глубина относительно корня поддерева (0 — сам корень)")
+
+    class Config:
+        from_attributes = True
+
+
+class CategorySubtreeResponse(BaseModel):
+    """Поддерево категории"""
+    root_id: int = Field(..., description="ID корневой категории поддерева")
+    nodes: List[CategoryNode] = Field(default_factory=list, description="Категории поддерева в порядке обхода в ширину")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "root_id": 1,
+                "nodes": [
+                    {"id": 1, "name": "Бытовая техника", "slug": "appliances", "parent_id": None, "depth": 0},
+                    {"id": 2, "name": "Стиральные машины", "slug": "washing-machines", "parent_id": 1, "depth": 1}
+                ]
+            }
+        }
+
+
+class CategoryProductCount(CategoryNode):
+    """Категория поддерева с числом товаров"""
+    direct_products: int = Field(..., description="Товаров, привязанных непосредственно к категории")
+    total_products: int = Field(..., description="Уникальных товаров в категории и всех её потомках")
+
+
+class CategoryProductCountsResponse(BaseModel):
+    """Число товаров по каждой категории поддерева"""
+    root_id: int = Field(..., description="ID корневой категории поддерева")
+    nodes: List[CategoryProductCount] = Field(default_factory=list, description="Категории поддерева с числом товаров")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "root_id": 1,
+                "nodes": [
+                    {
+                        "id": 1, "name": "Бытовая техника", "slug": "appliances", "parent_id": None,
+                        "depth": 0, "direct_products": 0, "total_products": 12
+                    },
+                    {
+                        "id": 2, "name": "Стиральные машины", "slug": "washing-machines", "parent_id": 1,
+                        "depth": 1, "direct_products": 5, "total_products": 5
+                    }
+                ]
+            }
+        }
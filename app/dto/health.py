@@ -0,0 +1,97 @@
+"""
+DTO модели для служебных эндпоинтов (состояние сервиса)
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class PoolStatsData(BaseModel):
+    """Состояние пула соединений с БД"""
+    size: int = Field(..., description="Постоянный размер пула")
+    checked_in: int = Field(..., description="Свободные соединения в пуле")
+    checked_out: int = Field(..., description="Соединения, выданные в работу")
+    overflow: int = Field(..., description="Текущий overflow (может быть отрицательным, пока пул не заполнен)")
+    checkouts: int = Field(0, description="Сколько раз соединение выдавалось из пула")
+    timeouts: int = Field(0, description="Сколько раз не дождались соединения за pool_timeout")
+    wait_time_total: float = Field(0.0, description="Суммарное время ожидания соединения, сек")
+    wait_time_max: float = Field(0.0, description="Максимальное время ожидания соединения, сек")
+    wait_time_avg: float = Field(0.0, description="Среднее время ожидания соединения, сек")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "size": 10,
+                "checked_in": 7,
+                "checked_out": 3,
+                "overflow": -7,
+                "checkouts": 1520,
+                "timeouts": 0,
+                "wait_time_total": 0.183,
+                "wait_time_max": 0.012,
+                "wait_time_avg": 0.00012
+            }
+        }
+
+
+class CacheStatsData(BaseModel):
+    """Статистика in-process кэша"""
+    size: int = Field(..., description="Текущее число записей")
+    maxsize: int = Field(..., description="Максимальное число записей")
+    hits: int = Field(..., description="Попадания")
+    misses: int = Field(..., description="Промахи")
+    evictions: int = Field(..., description="Записи, вытесненные по размеру")
+    hit_ratio: float = Field(..., description="Доля попаданий")
+    bytes: int = Field(0, description="Оценка памяти, занятой записями, байт (если кэш ограничен по памяти)")
+    max_bytes: Optional[int] = Field(None, description="Ограничение памяти кэша, байт")
+
+
+class AuthCacheStatsData(BaseModel):
+    """Статистика кэшей аутентификации"""
+    clients: CacheStatsData = Field(..., description="Кэш API ключ → клиент")
+    invalid_keys: CacheStatsData = Field(..., description="Кэш неверных API ключей")
+
+
+class RateLimitGroupStats(BaseModel):
+    """Статистика ограничения частоты одной группы маршрутов"""
+    rate: float = Field(..., description="Запросов в секунду на ключ (тариф standard)")
+    burst: float = Field(..., description="Ёмкость корзины (тариф standard)")
+    keys: int = Field(..., description="Корзин в памяти")
+    allowed: int = Field(..., description="Разрешённые запросы")
+    rejected: int = Field(..., description="Отклонённые запросы (429)")
+    evictions: int = Field(..., description="Корзины, вытесненные по RATE_LIMIT_MAX_KEYS до наполнения")
+
+
+class ConcurrencyStats(BaseModel):
+    """Статистика ограничения одновременных запросов"""
+    keys: int = Field(..., description="Ключи с запросами в работе")
+    active: int = Field(..., description="Запросы в работе")
+    rejected: int = Field(..., description="Отклонённые запросы (429)")
+
+
+class RateLimitStatsData(BaseModel):
+    """Статистика ограничения запросов по API ключу в этом процессе"""
+    groups: dict[str, RateLimitGroupStats] = Field(..., description="Ограничение частоты по группам маршрутов")
+    concurrency: ConcurrencyStats = Field(..., description="Ограничение одновременных запросов")
+
+
+class ReadinessData(BaseModel):
+    """Готовность экземпляра принимать трафик"""
+    ready: bool = Field(..., description="Прогрев завершён и экземпляр не останавливается")
+    startup_seconds: float = Field(..., description="Длительность старта до готовности, сек")
+    phases: dict[str, float] = Field(..., description="Длительность фаз старта, сек")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ready": True,
+                "startup_seconds": 1.284,
+                "phases": {
+                    "imports": 0.912,
+                    "routes": 0.231,
+                    "db_pool": 0.048,
+                    "warmup_queries": 0.071,
+                    "background_tasks": 0.0002
+                }
+            }
+        }
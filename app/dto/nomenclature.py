@@ -1 +1,116 @@
-# Nomenclature DTOs for API requests/responses
\ No newline at end of file
+"""
+DTO модели для работы с номенклатурой (каталог товаров)
+"""
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from decimal import Decimal
+
+
+# Порядок выдачи каталога: по id, по возрастанию или убыванию цены (при равной цене — по id)
+CatalogSort = Literal["id", "price", "-price"]
+
+# Формат фида для импорта номенклатуры
+ImportFormat = Literal["csv", "ndjson"]
+
+
+class NomenclatureItem(BaseModel):
+    """Товар каталога"""
+    id: int = Field(..., description="ID товара")
+    sku: str = Field(..., description="Артикул товара")
+    name: str = Field(..., description="Название товара")
+    price: Decimal = Field(..., description="Текущая цена")
+    quantity: int = Field(
+        ...,
+        description=(
+            "Остаток на складе. У товара с шардированным остатком приблизительный: "
+            "покупки списывают шарды, а сумма попадает сюда при консолидации "
+            "(раз в STOCK_SHARD_CONSOLIDATE_INTERVAL_SECONDS)"
+        )
+    )
+    version: int = Field(
+        ...,
+        description=(
+            "Версия записи, растёт при каждом изменении; покупки товара с шардированным "
+            "остатком меняют её только при консолидации"
+        )
+    )
+
+    class Config:
+        from_attributes = True
+        json_schema_extra = {
+            "example": {
+                "id": 1,
+                "sku": "IPHONE15PRO",
+                "name": "iPhone 15 Pro 256GB",
+                "price": 99999.99,
+                "quantity": 15,
+                "version": 3
+            }
+        }
+
+
+class CatalogPage(BaseModel):
+    """Страница каталога с курсором на следующую страницу"""
+    items: List[NomenclatureItem] = Field(default_factory=list, description="Товары страницы")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (null — страница последняя)")
+    limit: int = Field(..., description="Размер страницы")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"id": 1, "sku": "IPHONE15PRO", "name": "iPhone 15 Pro 256GB", "price": 99999.99, "quantity": 15, "version": 3}
+                ],
+                "next_cursor": "eyJzIjoiaWQiLCJpIjoxfQ",
+                "limit": 1
+            }
+        }
+
+
+class NomenclatureImportResult(BaseModel):
+    """Результат импорта фида номенклатуры"""
+    format: ImportFormat = Field(..., description="Формат фида")
+    rows: int = Field(..., description="Уникальных артикулов в фиде (при повторе действует последняя строка)")
+    inserted: int = Field(..., description="Добавлено товаров")
+    updated: int = Field(..., description="Изменено товаров")
+    unchanged: int = Field(..., description="Товаров без изменений")
+    categories_linked: int = Field(..., description="Добавлено привязок к категориям")
+    categories_unlinked: int = Field(..., description="Удалено привязок к категориям")
+    unknown_categories: int = Field(..., description="Пропущено несуществующих категорий")
+    elapsed_seconds: float = Field(..., description="Время импорта, сек")
+    rows_per_second: float = Field(..., description="Скорость импорта, строк в секунду")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "format": "csv",
+                "rows": 1000000,
+                "inserted": 12000,
+                "updated": 250000,
+                "unchanged": 738000,
+                "categories_linked": 12500,
+                "categories_unlinked": 40,
+                "unknown_categories": 0,
+                "elapsed_seconds": 21.4,
+                "rows_per_second": 46728.97
+            }
+        }
+
+
+class StockShardsRequest(BaseModel):
+    """Запрос на изменение числа шардов остатка товара"""
+    shards: int = Field(..., ge=0, le=64, description="Число шардов (0 — выключить шардирование)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "shards": 16
+            }
+        }
+
+
+class StockShardsInfo(BaseModel):
+    """Режим хранения остатка товара"""
+    nomenclature_id: int = Field(..., description="ID товара")
+    stock_shards: int = Field(..., description="Число шардов остатка (0 — остаток в одной строке)")
+    quantity: int = Field(..., description="Точный остаток на складе")
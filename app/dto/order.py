@@ -2,10 +2,19 @@
 DTO модели для работы с заказами
 """
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal, Optional
+from datetime import datetime
 from decimal import Decimal
 
 
+# Вид ответа на изменение заказа:
+# full — все позиции, summary — только итоги, line — итоги и изменённая позиция
+OrderView = Literal["full", "summary", "line"]
+
+# Статусы заказа
+OrderStatus = Literal["created", "paid", "shipped", "completed", "cancelled"]
+
+
 class AddItemRequest(BaseModel):
     """Запрос на добавление товара в заказ"""
     nomenclature_id: int = Field(..., gt=0, description="ID товара из номенклатуры")
@@ -48,6 +57,8 @@ class OrderResponse(BaseModel):
     status: str = Field(..., description="Статус заказа")
     items: List[OrderItemResponse] = Field(default_factory=list, description="Список позиций заказа")
     total_amount: Decimal = Field(..., description="Общая сумма заказа")
+    items_count: int = Field(..., description="Число позиций в заказе")
+    version: int = Field(..., description="Версия заказа (для изменения статуса)")
 
     class Config:
         from_attributes = True
@@ -72,6 +83,120 @@ class OrderResponse(BaseModel):
                         "total_price": 24999.99
                     }
                 ],
-                "total_amount": 224999.97
+                "total_amount": 224999.97,
+                "items_count": 2,
+                "version": 3
+            }
+        }
+
+
+class AddItemsBatchRequest(BaseModel):
+    """Запрос на добавление нескольких товаров в заказ одной транзакцией"""
+    items: List[AddItemRequest] = Field(
+        ..., min_length=1, max_length=500, description="Позиции для добавления (до 500 за запрос)"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"nomenclature_id": 1, "quantity": 2},
+                    {"nomenclature_id": 7, "quantity": 1}
+                ]
             }
         }
+
+
+class BatchItemResult(BaseModel):
+    """Результат обработки одной позиции пакетного добавления"""
+    index: int = Field(..., description="Порядковый номер позиции в запросе (с 0)")
+    nomenclature_id: int = Field(..., description="ID товара")
+    quantity: int = Field(..., description="Запрошенное количество")
+    status: Literal["added", "not_found", "insufficient_stock"] = Field(..., description="Результат обработки позиции")
+    available: Optional[int] = Field(None, description="Остаток на складе (для insufficient_stock)")
+
+
+class BatchAddItemsResponse(BaseModel):
+    """Заказ после пакетного добавления и результаты по каждой позиции"""
+    order: OrderResponse = Field(..., description="Заказ со всеми позициями")
+    results: List[BatchItemResult] = Field(..., description="Результаты по позициям запроса")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "order": {
+                    "id": 1,
+                    "client_id": 1,
+                    "status": "created",
+                    "items": [
+                        {
+                            "id": 1,
+                            "nomenclature_id": 1,
+                            "quantity": 2,
+                            "unit_price": 99999.99,
+                            "total_price": 199999.98
+                        }
+                    ],
+                    "total_amount": 199999.98,
+                    "items_count": 1,
+                    "version": 2
+                },
+                "results": [
+                    {"index": 0, "nomenclature_id": 1, "quantity": 2, "status": "added", "available": None},
+                    {"index": 1, "nomenclature_id": 7, "quantity": 100, "status": "insufficient_stock", "available": 5}
+                ]
+            }
+        }
+
+
+class OrderStatusChangeRequest(BaseModel):
+    """Запрос на перевод заказа в другой статус"""
+    status: OrderStatus = Field(..., description="Новый статус заказа")
+    version: int = Field(..., ge=1, description="Версия заказа, на основе которой принято решение")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "paid",
+                "version": 3
+            }
+        }
+
+
+class OrderStatusInfo(BaseModel):
+    """Статус и версия заказа"""
+    id: int = Field(..., description="ID заказа")
+    status: str = Field(..., description="Статус заказа")
+    version: int = Field(..., description="Версия заказа")
+    updated_at: Optional[datetime] = Field(None, description="Время последнего изменения")
+
+
+class BulkOrderStatusRequest(BaseModel):
+    """Запрос на перевод нескольких заказов в один статус"""
+    order_ids: List[int] = Field(
+        ..., min_length=1, max_length=10000, description="ID заказов (до 10000 за запрос)"
+    )
+    status: OrderStatus = Field(..., description="Новый статус заказов")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "order_ids": [1, 2, 3],
+                "status": "shipped"
+            }
+        }
+
+
+class BulkOrderStatusResult(BaseModel):
+    """Результат перевода одного заказа"""
+    order_id: int = Field(..., description="ID заказа")
+    result: Literal["updated", "not_found", "invalid_transition"] = Field(..., description="Результат")
+    status: Optional[str] = Field(None, description="Статус заказа после запроса (для updated и invalid_transition)")
+    version: Optional[int] = Field(None, description="Версия заказа после запроса")
+
+
+class BulkOrderStatusResponse(BaseModel):
+    """Итоги массового перевода заказов"""
+    status: OrderStatus = Field(..., description="Целевой статус")
+    updated: int = Field(..., description="Число переведённых заказов")
+    results: List[BulkOrderStatusResult] = Field(..., description="Результаты в порядке запроса (без повторов ID)")
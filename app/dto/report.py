@@ -0,0 +1,75 @@
+"""
+DTO модели для отчётов по продажам
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+
+# Формат выгрузки заказов: ndjson — заказ с позициями в строке, csv — позиция в строке
+OrderExportFormat = Literal["ndjson", "csv"]
+
+
+class TopProduct(BaseModel):
+    """Товар в рейтинге продаж"""
+    nomenclature_id: int = Field(..., description="ID товара")
+    sku: str = Field(..., description="Артикул")
+    name: str = Field(..., description="Название товара")
+    units: int = Field(..., description="Продано единиц")
+    revenue: Decimal = Field(..., description="Выручка")
+    orders_count: int = Field(..., description="Число заказов с товаром (по дням)")
+    root_category_id: Optional[int] = Field(None, description="ID корневой категории товара")
+    root_category_name: Optional[str] = Field(None, description="Название корневой категории товара")
+
+    class Config:
+        from_attributes = True
+
+
+class TopProductsReport(BaseModel):
+    """Самые продаваемые товары за период"""
+    date_from: date = Field(..., description="Первый день периода (UTC)")
+    refreshed_at: Optional[datetime] = Field(None, description="Момент последнего обновления агрегатов")
+    items: List[TopProduct] = Field(default_factory=list, description="Товары по убыванию проданных единиц")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "date_from": "2026-10-12",
+                "refreshed_at": "2026-10-18T12:00:00Z",
+                "items": [
+                    {
+                        "nomenclature_id": 1, "sku": "WM-001", "name": "Стиральная машина",
+                        "units": 42, "revenue": "1259958.00", "orders_count": 40,
+                        "root_category_id": 1, "root_category_name": "Бытовая техника"
+                    }
+                ]
+            }
+        }
+
+
+class CategorySales(BaseModel):
+    """Продажи категории с учётом подкатегорий"""
+    category_id: int = Field(..., description="ID категории")
+    name: str = Field(..., description="Название категории")
+    units: int = Field(..., description="Продано единиц")
+    revenue: Decimal = Field(..., description="Выручка")
+
+    class Config:
+        from_attributes = True
+
+
+class CategorySalesReport(BaseModel):
+    """Продажи по категориям одного уровня за период"""
+    date_from: date = Field(..., description="Первый день периода (UTC)")
+    parent_id: Optional[int] = Field(None, description="ID родительской категории (null — корневые категории)")
+    refreshed_at: Optional[datetime] = Field(None, description="Момент последнего обновления агрегатов")
+    items: List[CategorySales] = Field(default_factory=list, description="Категории по убыванию выручки")
+
+
+class SalesRefreshResult(BaseModel):
+    """Результат обновления агрегатов продаж"""
+    refreshed: bool = Field(..., description="False, если обновление уже выполняется другим процессом")
+    full: bool = Field(..., description="Полная перестройка агрегатов")
+    days: int = Field(0, description="Пересчитано дней")
+    refreshed_at: Optional[datetime] = Field(None, description="Изменения заказов до этого момента учтены")
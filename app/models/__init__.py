@@ -1,7 +1,9 @@
 from .base import Base, TimestampMixin
 from .client import Client
-from .nomenclature import Category, Nomenclature, nomenclature_categories
+from .nomenclature import Category, Nomenclature, nomenclature_categories, category_closure, nomenclature_stock_shard
 from .order import Order, OrderItem
+from .idempotency import IdempotencyKey
+from .report import product_sales_daily, category_sales_daily, sales_refresh_state
 
 # Экспорт для удобства
-__all__ = ["Base", "TimestampMixin", "Client", "Category", "Nomenclature", "nomenclature_categories", "Order", "OrderItem"]
\ No newline at end of file
+__all__ = ["Base", "TimestampMixin", "Client", "Category", "Nomenclature", "nomenclature_categories", "category_closure", "nomenclature_stock_shard", "Order", "OrderItem", "IdempotencyKey", "product_sales_daily", "category_sales_daily", "sales_refresh_state"]
\ No newline at end of file
@@ -7,6 +7,7 @@ class Client(Base):
     name = Column(String(255), nullable=False, comment="Имя клиента")
     address = Column(Text, nullable=True, comment="Адрес клиента")
     api_key = Column(String(64), unique=True, nullable=True, comment="Уникальный API ключ для аутентификации")
+    tier = Column(String(32), nullable=False, server_default="standard", comment="Тариф клиента: множитель лимитов запросов (RATE_LIMIT_TIERS)")
     
     __table_args__ = (
         Index("ix_client_api_key", "api_key", unique=True),
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey, UniqueConstraint, Index, func
+from app.models import Base
+
+class IdempotencyKey(Base):
+    """Модель ключа идемпотентности: сохранённый ответ на запрос клиента с заголовком Idempotency-Key"""
+    __tablename__ = "idempotency_key"
+    
+    client_id = Column(Integer, ForeignKey("client.id", ondelete="CASCADE"), nullable=False, comment="ID клиента")
+    key = Column(String(255), nullable=False, comment="Значение заголовка Idempotency-Key")
+    request_hash = Column(LargeBinary(32), nullable=False, comment="SHA-256 отпечаток запроса")
+    status_code = Column(Integer, nullable=True, comment="HTTP статус сохранённого ответа")
+    response_body = Column(LargeBinary, nullable=True, comment="Тело сохранённого ответа (JSON)")
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), comment="Время первого запроса")
+    
+    __table_args__ = (
+        # Параллельные запросы с одним ключом ждут друг друга на этом индексе
+        UniqueConstraint("client_id", "key", name="uq_idempotency_key_client_key"),
+        # Для очистки просроченных ключей
+        Index("ix_idempotency_key_created_at", "created_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Index, func, Table
+from sqlalchemy import Column, Integer, SmallInteger, String, Numeric, DateTime, ForeignKey, Index, CheckConstraint, func, Table
 from sqlalchemy.orm import relationship
 from app.models import Base
 
@@ -7,11 +7,37 @@ nomenclature_categories = Table(
     'nomenclature_categories',
     Base.metadata,
     Column('nomenclature_id', Integer, ForeignKey('nomenclature.id'), primary_key=True),
-    Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True)
+    Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True),
+    # Обратный индекс для выборки товаров по категории
+    Index('ix_nomenclature_categories_category', 'category_id', 'nomenclature_id')
+)
+
+# Closure table иерархии категорий: все пары предок-потомок, включая саму категорию (depth=0).
+# Заполняется триггерами на таблице categories при вставке и смене parent_id.
+category_closure = Table(
+    'category_closure',
+    Base.metadata,
+    Column('ancestor_id', Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True, comment="ID категории-предка"),
+    Column('descendant_id', Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True, comment="ID категории-потомка"),
+    Column('depth', Integer, nullable=False, comment="Расстояние от предка до потомка"),
+    # Для поиска предков категории
+    Index('ix_category_closure_descendant', 'descendant_id', 'ancestor_id')
+)
+
+# Шарды остатка популярных товаров: остаток делится на несколько строк, чтобы
+# параллельные покупки не ждали блокировку одной строки nomenclature.
+# Пока у товара stock_shards > 0, точный остаток — сумма шардов.
+nomenclature_stock_shard = Table(
+    'nomenclature_stock_shard',
+    Base.metadata,
+    Column('nomenclature_id', Integer, ForeignKey('nomenclature.id', ondelete='CASCADE'), primary_key=True, comment="ID товара"),
+    Column('shard_no', SmallInteger, primary_key=True, comment="Номер шарда, от 0 до stock_shards - 1"),
+    Column('quantity', Integer, nullable=False, comment="Часть остатка в шарде"),
+    CheckConstraint('quantity >= 0', name='chk_stock_shard_quantity_non_negative')
 )
 
 class Category(Base):
-    """Модель категории товаров с поддержкой иерархии (adjacency list)"""
+    """Модель категории товаров с поддержкой иерархии (adjacency list + closure table)"""
     __tablename__ = "categories"
     
     name = Column(String(255), nullable=False, comment="Название категории")
@@ -28,6 +54,8 @@ class Category(Base):
             parent_id,
             unique=True
         ),
+        # Дочерние категории (parent_id = ?); уникальный индекс выше начинается с имени
+        Index("ix_categories_parent_id", parent_id),
     )
 
 class Nomenclature(Base):
@@ -37,5 +65,21 @@ class Nomenclature(Base):
     name = Column(String(255), nullable=False, comment="Название товара") 
     price = Column(Numeric(10, 2), nullable=False, comment="Текущая цена")
     quantity = Column(Integer, nullable=False, default=0, comment="Остаток на складе")
+    version = Column(Integer, nullable=False, server_default="1", comment="Версия строки, растёт при каждом изменении")
+    # При stock_shards > 0 остаток списывается из nomenclature_stock_shard, а quantity
+    # показывает сумму шардов на момент последней консолидации
+    stock_shards = Column(Integer, nullable=False, server_default="0", comment="Число шардов остатка (0 — остаток в quantity)")
+    
+    # ORM сам увеличивает версию при UPDATE; в Core-запросах её нужно увеличивать явно
+    __mapper_args__ = {"version_id_col": version}
+    
+    # Индексы под keyset-пагинацию каталога: по цене и только по товарам в наличии
+    __table_args__ = (
+        Index("ix_nomenclature_price_id", price, "id"),
+        Index("ix_nomenclature_in_stock_id", "id", postgresql_where=quantity > 0),
+        Index("ix_nomenclature_in_stock_price_id", price, "id", postgresql_where=quantity > 0),
+        # Товары с шардированным остатком (обходит консолидация)
+        Index("ix_nomenclature_sharded_id", "id", postgresql_where=stock_shards > 0),
+    )
     
     # Связи будут добавлены позже
\ No newline at end of file
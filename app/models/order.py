@@ -1,15 +1,42 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, CheckConstraint, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, CheckConstraint, Index, UniqueConstraint, func, text
 from sqlalchemy.orm import relationship
 from app.models import Base, TimestampMixin
 
-class Order(Base):
+class Order(Base, TimestampMixin):
     """Модель заказа"""
     
     client_id = Column(Integer, ForeignKey("client.id"), nullable=False, comment="ID клиента")
     status = Column(String(50), nullable=False, default="created", comment="Статус заказа: created/paid/shipped/completed/cancelled")
+    version = Column(Integer, nullable=False, server_default="1", comment="Версия строки, растёт при каждом изменении заказа и его позиций")
+    
+    # Денормализованные итоги, обновляются в той же транзакции, что и позиции
+    total_amount = Column(Numeric(12, 2), nullable=False, default=0, server_default="0", comment="Общая сумма заказа")
+    items_count = Column(Integer, nullable=False, default=0, server_default="0", comment="Число позиций в заказе")
     
     # Связи
-    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", order_by="OrderItem.id")
+    
+    # ORM сам увеличивает версию при UPDATE; в Core-запросах её нужно увеличивать явно
+    __mapper_args__ = {"version_id_col": version}
+    
+    # updated_at меняется и при изменении позиций (через пересчёт итогов) — по нему
+    # инкрементально обновляются агрегаты продаж
+    __table_args__ = (
+        CheckConstraint(
+            status.in_(["created", "paid", "shipped", "completed", "cancelled"]),
+            name="chk_order_status_valid"
+        ),
+        Index("ix_order_created_at", "created_at"),
+        Index("ix_order_updated_at", "updated_at"),
+        # Заказы клиента, новые первыми (client_id = ? ORDER BY id DESC)
+        Index("ix_order_client_id_id", "client_id", "id"),
+        # Брошенные заказы: created без изменений дольше срока, самые старые первыми
+        Index(
+            "ix_order_created_last_change",
+            text("coalesce(updated_at, created_at)"),
+            postgresql_where=text("status = 'created'")
+        ),
+    )
 
 class OrderItem(Base):
     """Модель позиции заказа (связь заказ-товар с количеством и исторической ценой)"""
@@ -26,4 +53,8 @@ class OrderItem(Base):
     # Ограничения
     __table_args__ = (
         CheckConstraint(quantity > 0, name="chk_order_item_quantity_positive"),
+        # Одна позиция на товар в заказе; индекс обслуживает и загрузку позиций
+        # заказа (order_id IN ...), и поиск существующей позиции товара
+        UniqueConstraint("order_id", "nomenclature_id", name="uq_orderitem_order_nomenclature"),
+        Index("ix_orderitem_nomenclature_id", "nomenclature_id"),
     )
\ No newline at end of file
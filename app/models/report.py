@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, Numeric, Date, DateTime, ForeignKey, Index, Table
+from app.models import Base
+
+# Продажи товара за день (UTC) по заказам в статусах SALES_STATUSES.
+# Пересчитываются целыми днями при инкрементальном обновлении агрегатов
+product_sales_daily = Table(
+    'product_sales_daily',
+    Base.metadata,
+    Column('day', Date, primary_key=True, comment="День создания заказа (UTC)"),
+    Column('nomenclature_id', Integer, ForeignKey('nomenclature.id', ondelete='CASCADE'), primary_key=True, comment="ID товара"),
+    Column('units', Integer, nullable=False, comment="Продано единиц"),
+    Column('revenue', Numeric(14, 2), nullable=False, comment="Выручка"),
+    Column('orders_count', Integer, nullable=False, comment="Число заказов с товаром"),
+    Index('ix_product_sales_daily_nomenclature_id', 'nomenclature_id')
+)
+
+# Свёртка product_sales_daily по категориям: товар учитывается в своих категориях
+# и во всех их предках (один раз на категорию)
+category_sales_daily = Table(
+    'category_sales_daily',
+    Base.metadata,
+    Column('day', Date, primary_key=True, comment="День создания заказа (UTC)"),
+    Column('category_id', Integer, ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True, comment="ID категории"),
+    Column('units', Integer, nullable=False, comment="Продано единиц"),
+    Column('revenue', Numeric(14, 2), nullable=False, comment="Выручка"),
+    Index('ix_category_sales_daily_category_id', 'category_id')
+)
+
+# Состояние обновления агрегатов продаж (одна строка с id=1)
+sales_refresh_state = Table(
+    'sales_refresh_state',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('refreshed_at', DateTime(timezone=True), nullable=False, comment="Изменения заказов до этого момента учтены")
+)
+
+# Статусы заказов, которые считаются продажей
+SALES_STATUSES = ("paid", "shipped", "completed")
@@ -0,0 +1,106 @@
+"""
+Репозиторий категорий: запросы к иерархии через closure table
+"""
+from typing import Optional
+
+from sqlalchemy import Select, select, func, distinct
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.nomenclature import Category, category_closure, nomenclature_categories
+
+
+class CategoryRepository:
+    """Запросы к дереву категорий"""
+
+    @staticmethod
+    def subtree_products_query(category_id: int) -> Select:
+        """
+        Подзапрос ID товаров, привязанных к категории или любому её потомку.
+        
+        Args:
+            category_id: ID корня поддерева
+            
+        Returns:
+            SELECT nomenclature_id для использования в IN / EXISTS
+        """
+        return (
+            select(nomenclature_categories.c.nomenclature_id)
+            .join(category_closure, category_closure.c.descendant_id == nomenclature_categories.c.category_id)
+            .where(category_closure.c.ancestor_id == category_id)
+        )
+
+    @staticmethod
+    async def get_subtree(
+        session: AsyncSession,
+        category_id: int,
+        max_depth: Optional[int] = None
+    ) -> list[Row]:
+        """
+        Возвращает категорию и всех её потомков одним запросом по closure table.
+        
+        Args:
+            session: Сессия БД
+            category_id: ID корня поддерева
+            max_depth: Максимальная глубина относительно корня (None — без ограничения)
+            
+        Returns:
+            Строки (id, name, slug, parent_id, depth), упорядоченные по глубине и имени;
+            пустой список, если категории нет
+        """
+        stmt = (
+            select(
+                Category.id,
+                Category.name,
+                Category.slug,
+                Category.parent_id,
+                category_closure.c.depth
+            )
+            .join(category_closure, category_closure.c.descendant_id == Category.id)
+            .where(category_closure.c.ancestor_id == category_id)
+            .order_by(category_closure.c.depth, Category.name)
+        )
+        if max_depth is not None:
+            stmt = stmt.where(category_closure.c.depth <= max_depth)
+        return list((await session.execute(stmt)).all())
+
+    @staticmethod
+    async def get_subtree_product_counts(session: AsyncSession, category_id: int) -> list[Row]:
+        """
+        Считает товары для каждой категории поддерева одним запросом.
+        
+        Для каждого узла поддерева closure table даёт всех его потомков,
+        к которым присоединяются связи товар-категория. Товар, привязанный
+        к нескольким категориям одной ветки, учитывается один раз.
+        
+        Args:
+            session: Сессия БД
+            category_id: ID корня поддерева
+            
+        Returns:
+            Строки (id, name, slug, parent_id, depth, direct_products, total_products);
+            пустой список, если категории нет
+        """
+        node = category_closure.alias("node")
+        below = category_closure.alias("below")
+        product_id = nomenclature_categories.c.nomenclature_id
+        
+        stmt = (
+            select(
+                Category.id,
+                Category.name,
+                Category.slug,
+                Category.parent_id,
+                node.c.depth,
+                func.count(distinct(product_id)).filter(below.c.depth == 0).label("direct_products"),
+                func.count(distinct(product_id)).label("total_products")
+            )
+            .select_from(node)
+            .join(Category, Category.id == node.c.descendant_id)
+            .join(below, below.c.ancestor_id == node.c.descendant_id)
+            .outerjoin(nomenclature_categories, nomenclature_categories.c.category_id == below.c.descendant_id)
+            .where(node.c.ancestor_id == category_id)
+            .group_by(Category.id, node.c.depth)
+            .order_by(node.c.depth, Category.name)
+        )
+        return list((await session.execute(stmt)).all())
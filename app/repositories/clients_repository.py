@@ -1 +1,55 @@
-# Clients data access repository
\ No newline at end of file
+"""
+Репозиторий клиентов
+"""
+from typing import Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.client import Client
+
+
+class ClientsRepository:
+    """Запросы к таблице клиентов"""
+
+    @staticmethod
+    async def get_by_api_key(session: AsyncSession, api_key: str) -> Optional[Client]:
+        """
+        Находит клиента по API ключу.
+        
+        Args:
+            session: Сессия БД
+            api_key: API ключ
+            
+        Returns:
+            Клиент или None, если ключ неверный
+        """
+        stmt = select(Client).where(Client.api_key == api_key)
+        return (await session.execute(stmt)).scalars().first()
+
+    @staticmethod
+    async def insert_new_keys(session: AsyncSession, values: list[dict]) -> Sequence[Row]:
+        """
+        Вставляет клиентов одним запросом, пропуская строки с уже занятым API ключом.
+        
+        INSERT ... ON CONFLICT (api_key) DO NOTHING: уникальность ключа проверяет
+        индекс, без предварительного SELECT. Строки с ключом, который совпал
+        с существующим или с другой строкой этого же запроса, не вставляются
+        и не попадают в результат.
+        
+        Args:
+            session: Сессия БД
+            values: Строки клиентов (name, address, api_key)
+            
+        Returns:
+            Строки (id, name, api_key) вставленных клиентов в произвольном порядке
+        """
+        stmt = (
+            insert(Client)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=[Client.api_key])
+            .returning(Client.id, Client.name, Client.api_key)
+        )
+        return (await session.execute(stmt)).all()
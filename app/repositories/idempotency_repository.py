@@ -0,0 +1,120 @@
+"""
+Репозиторий ключей идемпотентности
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idempotency import IdempotencyKey
+
+
+class IdempotencyRepository:
+    """Запросы к таблице ключей идемпотентности"""
+
+    @staticmethod
+    async def claim(
+        session: AsyncSession,
+        client_id: int,
+        key: str,
+        request_hash: bytes
+    ) -> Optional[int]:
+        """
+        Занимает ключ в текущей транзакции.
+        
+        INSERT ... ON CONFLICT DO NOTHING: если тот же ключ занят ещё не
+        завершённой транзакцией, запрос ждёт её на уникальном индексе и после
+        коммита возвращает None, а после отката занимает ключ сам.
+        
+        Args:
+            session: Сессия БД
+            client_id: ID клиента
+            key: Значение заголовка Idempotency-Key
+            request_hash: Отпечаток запроса
+            
+        Returns:
+            ID записи, если ключ занят этой транзакцией, или None, если ключ уже использован
+        """
+        stmt = (
+            insert(IdempotencyKey)
+            .values(client_id=client_id, key=key, request_hash=request_hash)
+            .on_conflict_do_nothing(constraint="uq_idempotency_key_client_key")
+            .returning(IdempotencyKey.id)
+        )
+        return (await session.execute(stmt)).scalar_one_or_none()
+
+    @staticmethod
+    async def get(session: AsyncSession, client_id: int, key: str) -> Optional[Row]:
+        """
+        Возвращает сохранённый ответ по ключу.
+        
+        Args:
+            session: Сессия БД
+            client_id: ID клиента
+            key: Значение заголовка Idempotency-Key
+            
+        Returns:
+            Строка (request_hash, status_code, response_body) или None
+        """
+        stmt = select(
+            IdempotencyKey.request_hash,
+            IdempotencyKey.status_code,
+            IdempotencyKey.response_body
+        ).where(
+            IdempotencyKey.client_id == client_id,
+            IdempotencyKey.key == key
+        )
+        return (await session.execute(stmt)).one_or_none()
+
+    @staticmethod
+    async def save_response(
+        session: AsyncSession,
+        record_id: int,
+        status_code: int,
+        body: bytes
+    ) -> None:
+        """
+        Сохраняет ответ для занятого ключа (в той же транзакции, что и сама операция).
+        
+        Args:
+            session: Сессия БД
+            record_id: ID записи из claim
+            status_code: HTTP статус ответа
+            body: Тело ответа
+        """
+        stmt = (
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == record_id)
+            .values(status_code=status_code, response_body=body)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(stmt)
+
+    @staticmethod
+    async def delete_expired(session: AsyncSession, created_before: datetime, batch_size: int) -> int:
+        """
+        Удаляет одну пачку просроченных ключей.
+        
+        Args:
+            session: Сессия БД
+            created_before: Удалять ключи, созданные раньше этого момента
+            batch_size: Максимум удаляемых записей за вызов
+            
+        Returns:
+            Число удалённых записей
+        """
+        expired_ids = (
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.created_at < created_before)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        stmt = (
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.id.in_(expired_ids))
+            .execution_options(synchronize_session=False)
+        )
+        return (await session.execute(stmt)).rowcount
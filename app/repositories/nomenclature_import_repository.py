@@ -0,0 +1,249 @@
+"""
+Репозиторий импорта номенклатуры: COPY во временную таблицу и upsert одним запросом
+"""
+from typing import AsyncIterator
+
+from sqlalchemy import (
+    MetaData, Table, Column, BigInteger, Boolean, Integer, Numeric, String, Identity, CheckConstraint,
+    select, update, delete, func, case, or_, any_, literal_column, text
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.nomenclature import Category, Nomenclature, nomenclature_categories, nomenclature_stock_shard
+
+# Временные таблицы импорта живут до конца транзакции и не входят в схему приложения
+_staging_metadata = MetaData()
+
+# Строки фида в порядке поступления; при повторе артикула побеждает последняя строка
+nomenclature_import = Table(
+    'nomenclature_import',
+    _staging_metadata,
+    Column('line_no', BigInteger, Identity()),
+    Column('sku', String(100), nullable=False),
+    Column('name', String(255), nullable=False),
+    Column('price', Numeric(10, 2), nullable=False),
+    Column('quantity', Integer, nullable=False),
+    # NULL — не менять категории товара, пустой массив — отвязать от всех
+    Column('category_ids', ARRAY(Integer)),
+    # Ошибочные строки отклоняются ещё при COPY, с номером строки фида
+    CheckConstraint('price >= 0', name='chk_nomenclature_import_price'),
+    CheckConstraint('quantity >= 0', name='chk_nomenclature_import_quantity'),
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='DROP'
+)
+
+# Строки NDJSON как есть: разбираются в nomenclature_import одним INSERT ... SELECT
+nomenclature_import_raw = Table(
+    'nomenclature_import_raw',
+    _staging_metadata,
+    Column('line_no', BigInteger, Identity()),
+    Column('doc', JSONB),
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='DROP'
+)
+
+# CSV разбирает сам PostgreSQL; заголовок обязан совпадать с колонками
+_COPY_CSV = (
+    "COPY nomenclature_import (sku, name, price, quantity, category_ids) "
+    "FROM STDIN WITH (FORMAT csv, HEADER match)"
+)
+# Каждая строка NDJSON — одно поле: символы кавычки и разделителя, которых нет в JSON
+_COPY_NDJSON = (
+    "COPY nomenclature_import_raw (doc) "
+    "FROM STDIN WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"
+)
+
+
+class NomenclatureImportRepository:
+    """Загрузка фида поставщика в номенклатуру"""
+
+    @staticmethod
+    async def create_staging(session: AsyncSession, statement_timeout_ms: int) -> None:
+        """
+        Готовит транзакцию импорта: задаёт statement_timeout и создаёт временные таблицы.
+        
+        Args:
+            session: Сессия БД
+            statement_timeout_ms: statement_timeout до конца транзакции, мс (0 — без ограничения)
+        """
+        # SET LOCAL не принимает параметры, значение — целое число из настроек
+        await session.execute(text(f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}"))
+        await session.run_sync(lambda sync_session: _staging_metadata.create_all(sync_session.connection()))
+
+    @staticmethod
+    async def copy_feed(session: AsyncSession, chunks: AsyncIterator[bytes], fmt: str) -> None:
+        """
+        Передаёт фид в PostgreSQL через COPY FROM STDIN без разбора в Python.
+        
+        Куски пишутся в соединение по мере чтения, поэтому память не зависит
+        от размера фида.
+        
+        Args:
+            session: Сессия БД (временные таблицы уже созданы)
+            chunks: Куски фида в UTF-8
+            fmt: Формат фида: csv или ndjson
+            
+        Raises:
+            psycopg.Error: Ошибка формата или данных (с номером строки в diag.context)
+        """
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        async with raw_connection.driver_connection.cursor() as cursor:
+            async with cursor.copy(_COPY_CSV if fmt == "csv" else _COPY_NDJSON) as copy:
+                async for chunk in chunks:
+                    await copy.write(chunk)
+        
+        if fmt == "ndjson":
+            record = func.jsonb_to_record(nomenclature_import_raw.c.doc).table_valued(
+                Column('sku', String), Column('name', String), Column('price', Numeric),
+                Column('quantity', Integer), Column('category_ids', ARRAY(Integer))
+            ).render_derived(with_types=True)
+            stmt = nomenclature_import.insert().from_select(
+                ['sku', 'name', 'price', 'quantity', 'category_ids'],
+                select(record.c.sku, record.c.name, record.c.price, record.c.quantity, record.c.category_ids)
+                .select_from(nomenclature_import_raw)
+                .join(record, literal_column("true"))
+                .where(nomenclature_import_raw.c.doc.is_not(None))
+                .order_by(nomenclature_import_raw.c.line_no)
+            )
+            await session.execute(stmt)
+
+    @staticmethod
+    async def upsert_from_staging(session: AsyncSession) -> Row:
+        """
+        Переносит загруженный фид в nomenclature и nomenclature_categories одним запросом.
+        
+        Новые артикулы добавляются, у существующих обновляются название, цена и
+        остаток (версия строки растёт, только если что-то изменилось). Если в строке
+        фида заданы category_ids, привязки товара к категориям заменяются этим
+        набором; неизвестные категории пропускаются.
+        
+        Args:
+            session: Сессия БД с загруженной nomenclature_import
+            
+        Returns:
+            Строка (rows, inserted, updated, categories_linked, categories_unlinked, unknown_categories)
+        """
+        staging = nomenclature_import
+        src = (
+            select(staging.c.sku, staging.c.name, staging.c.price, staging.c.quantity, staging.c.category_ids)
+            .distinct(staging.c.sku)
+            .order_by(staging.c.sku, staging.c.line_no.desc())
+            .cte("src")
+        )
+        
+        insert_stmt = pg_insert(Nomenclature).from_select(
+            ["sku", "name", "price", "quantity"],
+            select(src.c.sku, src.c.name, src.c.price, src.c.quantity)
+        )
+        upserted = insert_stmt.on_conflict_do_update(
+            index_elements=[Nomenclature.sku],
+            set_={
+                "name": insert_stmt.excluded.name,
+                "price": insert_stmt.excluded.price,
+                "quantity": insert_stmt.excluded.quantity,
+                "version": Nomenclature.version + 1,
+            },
+            where=or_(
+                Nomenclature.name.is_distinct_from(insert_stmt.excluded.name),
+                Nomenclature.price.is_distinct_from(insert_stmt.excluded.price),
+                Nomenclature.quantity.is_distinct_from(insert_stmt.excluded.quantity),
+            )
+        ).returning(
+            Nomenclature.id,
+            Nomenclature.sku,
+            # xmax = 0 только у строк, вставленных этим запросом
+            literal_column("xmax = 0", Boolean).label("inserted")
+        ).cte("upserted")
+        
+        # Запрос видит номенклатуру до своих изменений, поэтому новые товары берутся из RETURNING
+        products = (
+            select(Nomenclature.id, Nomenclature.sku).join(src, src.c.sku == Nomenclature.sku)
+            .union(select(upserted.c.id, upserted.c.sku))
+            .cte("products")
+        )
+        wanted = (
+            select(products.c.id.label("nomenclature_id"), func.unnest(src.c.category_ids).label("category_id"))
+            .join(src, src.c.sku == products.c.sku)
+            .where(src.c.category_ids.is_not(None))
+            .cte("wanted")
+        )
+        linked = (
+            pg_insert(nomenclature_categories)
+            .from_select(
+                ["nomenclature_id", "category_id"],
+                select(wanted.c.nomenclature_id, wanted.c.category_id)
+                .join(Category, Category.id == wanted.c.category_id)
+                .distinct()
+            )
+            .on_conflict_do_nothing()
+            .returning(nomenclature_categories.c.nomenclature_id)
+            .cte("linked")
+        )
+        unlinked = (
+            delete(nomenclature_categories)
+            .where(
+                nomenclature_categories.c.nomenclature_id == products.c.id,
+                products.c.sku == src.c.sku,
+                src.c.category_ids.is_not(None),
+                ~(nomenclature_categories.c.category_id == any_(src.c.category_ids))
+            )
+            .returning(nomenclature_categories.c.nomenclature_id)
+            .cte("unlinked")
+        )
+        unknown = (
+            select(wanted.c.category_id)
+            .outerjoin(Category, Category.id == wanted.c.category_id)
+            .where(Category.id.is_(None))
+            .distinct()
+            .cte("unknown")
+        )
+        
+        def count(cte, *where):
+            return select(func.count()).select_from(cte).where(*where).scalar_subquery()
+        
+        stmt = select(
+            count(src).label("rows"),
+            count(upserted, upserted.c.inserted).label("inserted"),
+            count(upserted, ~upserted.c.inserted).label("updated"),
+            count(linked).label("categories_linked"),
+            count(unlinked).label("categories_unlinked"),
+            count(unknown).label("unknown_categories")
+        )
+        return (await session.execute(stmt)).one()
+
+    @staticmethod
+    async def reshard_from_staging(session: AsyncSession) -> None:
+        """
+        Раскладывает остаток из фида по шардам товаров с шардированным остатком.
+        
+        Остаток в фиде абсолютный: как и quantity обычного товара, шарды
+        перезаписываются значением из фида (поровну между шардами). Выполняется
+        после upsert_from_staging, то есть после блокировки строк товаров.
+        
+        Args:
+            session: Сессия БД с загруженной nomenclature_import
+        """
+        staging = nomenclature_import
+        src = (
+            select(staging.c.sku, staging.c.quantity)
+            .distinct(staging.c.sku)
+            .order_by(staging.c.sku, staging.c.line_no.desc())
+            .subquery("src")
+        )
+        shard = nomenclature_stock_shard
+        stmt = (
+            update(shard)
+            .where(
+                shard.c.nomenclature_id == Nomenclature.id,
+                Nomenclature.sku == src.c.sku,
+                Nomenclature.stock_shards > 0
+            )
+            .values(quantity=(
+                src.c.quantity // Nomenclature.stock_shards
+                + case((shard.c.shard_no < src.c.quantity % Nomenclature.stock_shards, 1), else_=0)
+            ))
+        )
+        await session.execute(stmt)
@@ -1 +1,621 @@
-# Nomenclature data access repository
\ No newline at end of file
+"""
+Репозиторий номенклатуры: доступ к товарам и складским остаткам,
+кэш товаров для чтения
+"""
+import random
+import sys
+from decimal import Decimal
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import event, select, insert, update, delete, func, case, tuple_, any_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache, VersionedCache
+from app.core.config import settings
+from app.core.db import is_replica_session
+from app.models.nomenclature import Nomenclature, nomenclature_stock_shard
+from app.models.order import OrderItem
+from app.repositories.category_repository import CategoryRepository
+
+
+class NomenclatureSnapshot(NamedTuple):
+    """Неизменяемый снимок товара, хранящийся в кэше"""
+    id: int
+    sku: str
+    name: str
+    price: Decimal
+    quantity: int
+    version: int
+    stock_shards: int
+
+
+def _snapshot_size(snapshot: NomenclatureSnapshot) -> int:
+    """Оценка памяти, занимаемой снимком, байт"""
+    return sys.getsizeof(snapshot) + sum(sys.getsizeof(field) for field in snapshot)
+
+
+# Кэш ID товара → снимок. Обновляется после коммита транзакций этого процесса;
+# изменения из других процессов видны не позже чем через TTL.
+nomenclature_cache: VersionedCache[int, NomenclatureSnapshot] = VersionedCache(
+    TTLCache(
+        maxsize=settings.nomenclature_cache_max_size,
+        ttl=settings.nomenclature_cache_ttl_seconds,
+        max_bytes=settings.nomenclature_cache_max_bytes,
+        sizeof=_snapshot_size
+    ),
+    version=lambda snapshot: snapshot.version
+)
+
+# Ключ в session.info с изменениями товаров, которые попадут в кэш после коммита
+_PENDING_KEY = "nomenclature_cache_pending"
+
+_SNAPSHOT_COLUMNS = (
+    Nomenclature.id,
+    Nomenclature.sku,
+    Nomenclature.name,
+    Nomenclature.price,
+    Nomenclature.quantity,
+    Nomenclature.version,
+    Nomenclature.stock_shards,
+)
+
+# Ключ advisory lock консолидации шардов (второй ключ — ID товара)
+STOCK_SHARD_LOCK_ID = 720_018
+
+
+def _remember_change(info: dict, nomenclature_id: int, snapshot: Optional[NomenclatureSnapshot]) -> None:
+    """Запоминает новое состояние товара (None — удалить из кэша) до коммита транзакции"""
+    info.setdefault(_PENDING_KEY, {})[nomenclature_id] = snapshot
+
+
+@event.listens_for(Nomenclature, "after_update")
+def _nomenclature_after_update(mapper, connection, target: Nomenclature) -> None:
+    session = object_session(target)
+    if session is not None:
+        _remember_change(session.info, target.id, NomenclatureSnapshot(
+            target.id, target.sku, target.name, Decimal(target.price), target.quantity, target.version,
+            target.stock_shards
+        ))
+
+
+@event.listens_for(Nomenclature, "after_delete")
+def _nomenclature_after_delete(mapper, connection, target: Nomenclature) -> None:
+    session = object_session(target)
+    if session is not None:
+        _remember_change(session.info, target.id, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for nomenclature_id, snapshot in pending.items():
+        if snapshot is None:
+            nomenclature_cache.discard(nomenclature_id)
+        else:
+            nomenclature_cache.put(nomenclature_id, snapshot)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending_changes(session: Session, previous_transaction) -> None:
+    pending = session.info.get(_PENDING_KEY)
+    if not pending:
+        return
+    if previous_transaction.nested:
+        # Откат savepoint: какие из изменений уцелели, неизвестно — после коммита просто сбросим записи
+        for nomenclature_id in pending:
+            pending[nomenclature_id] = None
+    else:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def _split_evenly(total: int, parts: int) -> list[int]:
+    """Делит остаток на parts частей, отличающихся не больше чем на единицу"""
+    base, extra = divmod(total, parts)
+    return [base + 1 if index < extra else base for index in range(parts)]
+
+
+class NomenclatureRepository:
+    """Запросы к таблице номенклатуры"""
+
+    @staticmethod
+    async def get_by_id(session: AsyncSession, nomenclature_id: int) -> Optional[NomenclatureSnapshot]:
+        """
+        Возвращает товар из кэша, при промахе читает его из БД и кэширует
+        (прочитанное с реплики не кэшируется).
+        
+        Подходит только для чтения: остаток может отставать от БД на время TTL
+        (при изменениях из других процессов), поэтому списание идёт через reserve_stock.
+        
+        Args:
+            session: Сессия БД
+            nomenclature_id: ID товара
+            
+        Returns:
+            Снимок товара или None, если товара нет
+        """
+        snapshot = nomenclature_cache.get(nomenclature_id)
+        if snapshot is not None:
+            return snapshot
+        
+        stmt = select(*_SNAPSHOT_COLUMNS).where(Nomenclature.id == nomenclature_id)
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+        
+        snapshot = NomenclatureSnapshot(*row)
+        # Снимок с реплики может отставать от уже закоммиченных изменений: попав в кэш,
+        # он вернул бы старые цену и остаток и тем запросам, которые читают основную БД.
+        # Незакоммиченные изменения этой же транзакции в кэш тоже не попадают
+        if is_replica_session(session) or nomenclature_id in session.info.get(_PENDING_KEY, ()):
+            return snapshot
+        nomenclature_cache.put(nomenclature_id, snapshot)
+        return snapshot
+
+    @staticmethod
+    def invalidate(session: AsyncSession, nomenclature_ids: Iterable[int]) -> None:
+        """
+        Помечает товары для удаления из кэша после коммита транзакции.
+        Вызывать после Core-запросов, меняющих товары без RETURNING полного снимка.
+        
+        Args:
+            session: Сессия БД, в транзакции которой изменены товары
+            nomenclature_ids: ID изменённых товаров
+        """
+        for nomenclature_id in nomenclature_ids:
+            _remember_change(session.info, nomenclature_id, None)
+
+    @staticmethod
+    async def reserve_stock(
+        session: AsyncSession,
+        nomenclature_id: int,
+        quantity: int
+    ) -> Optional[Row]:
+        """
+        Атомарно списывает товар со склада, если его хватает.
+        
+        Проверка остатка и списание выполняются одним UPDATE ... WHERE quantity >= :q
+        без отдельного SELECT ... FOR UPDATE. Блокировка строки, взятая этим UPDATE,
+        держится до коммита или отката всей транзакции, а не только на время запроса:
+        выигрыш в том, что она берётся позже — без round trip'а на SELECT и проверки
+        остатка в Python, — поэтому после списания транзакция должна завершаться
+        как можно быстрее. Новое состояние товара попадает в кэш после коммита транзакции.
+        
+        Остаток товаров с шардами (stock_shards > 0) списывается из шардов
+        (reserve_sharded_stock). Кэш номенклатуры лишь подсказывает, с какого пути
+        начать: условие stock_shards = 0 в UPDATE не даёт списать остаток мимо шардов.
+        
+        Args:
+            session: Сессия БД
+            nomenclature_id: ID товара
+            quantity: Списываемое количество
+            
+        Returns:
+            Строка (id, sku, name, price, quantity, version, stock_shards) с ценой и остатком
+            после списания (у товара с шардами — с остатком на момент консолидации)
+            или None, если товара нет или остатка не хватает
+        """
+        cached = nomenclature_cache.get(nomenclature_id)
+        if cached is not None and cached.stock_shards:
+            row = await NomenclatureRepository.reserve_sharded_stock(
+                session, nomenclature_id, quantity, cached.stock_shards
+            )
+            if row is not None:
+                return row
+        
+        stmt = (
+            update(Nomenclature)
+            .where(
+                Nomenclature.id == nomenclature_id,
+                Nomenclature.stock_shards == 0,
+                Nomenclature.quantity >= quantity
+            )
+            .values(
+                quantity=Nomenclature.quantity - quantity,
+                version=Nomenclature.version + 1
+            )
+            .returning(*_SNAPSHOT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        row = (await session.execute(stmt)).one_or_none()
+        if row is not None:
+            _remember_change(session.info, nomenclature_id, NomenclatureSnapshot(*row))
+            return row
+        
+        if cached is None or not cached.stock_shards:
+            # Кэш не знал о шардах: проверяем режим товара в БД
+            stmt = select(Nomenclature.stock_shards).where(Nomenclature.id == nomenclature_id)
+            shards = await session.scalar(stmt)
+            if shards:
+                return await NomenclatureRepository.reserve_sharded_stock(
+                    session, nomenclature_id, quantity, shards
+                )
+        return None
+
+    @staticmethod
+    async def reserve_sharded_stock(
+        session: AsyncSession,
+        nomenclature_id: int,
+        quantity: int,
+        shards: int
+    ) -> Optional[Row]:
+        """
+        Списывает товар из шардов остатка.
+        
+        Сначала — из случайного шарда с достаточным остатком, который сейчас никто
+        не держит (FOR UPDATE SKIP LOCKED), поэтому параллельные покупки расходятся
+        по разным строкам. Если все такие шарды заняты — ждём один из них. Если ни
+        в одном шарде нет нужного количества целиком, блокируются все шарды товара
+        и количество собирается из нескольких: так товар не продаётся сверх остатка
+        и не теряется из-за дробления по шардам. Строка nomenclature не меняется
+        и не блокируется.
+        
+        Args:
+            session: Сессия БД
+            nomenclature_id: ID товара
+            quantity: Списываемое количество
+            shards: Число шардов товара по известным данным (например, из кэша);
+                задаёт только диапазон, из которого выбирается первый шард
+                
+        Returns:
+            Строка товара (id, sku, name, price, quantity, version, stock_shards)
+            или None, если шардов нет или суммарного остатка не хватает
+        """
+        shard = nomenclature_stock_shard
+        # Случайный шард выбирается здесь, а не ORDER BY random(): дождавшись чужой
+        # блокировки, UPDATE перепроверяет строку, заново вычисляя подзапрос, и с random()
+        # получил бы другой номер шарда — списание не состоялось бы
+        start = random.randrange(shards) if shards > 0 else 0
+        for skip_locked in (True, False):
+            candidate = (
+                select(shard.c.shard_no)
+                .where(shard.c.nomenclature_id == nomenclature_id, shard.c.quantity >= quantity)
+                .order_by(shard.c.shard_no < start, shard.c.shard_no)
+                .limit(1)
+            )
+            if skip_locked:
+                candidate = candidate.with_for_update(skip_locked=True)
+            taken = (
+                update(shard)
+                .where(
+                    shard.c.nomenclature_id == nomenclature_id,
+                    shard.c.shard_no == candidate.scalar_subquery(),
+                    shard.c.quantity >= quantity
+                )
+                .values(quantity=shard.c.quantity - quantity)
+                .returning(shard.c.nomenclature_id)
+                .cte("taken")
+            )
+            stmt = select(*_SNAPSHOT_COLUMNS).join(taken, taken.c.nomenclature_id == Nomenclature.id)
+            if skip_locked:
+                # SKIP LOCKED не ждёт, поэтому точка сохранения (два лишних round trip'а)
+                # здесь не нужна. Промах редок: только если ни в одном свободном шарде
+                # не хватает остатка. Шард, не прошедший перепроверку после чужого
+                # списания, может остаться заблокированным до конца транзакции
+                row = (await session.execute(stmt)).one_or_none()
+                if row is not None:
+                    return row
+                continue
+            
+            savepoint = await session.begin_nested()
+            row = (await session.execute(stmt)).one_or_none()
+            if row is not None:
+                await savepoint.commit()
+                return row
+            # Промах после ожидания может оставить блокировку шарда, который после чужого
+            # списания не прошёл перепроверку; откат к точке сохранения снимает её, иначе
+            # сбор по всем шардам ждал бы другие шарды, держа этот
+            await savepoint.rollback()
+        
+        stmt = (
+            select(shard.c.shard_no, shard.c.quantity)
+            .where(shard.c.nomenclature_id == nomenclature_id)
+            .order_by(shard.c.shard_no)
+            .with_for_update()
+        )
+        shards = (await session.execute(stmt)).all()
+        if sum(row.quantity for row in shards) < quantity:
+            return None
+        
+        # Забираем из самых полных шардов, чтобы затронуть их как можно меньше
+        remaining = quantity
+        new_quantities = {}
+        for row in sorted(shards, key=lambda row: row.quantity, reverse=True):
+            if not remaining:
+                break
+            taken_quantity = min(row.quantity, remaining)
+            new_quantities[row.shard_no] = row.quantity - taken_quantity
+            remaining -= taken_quantity
+        await NomenclatureRepository._update_shards(session, nomenclature_id, new_quantities)
+        
+        stmt = select(*_SNAPSHOT_COLUMNS).where(Nomenclature.id == nomenclature_id)
+        return (await session.execute(stmt)).one()
+
+    @staticmethod
+    async def get_stock(session: AsyncSession, nomenclature_id: int) -> Optional[int]:
+        """
+        Возвращает текущий остаток товара без блокировки.
+        У товара с шардами — точная сумма шардов.
+        
+        Args:
+            session: Сессия БД
+            nomenclature_id: ID товара
+            
+        Returns:
+            Остаток на складе или None, если товара нет
+        """
+        shard = nomenclature_stock_shard
+        shards_total = (
+            select(func.coalesce(func.sum(shard.c.quantity), 0))
+            .where(shard.c.nomenclature_id == Nomenclature.id)
+            .scalar_subquery()
+        )
+        stmt = select(
+            case((Nomenclature.stock_shards > 0, shards_total), else_=Nomenclature.quantity)
+        ).where(Nomenclature.id == nomenclature_id)
+        return (await session.execute(stmt)).scalar_one_or_none()
+
+    @staticmethod
+    async def set_stock_shards(session: AsyncSession, nomenclature_id: int, shards: int) -> Optional[Row]:
+        """
+        Включает, меняет или выключает (shards = 0) шардирование остатка товара.
+        
+        Точный остаток (quantity или сумма текущих шардов) делится поровну
+        между новыми шардами либо возвращается в quantity.
+        
+        Args:
+            session: Сессия БД
+            nomenclature_id: ID товара
+            shards: Число шардов
+            
+        Returns:
+            Строка товара после изменения или None, если товара нет
+        """
+        # Порядок блокировок везде один: строка товара, затем шарды
+        stmt = (
+            select(Nomenclature.quantity, Nomenclature.stock_shards)
+            .where(Nomenclature.id == nomenclature_id)
+            .with_for_update()
+        )
+        product = (await session.execute(stmt)).one_or_none()
+        if product is None:
+            return None
+        
+        total = product.quantity
+        shard = nomenclature_stock_shard
+        if product.stock_shards:
+            stmt = (
+                select(shard.c.quantity)
+                .where(shard.c.nomenclature_id == nomenclature_id)
+                .order_by(shard.c.shard_no)
+                .with_for_update()
+            )
+            total = sum((await session.execute(stmt)).scalars())
+            await session.execute(delete(shard).where(shard.c.nomenclature_id == nomenclature_id))
+        
+        if shards:
+            await session.execute(insert(shard), [
+                {"nomenclature_id": nomenclature_id, "shard_no": shard_no, "quantity": shard_quantity}
+                for shard_no, shard_quantity in enumerate(_split_evenly(total, shards))
+            ])
+        
+        stmt = (
+            update(Nomenclature)
+            .where(Nomenclature.id == nomenclature_id)
+            .values(quantity=total, stock_shards=shards, version=Nomenclature.version + 1)
+            .returning(*_SNAPSHOT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        row = (await session.execute(stmt)).one()
+        _remember_change(session.info, nomenclature_id, NomenclatureSnapshot(*row))
+        return row
+
+    @staticmethod
+    async def consolidate_stock_shards(session: AsyncSession, nomenclature_id: int) -> Optional[int]:
+        """
+        Выравнивает остаток между шардами товара и записывает сумму в quantity.
+        
+        Случайный выбор шарда со временем опустошает часть шардов; после
+        выравнивания покупки снова находят свободный шард с остатком с первой
+        попытки. Если консолидацию этого товара уже выполняет другой процесс,
+        товар пропускается.
+        
+        Args:
+            session: Сессия БД
+            nomenclature_id: ID товара
+            
+        Returns:
+            Точный остаток товара или None, если товар пропущен или у него нет шардов
+        """
+        stmt = select(func.pg_try_advisory_xact_lock(STOCK_SHARD_LOCK_ID, nomenclature_id))
+        if not await session.scalar(stmt):
+            return None
+        
+        stmt = (
+            select(Nomenclature.quantity, Nomenclature.stock_shards)
+            .where(Nomenclature.id == nomenclature_id)
+            .with_for_update(key_share=True)
+        )
+        product = (await session.execute(stmt)).one_or_none()
+        if product is None or not product.stock_shards:
+            return None
+        
+        shard = nomenclature_stock_shard
+        stmt = (
+            select(shard.c.shard_no, shard.c.quantity)
+            .where(shard.c.nomenclature_id == nomenclature_id)
+            .order_by(shard.c.shard_no)
+            .with_for_update()
+        )
+        shards = (await session.execute(stmt)).all()
+        total = sum(row.quantity for row in shards)
+        
+        new_quantities = {
+            row.shard_no: target
+            for row, target in zip(shards, _split_evenly(total, len(shards)))
+            if row.quantity != target
+        }
+        if new_quantities:
+            await NomenclatureRepository._update_shards(session, nomenclature_id, new_quantities)
+        
+        if product.quantity != total:
+            stmt = (
+                update(Nomenclature)
+                .where(Nomenclature.id == nomenclature_id)
+                .values(quantity=total, version=Nomenclature.version + 1)
+                .returning(*_SNAPSHOT_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            row = (await session.execute(stmt)).one()
+            _remember_change(session.info, nomenclature_id, NomenclatureSnapshot(*row))
+        return total
+
+    @staticmethod
+    async def release_order_stock(session: AsyncSession, order_ids: list[int]) -> None:
+        """
+        Возвращает на склад товары из позиций заказов (при отмене).
+        
+        Количество суммируется по товарам в SQL, и каждый товар обновляется один раз,
+        сколько бы заказов его ни содержали. Строки товаров сначала блокируются
+        в порядке id, как при пакетном добавлении, — параллельные отмены не могут
+        взаимно заблокироваться, а шардирование товара не может включиться или
+        выключиться посередине. Товару с шардами количество возвращается в шард 0,
+        консолидация затем разложит его по остальным.
+        
+        Args:
+            session: Сессия БД (строки заказов уже изменены в этой транзакции)
+            order_ids: ID заказов
+        """
+        ordered = select(OrderItem.nomenclature_id).where(OrderItem.order_id == any_(order_ids))
+        stmt = (
+            select(Nomenclature.id, Nomenclature.stock_shards)
+            .where(Nomenclature.id.in_(ordered))
+            .order_by(Nomenclature.id)
+            .with_for_update(key_share=True)
+        )
+        products = (await session.execute(stmt)).all()
+        sharded_ids = [product.id for product in products if product.stock_shards]
+        
+        returned = (
+            select(OrderItem.nomenclature_id, func.sum(OrderItem.quantity).label("quantity"))
+            .where(OrderItem.order_id == any_(order_ids))
+            .group_by(OrderItem.nomenclature_id)
+            .cte("returned")
+        )
+        if len(sharded_ids) < len(products):
+            stmt = (
+                update(Nomenclature)
+                .where(Nomenclature.id == returned.c.nomenclature_id, Nomenclature.stock_shards == 0)
+                .values(
+                    quantity=Nomenclature.quantity + returned.c.quantity,
+                    version=Nomenclature.version + 1
+                )
+                .returning(*_SNAPSHOT_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            for row in await session.execute(stmt):
+                _remember_change(session.info, row.id, NomenclatureSnapshot(*row))
+        
+        if sharded_ids:
+            shard = nomenclature_stock_shard
+            stmt = (
+                update(shard)
+                .where(
+                    shard.c.nomenclature_id == returned.c.nomenclature_id,
+                    shard.c.nomenclature_id == any_(sharded_ids),
+                    shard.c.shard_no == 0
+                )
+                .values(quantity=shard.c.quantity + returned.c.quantity)
+            )
+            await session.execute(stmt)
+
+    @staticmethod
+    async def list_sharded_ids(session: AsyncSession) -> list[int]:
+        """
+        Возвращает ID товаров с шардированным остатком.
+        
+        Args:
+            session: Сессия БД
+            
+        Returns:
+            ID товаров по возрастанию
+        """
+        stmt = select(Nomenclature.id).where(Nomenclature.stock_shards > 0).order_by(Nomenclature.id)
+        return list((await session.execute(stmt)).scalars())
+
+    @staticmethod
+    async def _update_shards(session: AsyncSession, nomenclature_id: int, new_quantities: dict[int, int]) -> None:
+        """Записывает новые остатки шардов товара одним UPDATE (шарды уже заблокированы)"""
+        shard = nomenclature_stock_shard
+        stmt = (
+            update(shard)
+            .where(shard.c.nomenclature_id == nomenclature_id, shard.c.shard_no.in_(new_quantities))
+            .values(quantity=case(new_quantities, value=shard.c.shard_no))
+        )
+        await session.execute(stmt)
+
+    @staticmethod
+    async def list_page(
+        session: AsyncSession,
+        limit: int,
+        sort: str = "id",
+        after: Optional[tuple] = None,
+        category_id: Optional[int] = None,
+        in_stock: bool = False,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None
+    ) -> list[Row]:
+        """
+        Возвращает страницу каталога с keyset-пагинацией.
+        
+        Вместо OFFSET страница начинается строго после ключа сортировки
+        последней строки предыдущей страницы, поэтому стоимость запроса
+        не зависит от номера страницы: сортировка совпадает с индексами
+        (id) и (price, id), в том числе частичными по quantity > 0.
+        
+        Args:
+            session: Сессия БД
+            limit: Максимальное число строк
+            sort: Порядок — id, price (по возрастанию) или -price (по убыванию)
+            after: Ключ последней строки предыдущей страницы: (id,) или (price, id)
+            category_id: Только товары категории и её потомков
+            in_stock: Только товары с ненулевым остатком
+            min_price: Минимальная цена включительно
+            max_price: Максимальная цена включительно
+            
+        Returns:
+            Строки (id, sku, name, price, quantity, version) в порядке сортировки
+        """
+        stmt = select(*_SNAPSHOT_COLUMNS)
+        
+        if category_id is not None:
+            stmt = stmt.where(Nomenclature.id.in_(CategoryRepository.subtree_products_query(category_id)))
+        if in_stock:
+            stmt = stmt.where(Nomenclature.quantity > 0)
+        if min_price is not None:
+            stmt = stmt.where(Nomenclature.price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(Nomenclature.price <= max_price)
+        
+        if sort == "id":
+            if after is not None:
+                stmt = stmt.where(Nomenclature.id > after[0])
+            stmt = stmt.order_by(Nomenclature.id)
+        elif sort == "price":
+            if after is not None:
+                stmt = stmt.where(tuple_(Nomenclature.price, Nomenclature.id) > tuple_(*after))
+            stmt = stmt.order_by(Nomenclature.price, Nomenclature.id)
+        else:
+            if after is not None:
+                stmt = stmt.where(tuple_(Nomenclature.price, Nomenclature.id) < tuple_(*after))
+            stmt = stmt.order_by(Nomenclature.price.desc(), Nomenclature.id.desc())
+        
+        return list((await session.execute(stmt.limit(limit))).all())
+
+    @staticmethod
+    def get_cache_stats() -> dict:
+        """Статистика кэша номенклатуры"""
+        return nomenclature_cache.stats()
@@ -0,0 +1,78 @@
+"""
+Репозиторий выгрузки заказов: чтение истории заказов серверным курсором
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from app.models.order import Order, OrderItem
+from app.models.nomenclature import Nomenclature
+
+
+def _day_start(day: date) -> datetime:
+    """Начало дня в UTC"""
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+class OrderExportRepository:
+    """Запросы выгрузки заказов"""
+
+    @staticmethod
+    async def stream_order_lines(
+        session: AsyncSession,
+        batch_size: int,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        client_id: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> AsyncResult:
+        """
+        Открывает серверный курсор по позициям заказов.
+        
+        Выбираются колонки, а не ORM-объекты, поэтому строки не попадают в identity map
+        сессии; курсор читается порциями по batch_size строк. Строки идут по заказам
+        (id заказа, затем id позиции); заказ без позиций — одна строка с пустыми полями позиции.
+        
+        Args:
+            session: Сессия БД (курсор живёт до конца её транзакции)
+            batch_size: Строк на одно чтение из курсора
+            date_from: Заказы, созданные с этого дня (UTC, включительно)
+            date_to: Заказы, созданные по этот день (UTC, включительно)
+            client_id: Заказы клиента
+            status: Заказы в статусе
+            
+        Returns:
+            AsyncResult; порции строк — через partitions()
+        """
+        stmt = (
+            select(
+                Order.id.label("order_id"),
+                Order.client_id,
+                Order.status,
+                Order.created_at,
+                Order.updated_at,
+                Order.total_amount,
+                Order.items_count,
+                OrderItem.nomenclature_id,
+                Nomenclature.sku,
+                Nomenclature.name,
+                OrderItem.quantity,
+                OrderItem.price_at_order
+            )
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .outerjoin(Nomenclature, Nomenclature.id == OrderItem.nomenclature_id)
+            .order_by(Order.id, OrderItem.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if date_from is not None:
+            stmt = stmt.where(Order.created_at >= _day_start(date_from))
+        if date_to is not None:
+            stmt = stmt.where(Order.created_at < _day_start(date_to + timedelta(days=1)))
+        if client_id is not None:
+            stmt = stmt.where(Order.client_id == client_id)
+        if status is not None:
+            stmt = stmt.where(Order.status == status)
+        
+        return await session.stream(stmt)
@@ -1 +1,153 @@
-# Orders data access repository
\ No newline at end of file
+"""
+Репозиторий заказов: версия и смена статуса заказов, отмена брошенных заказов
+"""
+from datetime import timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import select, update, func, any_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order
+
+
+class OrdersRepository:
+    """Запросы к таблице заказов"""
+
+    @staticmethod
+    async def change_status(
+        session: AsyncSession,
+        order_id: int,
+        status: str,
+        from_statuses: list[str],
+        version: int
+    ) -> Optional[Row]:
+        """
+        Переводит заказ в статус, если он не менялся с версии version.
+        
+        Проверка версии и текущего статуса выполняется в условии UPDATE, поэтому
+        строка не блокируется заранее: из двух параллельных изменений одной версии
+        проходит только первое.
+        
+        Args:
+            session: Сессия БД
+            order_id: ID заказа
+            status: Новый статус
+            from_statuses: Статусы, из которых разрешён переход
+            version: Ожидаемая версия заказа
+            
+        Returns:
+            Строка (id, status, version, updated_at) после изменения или None,
+            если заказа нет, версия устарела или переход не разрешён
+        """
+        stmt = (
+            update(Order)
+            .where(
+                Order.id == order_id,
+                Order.version == version,
+                Order.status == any_(from_statuses)
+            )
+            .values(status=status, version=Order.version + 1)
+            .returning(Order.id, Order.status, Order.version, Order.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return (await session.execute(stmt)).one_or_none()
+
+    @staticmethod
+    async def change_status_bulk(
+        session: AsyncSession,
+        order_ids: list[int],
+        status: str,
+        from_statuses: list[str]
+    ) -> Sequence[Row]:
+        """
+        Переводит в статус все заказы из списка, для которых переход разрешён, одним UPDATE.
+        
+        Args:
+            session: Сессия БД
+            order_ids: ID заказов
+            status: Новый статус
+            from_statuses: Статусы, из которых разрешён переход
+            
+        Returns:
+            Строки (id, status, version) переведённых заказов в произвольном порядке
+        """
+        stmt = (
+            update(Order)
+            .where(Order.id == any_(order_ids), Order.status == any_(from_statuses))
+            .values(status=status, version=Order.version + 1)
+            .returning(Order.id, Order.status, Order.version)
+            .execution_options(synchronize_session=False)
+        )
+        return (await session.execute(stmt)).all()
+
+    @staticmethod
+    async def get_version(session: AsyncSession, order_id: int) -> Optional[Row]:
+        """
+        Возвращает владельца и версию заказа без позиций — для проверки If-None-Match.
+        
+        Args:
+            session: Сессия БД
+            order_id: ID заказа
+            
+        Returns:
+            Строка (client_id, version) или None, если заказа нет
+        """
+        stmt = select(Order.client_id, Order.version).where(Order.id == order_id)
+        return (await session.execute(stmt)).one_or_none()
+
+    @staticmethod
+    async def get_statuses(session: AsyncSession, order_ids: list[int]) -> Sequence[Row]:
+        """
+        Возвращает текущие статусы и версии заказов.
+        
+        Args:
+            session: Сессия БД
+            order_ids: ID заказов
+            
+        Returns:
+            Строки (id, status, version, updated_at) найденных заказов
+        """
+        stmt = (
+            select(Order.id, Order.status, Order.version, Order.updated_at)
+            .where(Order.id == any_(order_ids))
+        )
+        return (await session.execute(stmt)).all()
+
+    @staticmethod
+    async def cancel_abandoned(session: AsyncSession, ttl: timedelta, limit: int) -> list[int]:
+        """
+        Отменяет до limit заказов в статусе created, не менявшихся дольше ttl.
+        
+        Заказы выбираются FOR NO KEY UPDATE SKIP LOCKED: заказ, который сейчас
+        редактируется или уже взят другим процессом, пропускается, поэтому
+        несколько процессов делят брошенные заказы без ожидания друг друга.
+        Условие перепроверяется на заблокированной строке, так что заказ,
+        изменённый после начала запроса, не отменяется.
+        
+        Args:
+            session: Сессия БД
+            ttl: Срок жизни заказа без изменений
+            limit: Максимум заказов за один вызов
+            
+        Returns:
+            ID отменённых заказов
+        """
+        # То же выражение, что в индексе ix_order_created_last_change
+        last_change = func.coalesce(Order.updated_at, Order.created_at)
+        abandoned = (
+            select(Order.id)
+            .where(Order.status == "created", last_change < func.now() - ttl)
+            .order_by(last_change)
+            .limit(limit)
+            .with_for_update(key_share=True, skip_locked=True)
+            .cte("abandoned")
+        )
+        stmt = (
+            update(Order)
+            .where(Order.id == abandoned.c.id)
+            .values(status="cancelled", version=Order.version + 1)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list((await session.execute(stmt)).scalars())
@@ -0,0 +1,244 @@
+"""
+Репозиторий отчётов: агрегаты продаж и запросы к ним
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, insert, delete, func, or_, distinct, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order, OrderItem
+from app.models.nomenclature import Category, Nomenclature, category_closure, nomenclature_categories
+from app.models.report import product_sales_daily, category_sales_daily, sales_refresh_state, SALES_STATUSES
+
+# Ключ advisory lock: агрегаты обновляет только один процесс одновременно
+SALES_REFRESH_LOCK_ID = 720_013
+
+# День создания заказа в UTC
+_order_day = func.date(func.timezone("UTC", Order.created_at))
+
+
+def _day_start(day: date) -> datetime:
+    """Начало дня в UTC"""
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+class ReportRepository:
+    """Запросы к агрегатам продаж"""
+
+    @staticmethod
+    async def try_lock_refresh(session: AsyncSession) -> bool:
+        """
+        Берёт транзакционный advisory lock на обновление агрегатов.
+        
+        Returns:
+            True, если блокировка получена (снимается при завершении транзакции)
+        """
+        return await session.scalar(select(func.pg_try_advisory_xact_lock(SALES_REFRESH_LOCK_ID)))
+
+    @staticmethod
+    async def get_transaction_time(session: AsyncSession) -> datetime:
+        """Время начала текущей транзакции по часам БД"""
+        return await session.scalar(select(func.now()))
+
+    @staticmethod
+    async def get_watermark(session: AsyncSession) -> Optional[datetime]:
+        """Момент, до которого изменения заказов учтены в агрегатах (None — агрегаты не строились)"""
+        stmt = select(sales_refresh_state.c.refreshed_at).where(sales_refresh_state.c.id == 1)
+        return await session.scalar(stmt)
+
+    @staticmethod
+    async def set_watermark(session: AsyncSession, refreshed_at: datetime) -> None:
+        """Сохраняет момент, до которого изменения заказов учтены"""
+        stmt = pg_insert(sales_refresh_state).values(id=1, refreshed_at=refreshed_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[sales_refresh_state.c.id],
+            set_={"refreshed_at": stmt.excluded.refreshed_at}
+        )
+        await session.execute(stmt)
+
+    @staticmethod
+    async def get_changed_days(session: AsyncSession, changed_since: Optional[datetime]) -> list[date]:
+        """
+        Дни (по дате создания заказа), в которых есть заказы, изменённые после changed_since.
+        
+        Args:
+            session: Сессия БД
+            changed_since: Нижняя граница изменений (None — все дни с заказами)
+            
+        Returns:
+            Список дней для пересчёта
+        """
+        stmt = select(distinct(_order_day)).where(Order.created_at.is_not(None))
+        if changed_since is not None:
+            # Два условия, чтобы планировщик мог взять оба индекса (BitmapOr)
+            stmt = stmt.where(or_(Order.updated_at > changed_since, Order.created_at > changed_since))
+        return sorted((await session.execute(stmt)).scalars())
+
+    @staticmethod
+    async def rebuild_days(session: AsyncSession, days: list[date]) -> None:
+        """
+        Пересчитывает агрегаты продаж за указанные дни целиком.
+        
+        Пересчёт дня идемпотентен, поэтому повторная обработка уже учтённых
+        изменений (перекрытие окна) не искажает результат.
+        
+        Args:
+            session: Сессия БД
+            days: Дни для пересчёта
+        """
+        await session.execute(delete(product_sales_daily).where(product_sales_daily.c.day.in_(days)))
+        await session.execute(delete(category_sales_daily).where(category_sales_daily.c.day.in_(days)))
+        
+        # Диапазон по created_at отсекает заказы вне пересчитываемых дней по индексу
+        product_rows = (
+            select(
+                _order_day,
+                OrderItem.nomenclature_id,
+                func.sum(OrderItem.quantity),
+                func.sum(OrderItem.quantity * OrderItem.price_at_order),
+                func.count(distinct(Order.id))
+            )
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .where(
+                Order.created_at >= _day_start(min(days)),
+                Order.created_at < _day_start(max(days) + timedelta(days=1)),
+                _order_day.in_(days),
+                Order.status.in_(SALES_STATUSES)
+            )
+            .group_by(_order_day, OrderItem.nomenclature_id)
+        )
+        await session.execute(
+            insert(product_sales_daily).from_select(
+                ["day", "nomenclature_id", "units", "revenue", "orders_count"], product_rows
+            )
+        )
+        
+        # Товар учитывается в каждой категории своей ветки ровно один раз,
+        # даже если привязан к нескольким её подкатегориям
+        product_ancestors = (
+            select(nomenclature_categories.c.nomenclature_id, category_closure.c.ancestor_id)
+            .join(category_closure, category_closure.c.descendant_id == nomenclature_categories.c.category_id)
+            .distinct()
+            .subquery()
+        )
+        category_rows = (
+            select(
+                product_sales_daily.c.day,
+                product_ancestors.c.ancestor_id,
+                func.sum(product_sales_daily.c.units),
+                func.sum(product_sales_daily.c.revenue)
+            )
+            .join(product_ancestors, product_ancestors.c.nomenclature_id == product_sales_daily.c.nomenclature_id)
+            .where(product_sales_daily.c.day.in_(days))
+            .group_by(product_sales_daily.c.day, product_ancestors.c.ancestor_id)
+        )
+        await session.execute(
+            insert(category_sales_daily).from_select(["day", "category_id", "units", "revenue"], category_rows)
+        )
+
+    @staticmethod
+    async def get_top_products(session: AsyncSession, since: date, limit: int) -> list[Row]:
+        """
+        Самые продаваемые товары по числу единиц начиная с дня since.
+        
+        Читает только агрегат за окно отчёта; корневая категория подбирается
+        для уже отобранных товаров.
+        
+        Args:
+            session: Сессия БД
+            since: Первый день окна (UTC)
+            limit: Число товаров
+            
+        Returns:
+            Строки (nomenclature_id, sku, name, units, revenue, orders_count,
+            root_category_id, root_category_name)
+        """
+        top = (
+            select(
+                product_sales_daily.c.nomenclature_id,
+                func.sum(product_sales_daily.c.units).label("units"),
+                func.sum(product_sales_daily.c.revenue).label("revenue"),
+                func.sum(product_sales_daily.c.orders_count).label("orders_count")
+            )
+            .where(product_sales_daily.c.day >= since)
+            .group_by(product_sales_daily.c.nomenclature_id)
+            .order_by(func.sum(product_sales_daily.c.units).desc(), product_sales_daily.c.nomenclature_id)
+            .limit(limit)
+            .subquery()
+        )
+        # Корень ветки первой (по ID) категории товара
+        root_category = (
+            select(Category.id.label("root_category_id"), Category.name.label("root_category_name"))
+            .select_from(nomenclature_categories)
+            .join(category_closure, category_closure.c.descendant_id == nomenclature_categories.c.category_id)
+            .join(Category, Category.id == category_closure.c.ancestor_id)
+            .where(
+                nomenclature_categories.c.nomenclature_id == top.c.nomenclature_id,
+                Category.parent_id.is_(None)
+            )
+            .order_by(nomenclature_categories.c.category_id)
+            .limit(1)
+            .lateral()
+        )
+        stmt = (
+            select(
+                top.c.nomenclature_id,
+                Nomenclature.sku,
+                Nomenclature.name,
+                top.c.units,
+                top.c.revenue,
+                top.c.orders_count,
+                root_category.c.root_category_id,
+                root_category.c.root_category_name
+            )
+            .join(Nomenclature, Nomenclature.id == top.c.nomenclature_id)
+            .outerjoin(root_category, true())
+            .order_by(top.c.units.desc(), top.c.nomenclature_id)
+        )
+        return list((await session.execute(stmt)).all())
+
+    @staticmethod
+    async def get_category_sales(session: AsyncSession, since: date, parent_id: Optional[int]) -> list[Row]:
+        """
+        Продажи по дочерним категориям parent_id (или по корневым категориям) начиная с дня since.
+        
+        Args:
+            session: Сессия БД
+            since: Первый день окна (UTC)
+            parent_id: ID родительской категории (None — корневые категории)
+            
+        Returns:
+            Строки (category_id, name, units, revenue) по убыванию выручки
+        """
+        parent_filter = Category.parent_id.is_(None) if parent_id is None else Category.parent_id == parent_id
+        sales = (
+            select(
+                category_sales_daily.c.category_id,
+                func.sum(category_sales_daily.c.units).label("units"),
+                func.sum(category_sales_daily.c.revenue).label("revenue")
+            )
+            .join(Category, Category.id == category_sales_daily.c.category_id)
+            .where(category_sales_daily.c.day >= since, parent_filter)
+            .group_by(category_sales_daily.c.category_id)
+            .subquery()
+        )
+        stmt = (
+            select(
+                Category.id.label("category_id"),
+                Category.name,
+                func.coalesce(sales.c.units, 0).label("units"),
+                func.coalesce(sales.c.revenue, 0).label("revenue")
+            )
+            .outerjoin(sales, sales.c.category_id == Category.id)
+            .where(parent_filter)
+            .order_by(func.coalesce(sales.c.revenue, 0).desc(), Category.id)
+        )
+        return list((await session.execute(stmt)).all())
+
+    @staticmethod
+    async def category_exists(session: AsyncSession, category_id: int) -> bool:
+        """Проверяет, существует ли категория"""
+        return await session.scalar(select(Category.id).where(Category.id == category_id)) is not None
@@ -1,20 +1,72 @@
 """
 Сервис аутентификации и управления клиентами
 """
+from typing import Sequence
+
 from fastapi import Response, status as http_status
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.services.base import BaseService
 from app.models.client import Client
+from app.repositories.clients_repository import ClientsRepository
 from app.dto.base import BaseResponseModel
-from app.dto.auth import RegisterRequest, RegisterResponseData, ClientMeData
-from app.core.security import generate_api_key
+from app.dto.auth import (
+    BulkRegisterRequest,
+    BulkRegisterResponseData,
+    ClientMeData,
+    RegisterRequest,
+    RegisterResponseData,
+)
+from app.core.security import generate_api_key, invalidate_api_key
+
+# Сколько раз перегенерировать ключи, совпавшие с существующими
+API_KEY_INSERT_ATTEMPTS = 5
 
 
 class AuthService:
     """Сервис для регистрации и аутентификации клиентов"""
 
+    @staticmethod
+    async def _create_clients(session: AsyncSession, requests: Sequence[RegisterRequest]) -> list[Row]:
+        """
+        Создаёт клиентов с новыми API ключами без предварительной проверки ключей.
+        
+        Все клиенты вставляются одним INSERT ... ON CONFLICT DO NOTHING; для тех,
+        чей ключ оказался занят, ключ генерируется заново и вставка повторяется.
+        Обычно хватает одного запроса к БД на всю пачку.
+        
+        Args:
+            session: Сессия БД
+            requests: Данные клиентов
+            
+        Returns:
+            Строки (id, name, api_key) в порядке requests
+            
+        Raises:
+            RuntimeError: Не удалось подобрать свободные ключи за API_KEY_INSERT_ATTEMPTS попыток
+        """
+        created: dict[int, Row] = {}
+        pending = list(range(len(requests)))
+        
+        for _ in range(API_KEY_INSERT_ATTEMPTS):
+            # Совпавший внутри пачки ключ вытеснит индекс из словаря — клиент останется в pending
+            keys = {generate_api_key(): index for index in pending}
+            rows = await ClientsRepository.insert_new_keys(session, [
+                {"name": requests[index].name, "address": requests[index].address, "api_key": api_key}
+                for api_key, index in keys.items()
+            ])
+            for row in rows:
+                created[keys[row.api_key]] = row
+                # Ключ мог попасть в кэш неверных ключей до регистрации
+                invalidate_api_key(row.api_key)
+            
+            pending = [index for index in pending if index not in created]
+            if not pending:
+                return [created[index] for index in range(len(requests))]
+        
+        raise RuntimeError(f"Could not generate unique API keys for {len(pending)} clients")
+
     @BaseService.with_session
     async def register(
         request: RegisterRequest,
@@ -32,38 +84,48 @@ class AuthService:
         Returns:
             BaseResponseModel с данными нового клиента и API ключом
         """
-        # Генерируем уникальный API ключ
-        api_key = generate_api_key()
+        [client] = await AuthService._create_clients(session, [request])
         
-        # Проверяем уникальность ключа (на всякий случай, хотя вероятность коллизии ~0)
-        while True:
-            stmt = select(Client).where(Client.api_key == api_key)
-            existing = (await session.execute(stmt)).scalars().first()
-            if not existing:
-                break
-            api_key = generate_api_key()
+        data = RegisterResponseData(
+            client_id=client.id,
+            name=client.name,
+            api_key=client.api_key
+        )
         
-        # Создаём нового клиента
-        new_client = Client(
-            name=request.name,
-            address=request.address,
-            api_key=api_key
+        return await AuthService.format_response(
+            response=response,
+            data=data,
+            message="Client registered successfully"
         )
+
+    @BaseService.with_session
+    async def register_bulk(
+        request: BulkRegisterRequest,
+        response: Response,
+        session: AsyncSession
+    ) -> BaseResponseModel[BulkRegisterResponseData]:
+        """
+        Регистрирует несколько клиентов одной транзакцией.
         
-        session.add(new_client)
-        await session.flush()  # Получаем ID до коммита
+        Args:
+            request: Данные клиентов (до 1000)
+            response: FastAPI Response объект для установки статус-кода
+            session: Сессия БД (инжектится декоратором)
+            
+        Returns:
+            BaseResponseModel с созданными клиентами и их API ключами в порядке запроса
+        """
+        clients = await AuthService._create_clients(session, request.clients)
         
-        # Формируем ответ
-        data = RegisterResponseData(
-            client_id=new_client.id,
-            name=new_client.name,
-            api_key=api_key
-        )
+        data = BulkRegisterResponseData(clients=[
+            RegisterResponseData(client_id=client.id, name=client.name, api_key=client.api_key)
+            for client in clients
+        ])
         
         return await AuthService.format_response(
             response=response,
             data=data,
-            message="Client registered successfully"
+            message=f"{len(clients)} clients registered successfully"
         )
 
     @staticmethod
@@ -84,7 +146,8 @@ class AuthService:
         data = ClientMeData(
             id=client.id,
             name=client.name,
-            address=client.address
+            address=client.address,
+            tier=client.tier
         )
         
         return await AuthService.format_response(
@@ -96,7 +159,7 @@ class AuthService:
     @staticmethod
     async def format_response(
         response: Response,
-        data: RegisterResponseData | ClientMeData | None,
+        data: RegisterResponseData | BulkRegisterResponseData | ClientMeData | None,
         message: str = ""
     ) -> BaseResponseModel:
         """
@@ -2,7 +2,7 @@
 Базовый класс для сервисов с декоратором управления сессией БД
 """
 from functools import wraps
-from app.core.db import AsyncSessionLocal
+from app.core.db import AsyncSessionLocal, get_read_session_factory, mark_primary_write, session_wrote
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -10,18 +10,39 @@ class BaseService:
     """Базовый класс для всех сервисов приложения"""
 
     @staticmethod
-    def with_session(fn):
+    def with_session(fn=None, *, readonly: bool = False):
         """
         Декоратор для автоматического управления сессией БД.
         Создаёт сессию, передаёт её в функцию, коммитит и закрывает.
         В случае ошибки откатывает транзакцию.
+        
+        Если сессия передана явно (session=...), функция выполняется в транзакции
+        вызывающего кода: коммит, откат и закрытие остаются за ним.
+        
+        С readonly=True (@BaseService.with_session(readonly=True)) функция только
+        читает: сессия открывается на реплике, если она настроена и текущий запрос
+        ещё ничего не записал в основную БД, и закрывается без коммита.
+        Записью считается коммит сессии, в которой был flush или INSERT/UPDATE/DELETE.
         """
+        if fn is None:
+            return lambda fn: BaseService.with_session(fn, readonly=readonly)
+        
         @wraps(fn)
         async def wrapper(*args, **kwargs):
+            if kwargs.get("session") is not None:
+                return await fn(*args, **kwargs)
+            
+            if readonly:
+                async with get_read_session_factory()() as session:
+                    return await fn(*args, session=session, **kwargs)
+            
             session: AsyncSession = AsyncSessionLocal()
             try:
                 result = await fn(*args, session=session, **kwargs)
                 await session.commit()
+                # Чтения без изменений не отнимают у остатка запроса реплику
+                if session_wrote(session):
+                    mark_primary_write()
                 return result
             except Exception:
                 await session.rollback()
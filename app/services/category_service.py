@@ -0,0 +1,104 @@
+"""
+Сервис для работы с иерархией категорий
+"""
+from typing import Optional
+
+from fastapi import Response, HTTPException, status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.http_cache import catalog_cache_control
+from app.services.base import BaseService
+from app.repositories.category_repository import CategoryRepository
+from app.dto.base import BaseResponseModel
+from app.dto.category import (
+    CategoryNode,
+    CategoryProductCount,
+    CategoryProductCountsResponse,
+    CategorySubtreeResponse,
+)
+
+
+class CategoryService:
+    """Сервис для чтения дерева категорий"""
+
+    @BaseService.with_session(readonly=True)
+    async def get_subtree(
+        category_id: int,
+        response: Response,
+        session: AsyncSession,
+        max_depth: Optional[int] = None
+    ) -> BaseResponseModel[CategorySubtreeResponse]:
+        """
+        Возвращает категорию со всеми потомками.
+        
+        Args:
+            category_id: ID корня поддерева
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            max_depth: Максимальная глубина относительно корня
+            
+        Returns:
+            BaseResponseModel с поддеревом категории
+            
+        Raises:
+            HTTPException 404: Категория не найдена
+        """
+        rows = await CategoryRepository.get_subtree(session, category_id, max_depth)
+        
+        # Корень всегда присутствует в closure table с depth=0
+        if not rows:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"Category {category_id} not found"
+            )
+        
+        # У категорий нет версии строки, поэтому только Cache-Control без ETag
+        response.headers["Cache-Control"] = catalog_cache_control()
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Category subtree retrieved",
+            data=CategorySubtreeResponse(
+                root_id=category_id,
+                nodes=[CategoryNode.model_validate(row) for row in rows]
+            )
+        )
+
+    @BaseService.with_session(readonly=True)
+    async def get_product_counts(
+        category_id: int,
+        response: Response,
+        session: AsyncSession
+    ) -> BaseResponseModel[CategoryProductCountsResponse]:
+        """
+        Возвращает число товаров по каждой категории поддерева.
+        
+        Args:
+            category_id: ID корня поддерева
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            
+        Returns:
+            BaseResponseModel с числом товаров по категориям
+            
+        Raises:
+            HTTPException 404: Категория не найдена
+        """
+        rows = await CategoryRepository.get_subtree_product_counts(session, category_id)
+        
+        if not rows:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"Category {category_id} not found"
+            )
+        
+        response.headers["Cache-Control"] = catalog_cache_control()
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Category product counts retrieved",
+            data=CategoryProductCountsResponse(
+                root_id=category_id,
+                nodes=[CategoryProductCount.model_validate(row) for row in rows]
+            )
+        )
@@ -0,0 +1,200 @@
+"""
+Сервис идемпотентных запросов (заголовок Idempotency-Key)
+"""
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from fastapi import Response, HTTPException, status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.logger import logger
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.services.base import BaseService
+
+
+class StoredResponse(NamedTuple):
+    """Сохранённый ответ на идемпотентный запрос"""
+    request_hash: bytes
+    status_code: int
+    body: bytes
+
+
+# Кэш (ID клиента, ключ) → ответ перед таблицей idempotency_key
+idempotency_cache: TTLCache[tuple[int, str], StoredResponse] = TTLCache(
+    maxsize=settings.idempotency_cache_max_size,
+    ttl=settings.idempotency_cache_ttl_seconds
+)
+
+# Запросы, выполняющиеся в этом процессе: повторы с тем же ключом ждут их, а не БД
+_in_flight: dict[tuple[int, str], asyncio.Future] = {}
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+CLEANUP_BATCH_SIZE = 1000
+
+
+class IdempotencyService:
+    """Выполнение операций не более одного раза на ключ идемпотентности"""
+
+    @staticmethod
+    def fingerprint(*parts: str) -> bytes:
+        """
+        Отпечаток запроса: повтор с тем же ключом должен совпадать с исходным запросом.
+        
+        Args:
+            parts: Операция и значимые части запроса (путь, параметры, тело)
+            
+        Returns:
+            SHA-256 от частей запроса
+        """
+        return hashlib.sha256("\n".join(parts).encode()).digest()
+
+    @staticmethod
+    async def execute(
+        client_id: int,
+        key: str,
+        request_hash: bytes,
+        operation: Callable[[AsyncSession], Awaitable[Response]]
+    ) -> Response:
+        """
+        Выполняет операцию один раз для ключа, повторы получают сохранённый ответ.
+        
+        Порядок поиска ответа: in-process кэш, выполняющийся в этом процессе
+        запрос с тем же ключом, таблица idempotency_key. Ключ занимается в той же
+        транзакции, что и операция, поэтому ответ сохраняется только вместе с её
+        результатом; при ошибке операции ключ освобождается и повтор выполнит её заново.
+        
+        Args:
+            client_id: ID клиента
+            key: Значение заголовка Idempotency-Key
+            request_hash: Отпечаток запроса (fingerprint)
+            operation: Операция, выполняемая в переданной сессии и возвращающая готовый ответ
+            
+        Returns:
+            Ответ операции или сохранённый ответ с заголовком Idempotent-Replayed
+            
+        Raises:
+            HTTPException 422: Ключ уже использован для другого запроса
+        """
+        cache_key = (client_id, key)
+        
+        while True:
+            stored = idempotency_cache.get(cache_key)
+            if stored is not None:
+                return IdempotencyService._replay(stored, request_hash)
+            
+            in_flight = _in_flight.get(cache_key)
+            if in_flight is None:
+                break
+            # Первый запрос с этим ключом ещё выполняется — ждём его завершения
+            await asyncio.shield(in_flight)
+        
+        future = asyncio.get_running_loop().create_future()
+        _in_flight[cache_key] = future
+        try:
+            response, stored = await IdempotencyService._execute_once(
+                client_id=client_id,
+                key=key,
+                request_hash=request_hash,
+                operation=operation
+            )
+            # Транзакция уже закоммичена — ответ можно отдавать повторам из памяти
+            idempotency_cache.set(cache_key, stored)
+            return response
+        finally:
+            del _in_flight[cache_key]
+            future.set_result(None)
+
+    @BaseService.with_session
+    async def _execute_once(
+        client_id: int,
+        key: str,
+        request_hash: bytes,
+        operation: Callable[[AsyncSession], Awaitable[Response]],
+        session: AsyncSession
+    ) -> tuple[Response, StoredResponse]:
+        """
+        Занимает ключ и выполняет операцию в одной транзакции
+        либо читает ответ, сохранённый другой транзакцией.
+        
+        Returns:
+            Ответ и его сохранённая копия
+        """
+        record_id = await IdempotencyRepository.claim(session, client_id, key, request_hash)
+        
+        if record_id is None:
+            record = await IdempotencyRepository.get(session, client_id, key)
+            if record is None:
+                # Ключ удалили между INSERT и SELECT (очистка просроченных) — пусть клиент повторит
+                raise HTTPException(
+                    status_code=http_status.HTTP_409_CONFLICT,
+                    detail="Request with this Idempotency-Key is being processed, retry later"
+                )
+            stored = StoredResponse(bytes(record.request_hash), record.status_code, bytes(record.response_body))
+            return IdempotencyService._replay(stored, request_hash), stored
+        
+        response = await operation(session)
+        await IdempotencyRepository.save_response(session, record_id, response.status_code, response.body)
+        return response, StoredResponse(request_hash, response.status_code, bytes(response.body))
+
+    @staticmethod
+    def _replay(stored: StoredResponse, request_hash: bytes) -> Response:
+        """
+        Отдаёт сохранённый ответ, если повтор совпадает с исходным запросом.
+        
+        Raises:
+            HTTPException 422: Ключ уже использован для другого запроса
+        """
+        if stored.request_hash != request_hash:
+            raise HTTPException(
+                status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key has already been used for a different request"
+            )
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true"}
+        )
+
+    @BaseService.with_session
+    async def cleanup_expired(session: AsyncSession, batch_size: int = CLEANUP_BATCH_SIZE) -> int:
+        """
+        Удаляет пачку ключей старше idempotency_key_ttl_hours.
+        
+        Args:
+            session: Сессия БД (инжектится декоратором)
+            batch_size: Максимум удаляемых записей за вызов
+            
+        Returns:
+            Число удалённых записей
+        """
+        created_before = datetime.now(timezone.utc) - timedelta(hours=settings.idempotency_key_ttl_hours)
+        return await IdempotencyRepository.delete_expired(session, created_before, batch_size)
+
+    @staticmethod
+    async def run_cleanup_loop(interval: Optional[float] = None) -> None:
+        """
+        Периодически удаляет просроченные ключи короткими транзакциями.
+        Запускается фоновой задачей при старте приложения.
+        
+        Args:
+            interval: Период между проходами, сек (по умолчанию из настроек)
+        """
+        interval = interval or settings.idempotency_cleanup_interval_seconds
+        while True:
+            try:
+                deleted = 0
+                while True:
+                    batch = await IdempotencyService.cleanup_expired()
+                    deleted += batch
+                    if batch < CLEANUP_BATCH_SIZE:
+                        break
+                if deleted:
+                    logger.info(f"Удалено просроченных ключей идемпотентности: {deleted}")
+            except Exception:
+                logger.exception("Ошибка очистки ключей идемпотентности")
+            await asyncio.sleep(interval)
@@ -0,0 +1,163 @@
+"""
+Сервис импорта фида номенклатуры (CSV / NDJSON)
+"""
+import time
+import zlib
+from typing import AsyncIterator
+
+import psycopg
+from fastapi import Request, Response, HTTPException, status as http_status
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.streaming import gunzip_chunks
+from app.services.base import BaseService
+from app.repositories.nomenclature_import_repository import NomenclatureImportRepository
+from app.repositories.nomenclature_repository import nomenclature_cache
+from app.dto.base import BaseResponseModel
+from app.dto.nomenclature import ImportFormat, NomenclatureImportResult
+
+# Ошибки PostgreSQL, вызванные содержимым фида
+_FEED_ERRORS = (psycopg.DataError, psycopg.IntegrityError)
+
+
+def _describe_feed_error(error: psycopg.Error) -> str:
+    """Текст ошибки PostgreSQL с местом в фиде (COPY ..., line N, column ...)"""
+    diag = error.diag
+    message = diag.message_primary or str(error)
+    if not diag.context:
+        return message
+    context = "; ".join(line.strip() for line in diag.context.splitlines() if line.strip())
+    return f"{message} ({context})"
+
+
+class NomenclatureImportService:
+    """Сервис загрузки фидов поставщиков в номенклатуру"""
+
+    @BaseService.with_session
+    async def _load(chunks: AsyncIterator[bytes], fmt: ImportFormat, session: AsyncSession) -> Row:
+        """
+        Загружает фид во временную таблицу и переносит его в номенклатуру.
+        
+        Args:
+            chunks: Куски фида
+            fmt: Формат фида
+            session: Сессия БД (инжектится декоратором)
+            
+        Returns:
+            Строка со счётчиками upsert
+        """
+        await NomenclatureImportRepository.create_staging(
+            session, settings.nomenclature_import_statement_timeout_ms
+        )
+        await NomenclatureImportRepository.copy_feed(session, chunks, fmt)
+        counts = await NomenclatureImportRepository.upsert_from_staging(session)
+        await NomenclatureImportRepository.reshard_from_staging(session)
+        return counts
+
+    @staticmethod
+    async def import_feed(
+        chunks: AsyncIterator[bytes],
+        fmt: ImportFormat,
+        gzipped: bool = False
+    ) -> NomenclatureImportResult:
+        """
+        Импортирует фид одной транзакцией: либо применяется целиком, либо не применяется.
+        
+        Фид передаётся в PostgreSQL потоком через COPY, поэтому память процесса
+        не зависит от его размера.
+        
+        Args:
+            chunks: Куски фида
+            fmt: Формат фида: csv (заголовок sku,name,price,quantity,category_ids) или ndjson
+            gzipped: Фид сжат gzip
+            
+        Returns:
+            Результат импорта со счётчиками и скоростью
+            
+        Raises:
+            HTTPException 400: Ошибка формата или данных фида
+        """
+        if gzipped:
+            chunks = gunzip_chunks(chunks)
+        
+        started = time.perf_counter()
+        try:
+            counts = await NomenclatureImportService._load(chunks=chunks, fmt=fmt)
+        except _FEED_ERRORS as exc:
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid feed: {_describe_feed_error(exc)}"
+            )
+        except DBAPIError as exc:
+            if not isinstance(exc.orig, _FEED_ERRORS):
+                raise
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid feed: {_describe_feed_error(exc.orig)}"
+            )
+        except zlib.error as exc:
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid gzip stream: {exc}"
+            )
+        elapsed = time.perf_counter() - started
+        
+        # Core-запросы не попадают в кэш номенклатуры; изменённых товаров может быть миллионы.
+        # Очищается кэш только этого процесса: другие процессы сервиса (и сам сервис при импорте
+        # через app.cli.import_nomenclature) отдают старые цены до nomenclature_cache_ttl_seconds
+        nomenclature_cache.clear()
+        
+        result = NomenclatureImportResult(
+            format=fmt,
+            rows=counts.rows,
+            inserted=counts.inserted,
+            updated=counts.updated,
+            unchanged=counts.rows - counts.inserted - counts.updated,
+            categories_linked=counts.categories_linked,
+            categories_unlinked=counts.categories_unlinked,
+            unknown_categories=counts.unknown_categories,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(counts.rows / elapsed, 2) if elapsed else 0.0
+        )
+        logger.info(
+            f"Импорт номенклатуры ({fmt}): строк {result.rows}, добавлено {result.inserted}, "
+            f"изменено {result.updated} за {result.elapsed_seconds} с ({result.rows_per_second} строк/с)"
+        )
+        return result
+
+    @staticmethod
+    async def import_upload(
+        request: Request,
+        response: Response,
+        fmt: ImportFormat
+    ) -> BaseResponseModel[NomenclatureImportResult]:
+        """
+        Импортирует фид из тела запроса, читая его потоком.
+        
+        Args:
+            request: FastAPI Request (тело — фид, Content-Encoding: gzip поддерживается)
+            response: FastAPI Response объект
+            fmt: Формат фида
+            
+        Returns:
+            BaseResponseModel с результатом импорта
+            
+        Raises:
+            HTTPException 400: Ошибка формата или данных фида
+        """
+        result = await NomenclatureImportService.import_feed(
+            chunks=request.stream(),
+            fmt=fmt,
+            gzipped=request.headers.get("content-encoding", "").lower() == "gzip"
+        )
+        
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Nomenclature feed imported",
+            data=result
+        )
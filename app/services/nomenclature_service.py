@@ -1 +1,191 @@
-# Nomenclature business logic service
\ No newline at end of file
+"""
+Сервис для работы с номенклатурой (каталог товаров)
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from fastapi import Response, HTTPException, status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.http_cache import catalog_cache_control, etag_matches, make_etag, make_rows_etag, not_modified, set_cache_headers
+from app.services.base import BaseService
+from app.repositories.nomenclature_repository import NomenclatureRepository
+from app.dto.base import BaseResponseModel
+from app.dto.nomenclature import CatalogPage, CatalogSort, NomenclatureItem
+
+
+class NomenclatureService:
+    """Сервис для просмотра каталога товаров"""
+
+    @BaseService.with_session(readonly=True)
+    async def list_catalog(
+        response: Response,
+        session: AsyncSession,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: CatalogSort = "id",
+        category_id: Optional[int] = None,
+        in_stock: bool = False,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        if_none_match: Optional[str] = None
+    ) -> BaseResponseModel[CatalogPage] | Response:
+        """
+        Возвращает страницу каталога с курсорной пагинацией.
+        
+        ETag строится по ID и версиям строк страницы: при совпадении
+        с If-None-Match отдаётся 304 без сборки и сериализации ответа.
+        
+        Args:
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            limit: Размер страницы
+            cursor: Курсор из next_cursor предыдущей страницы
+            sort: Порядок выдачи (id / price / -price)
+            category_id: Только товары категории и её подкатегорий
+            in_stock: Только товары в наличии
+            min_price: Минимальная цена
+            max_price: Максимальная цена
+            if_none_match: Заголовок If-None-Match
+            
+        Returns:
+            BaseResponseModel со страницей каталога или ответ 304
+            
+        Raises:
+            HTTPException 400: Неверный курсор или диапазон цен
+        """
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail="min_price must not be greater than max_price"
+            )
+        
+        after = NomenclatureService._decode_cursor(cursor, sort) if cursor else None
+        
+        # Берём на одну строку больше, чтобы узнать, есть ли следующая страница
+        rows = await NomenclatureRepository.list_page(
+            session,
+            limit=limit + 1,
+            sort=sort,
+            after=after,
+            category_id=category_id,
+            in_stock=in_stock,
+            min_price=min_price,
+            max_price=max_price
+        )
+        
+        # Лишняя строка входит в ETag: от неё зависит next_cursor
+        etag = make_rows_etag("catalog", rows)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, catalog_cache_control())
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = NomenclatureService._encode_cursor(rows[-1], sort) if has_more else None
+        
+        set_cache_headers(response, etag, catalog_cache_control())
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Catalog page retrieved",
+            data=CatalogPage(
+                items=[NomenclatureItem.model_validate(row) for row in rows],
+                next_cursor=next_cursor,
+                limit=limit
+            )
+        )
+
+    @BaseService.with_session(readonly=True)
+    async def get_item(
+        nomenclature_id: int,
+        response: Response,
+        session: AsyncSession,
+        if_none_match: Optional[str] = None
+    ) -> BaseResponseModel[NomenclatureItem] | Response:
+        """
+        Возвращает товар по ID (из кэша номенклатуры, при промахе — из БД).
+        
+        ETag — версия строки товара; при совпадении с If-None-Match отдаётся 304.
+        
+        Args:
+            nomenclature_id: ID товара
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            if_none_match: Заголовок If-None-Match
+            
+        Returns:
+            BaseResponseModel с товаром или ответ 304
+            
+        Raises:
+            HTTPException 404: Товар не найден
+        """
+        snapshot = await NomenclatureRepository.get_by_id(session, nomenclature_id)
+        
+        if snapshot is None:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"Product {nomenclature_id} not found"
+            )
+        
+        etag = make_etag("nomenclature", nomenclature_id, snapshot.version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, catalog_cache_control())
+        
+        set_cache_headers(response, etag, catalog_cache_control())
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Product retrieved",
+            data=NomenclatureItem.model_validate(snapshot)
+        )
+
+    @staticmethod
+    def _encode_cursor(row, sort: CatalogSort) -> str:
+        """
+        Кодирует ключ сортировки последней строки страницы в непрозрачный курсор.
+        
+        Args:
+            row: Последняя строка страницы
+            sort: Порядок выдачи
+            
+        Returns:
+            base64url-строка без выравнивания
+        """
+        payload = {"s": sort, "i": row.id}
+        if sort != "id":
+            payload["p"] = str(row.price)
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: CatalogSort) -> tuple:
+        """
+        Разбирает курсор в ключ сортировки.
+        
+        Args:
+            cursor: Курсор из next_cursor
+            sort: Порядок выдачи текущего запроса
+            
+        Returns:
+            (id,) для сортировки по id или (price, id) для сортировки по цене
+            
+        Raises:
+            HTTPException 400: Курсор повреждён или выдан для другого порядка сортировки
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            if payload["s"] != sort:
+                raise ValueError("sort mismatch")
+            key_id = int(payload["i"])
+            if sort == "id":
+                return (key_id,)
+            return (Decimal(payload["p"]), key_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, InvalidOperation):
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
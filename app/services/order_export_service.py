@@ -0,0 +1,177 @@
+"""
+Сервис потоковой выгрузки заказов с позициями (NDJSON / CSV)
+"""
+import csv
+import io
+from datetime import date, datetime
+from typing import AsyncIterator, List, Optional, Sequence
+
+import orjson
+from fastapi import Request, HTTPException, status as http_status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Row
+
+from app.core.config import settings
+from app.core.db import get_read_session_factory
+from app.core.streaming import accepts_gzip, gzip_chunks
+from app.repositories.order_export_repository import OrderExportRepository
+from app.dto.report import OrderExportFormat
+
+# Колонки CSV: одна строка на позицию заказа
+CSV_COLUMNS = [
+    "order_id", "client_id", "status", "created_at", "updated_at", "total_amount", "items_count",
+    "nomenclature_id", "sku", "name", "quantity", "price_at_order"
+]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    """Дата и время в ISO 8601 для CSV (updated_at у не изменявшихся заказов пуст)"""
+    return value.isoformat() if value is not None else None
+
+
+async def _ndjson_chunks(partitions: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """
+    Собирает строки курсора в NDJSON: один заказ с позициями на строку.
+    
+    Строки курсора упорядочены по заказу, поэтому в памяти держится только
+    текущий заказ; его позиции могут прийти в разных порциях. Decimal
+    отдаётся строкой, как в ответах API.
+    """
+    dumps = orjson.dumps
+    order = None
+    async for rows in partitions:
+        lines: List[bytes] = []
+        # Строки распаковываются как кортежи: на сотнях тысяч строк доступ по имени заметно дороже
+        for (order_id, client_id, status, created_at, updated_at, total_amount, items_count,
+             nomenclature_id, sku, name, quantity, price_at_order) in rows:
+            if order is None or order["id"] != order_id:
+                if order is not None:
+                    lines.append(dumps(order, option=orjson.OPT_APPEND_NEWLINE))
+                order = {
+                    "id": order_id,
+                    "client_id": client_id,
+                    "status": status,
+                    "created_at": created_at,
+                    "updated_at": updated_at,
+                    "total_amount": str(total_amount),
+                    "items_count": items_count,
+                    "items": []
+                }
+            if nomenclature_id is not None:
+                order["items"].append({
+                    "nomenclature_id": nomenclature_id,
+                    "sku": sku,
+                    "name": name,
+                    "quantity": quantity,
+                    "price_at_order": str(price_at_order)
+                })
+        if lines:
+            yield b"".join(lines)
+    if order is not None:
+        yield dumps(order, option=orjson.OPT_APPEND_NEWLINE)
+
+
+async def _csv_chunks(partitions: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Собирает строки курсора в CSV с заголовком: одна позиция заказа на строку"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    order_id, order_fields = None, ()
+    async for rows in partitions:
+        for row in rows:
+            # Поля заказа повторяются в каждой его позиции: форматируем их один раз на заказ
+            if row[0] != order_id:
+                order_id, client_id, status, created_at, updated_at, total_amount, items_count = row[:7]
+                order_fields = (
+                    order_id, client_id, status, _isoformat(created_at), _isoformat(updated_at),
+                    total_amount, items_count
+                )
+            writer.writerow(order_fields + row[7:])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class OrderExportService:
+    """Сервис выгрузки истории заказов для сверки"""
+
+    @staticmethod
+    async def _stream_rows(**filters) -> AsyncIterator[Sequence[Row]]:
+        """
+        Читает заказы серверным курсором порциями.
+        
+        Сессия живёт, пока клиент читает ответ, поэтому открывается здесь,
+        а не декоратором with_session: при обрыве соединения генератор
+        отменяется и сессия закрывается вместе с курсором. Выгрузка только
+        читает, поэтому идёт на реплику, если она настроена.
+        
+        Args:
+            **filters: Фильтры OrderExportRepository.stream_order_lines
+            
+        Yields:
+            Порции строк курсора
+        """
+        async with get_read_session_factory()() as session:
+            result = await OrderExportRepository.stream_order_lines(
+                session,
+                batch_size=settings.order_export_batch_size,
+                **filters
+            )
+            async for rows in result.partitions():
+                yield rows
+
+    @staticmethod
+    async def export_orders(
+        request: Request,
+        fmt: OrderExportFormat,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        client_id: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> StreamingResponse:
+        """
+        Выгружает заказы с позициями потоком.
+        
+        Ответ формируется по мере чтения курсора, поэтому память процесса не зависит
+        от объёма истории. Если клиент принимает gzip (Accept-Encoding), поток
+        сжимается на лету.
+        
+        Args:
+            request: FastAPI Request (заголовок Accept-Encoding)
+            fmt: Формат выгрузки
+            date_from: Заказы, созданные с этого дня (UTC, включительно)
+            date_to: Заказы, созданные по этот день (UTC, включительно)
+            client_id: Заказы клиента
+            status: Заказы в статусе
+            
+        Returns:
+            StreamingResponse с файлом выгрузки
+            
+        Raises:
+            HTTPException 400: date_from позже date_to
+        """
+        if date_from is not None and date_to is not None and date_from > date_to:
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail="date_from must not be later than date_to"
+            )
+        
+        rows = OrderExportService._stream_rows(
+            date_from=date_from,
+            date_to=date_to,
+            client_id=client_id,
+            status=status
+        )
+        body = _ndjson_chunks(rows) if fmt == "ndjson" else _csv_chunks(rows)
+        
+        headers = {
+            "Content-Disposition": f'attachment; filename="orders.{fmt}"',
+            "Vary": "Accept-Encoding"
+        }
+        if accepts_gzip(request.headers.get("accept-encoding", "")):
+            body = gzip_chunks(body, settings.order_export_gzip_level)
+            headers["Content-Encoding"] = "gzip"
+        
+        return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
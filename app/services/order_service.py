@@ -1,18 +1,60 @@
 """
 Сервис для работы с заказами
 """
+import asyncio
+from datetime import timedelta
+from typing import Optional
+
 from fastapi import Response, HTTPException, status as http_status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from decimal import Decimal
 
+from app.core.config import settings
+from app.core.http_cache import ORDER_CACHE_CONTROL, etag_matches, make_etag, not_modified, set_cache_headers
+from app.core.logger import logger
+from app.core.responses import ORJSONResponse
 from app.services.base import BaseService
+from app.services.idempotency_service import IdempotencyService
 from app.models.order import Order, OrderItem
 from app.models.nomenclature import Nomenclature
 from app.models.client import Client
+from app.repositories.nomenclature_repository import NomenclatureRepository
+from app.repositories.orders_repository import OrdersRepository
 from app.dto.base import BaseResponseModel
-from app.dto.order import AddItemRequest, OrderResponse, OrderItemResponse
+from app.dto.order import (
+    AddItemRequest,
+    AddItemsBatchRequest,
+    BatchAddItemsResponse,
+    BatchItemResult,
+    BulkOrderStatusRequest,
+    BulkOrderStatusResponse,
+    BulkOrderStatusResult,
+    OrderResponse,
+    OrderItemResponse,
+    OrderStatus,
+    OrderStatusChangeRequest,
+    OrderStatusInfo,
+    OrderView,
+)
+
+# Разрешённые переходы статусов заказа: текущий статус → новые.
+# Товар списывается со склада при добавлении в заказ, поэтому отмена
+# (из created и paid) возвращает его на склад.
+ORDER_STATUS_TRANSITIONS: dict[str, tuple[str, ...]] = {
+    "created": ("paid", "cancelled"),
+    "paid": ("shipped", "cancelled"),
+    "shipped": ("completed",),
+    "completed": (),
+    "cancelled": (),
+}
+
+
+def _source_statuses(status: OrderStatus) -> list[str]:
+    """Статусы, из которых разрешён переход в status"""
+    return [source for source, targets in ORDER_STATUS_TRANSITIONS.items() if status in targets]
 
 
 class OrderService:
@@ -24,20 +66,26 @@ class OrderService:
         request: AddItemRequest,
         current_client: Client,
         response: Response,
-        session: AsyncSession
+        session: AsyncSession,
+        view: OrderView = "full"
     ) -> BaseResponseModel[OrderResponse]:
         """
         Добавляет товар в заказ или увеличивает его количество.
         
+        Итоги заказа (total_amount, items_count) обновляются инкрементально
+        в той же транзакции, поэтому для ответов summary и line позиции заказа
+        не загружаются вовсе.
+        
         Args:
             order_id: ID заказа
             request: Данные о товаре и количестве
             current_client: Текущий авторизованный клиент
             response: FastAPI Response объект
             session: Сессия БД (инжектится декоратором)
+            view: Вид ответа — full (все позиции), summary (только итоги), line (итоги и изменённая позиция)
             
         Returns:
-            BaseResponseModel с полным заказом
+            BaseResponseModel с заказом
             
         Raises:
             HTTPException 404: Заказ или товар не найден
@@ -45,138 +93,742 @@ class OrderService:
             HTTPException 423: Заказ заблокирован (статус не позволяет изменения)
             HTTPException 409: Недостаточно товара на складе
         """
-        # 1. Получаем заказ с позициями
-        stmt = select(Order).where(Order.id == order_id).options(selectinload(Order.items))
-        order = (await session.execute(stmt)).scalar_one_or_none()
+        # 1-3. Получаем заказ и проверяем, что его можно менять (позиции — только для полного ответа)
+        order = await OrderService._get_editable_order(
+            session, order_id, current_client, with_items=view == "full"
+        )
         
-        if not order:
+        # 4. Списываем товар со склада одним условным UPDATE (проверка остатка внутри запроса)
+        reserved = await NomenclatureRepository.reserve_stock(
+            session, request.nomenclature_id, request.quantity
+        )
+        
+        if reserved is None:
+            # Списание не прошло — выясняем причину: товара нет или не хватает остатка
+            available = await NomenclatureRepository.get_stock(session, request.nomenclature_id)
+            
+            if available is None:
+                raise HTTPException(
+                    status_code=http_status.HTTP_404_NOT_FOUND,
+                    detail=f"Product {request.nomenclature_id} not found"
+                )
+            
             raise HTTPException(
-                status_code=http_status.HTTP_404_NOT_FOUND,
-                detail=f"Order {order_id} not found"
+                status_code=http_status.HTTP_409_CONFLICT,
+                detail=f"Insufficient stock. Available: {available}, requested: {request.quantity}"
             )
         
-        # 2. Проверяем принадлежность заказа текущему клиенту
-        if order.client_id != current_client.id:
-            raise HTTPException(
-                status_code=http_status.HTTP_403_FORBIDDEN,
-                detail="You can only modify your own orders"
+        # 5. Ищем существующую позицию в заказе (заказ заблокирован, параллельных вставок нет)
+        if view == "full":
+            existing_item = next(
+                (item for item in order.items if item.nomenclature_id == request.nomenclature_id),
+                None
             )
+        else:
+            stmt = select(OrderItem).where(
+                OrderItem.order_id == order_id,
+                OrderItem.nomenclature_id == request.nomenclature_id
+            )
+            existing_item = (await session.execute(stmt)).scalar_one_or_none()
         
-        # 3. Проверяем статус заказа (редактировать можно только created)
-        if order.status != "created":
-            raise HTTPException(
-                status_code=http_status.HTTP_423_LOCKED,
-                detail=f"Cannot modify order with status '{order.status}'. Only 'created' orders can be modified."
+        if existing_item:
+            # Товар уже есть в заказе — увеличиваем количество по цене позиции
+            existing_item.quantity += request.quantity
+            changed_item = existing_item
+        
+        else:
+            # Создаём новую позицию в заказе
+            changed_item = OrderItem(
+                order_id=order_id,
+                nomenclature_id=request.nomenclature_id,
+                quantity=request.quantity,
+                price_at_order=reserved.price
             )
+            if view == "full":
+                # Добавляем в загруженную коллекцию, чтобы не перечитывать позиции после flush
+                order.items.append(changed_item)
+            else:
+                session.add(changed_item)
         
-        # 4. Получаем товар с блокировкой строки (защита от race condition)
+        # 6. Обновляем итоги заказа
+        await OrderService._apply_totals_delta(
+            session,
+            order,
+            amount=changed_item.price_at_order * request.quantity,
+            new_items=0 if existing_item else 1
+        )
+        
+        # 7. Сохраняем изменения (commit выполнит декоратор)
+        await session.flush()
+        
+        # 8. Формируем ответ
+        if view == "full":
+            items = order.items
+        elif view == "line":
+            items = [changed_item]
+        else:
+            items = []
+        
+        return await OrderService.format_response(
+            response=response,
+            data=OrderService._build_order_data(order, items),
+            message="Item added to order successfully"
+        )
+
+    @staticmethod
+    async def add_item_to_order_idempotent(
+        order_id: int,
+        request: AddItemRequest,
+        current_client: Client,
+        response: Response,
+        idempotency_key: str,
+        view: OrderView = "full"
+    ) -> Response:
+        """
+        Добавляет товар в заказ не более одного раза для ключа идемпотентности.
+        
+        Повтор с тем же ключом и тем же запросом получает сохранённый ответ
+        без обращения к заказу и складу; параллельный повтор ждёт первый запрос.
+        
+        Args:
+            order_id: ID заказа
+            request: Данные о товаре и количестве
+            current_client: Текущий авторизованный клиент
+            response: FastAPI Response объект
+            idempotency_key: Значение заголовка Idempotency-Key
+            view: Вид ответа (full / summary / line)
+            
+        Returns:
+            Готовый JSON-ответ (у повтора — с заголовком Idempotent-Replayed)
+            
+        Raises:
+            HTTPException 422: Ключ уже использован для другого запроса
+            HTTPException 404/403/423/409: Как у add_item_to_order
+        """
+        request_hash = IdempotencyService.fingerprint(
+            "add_item_to_order", str(order_id), view, request.model_dump_json()
+        )
+        
+        async def operation(session: AsyncSession) -> Response:
+            result = await OrderService.add_item_to_order(
+                order_id=order_id,
+                request=request,
+                current_client=current_client,
+                response=response,
+                view=view,
+                session=session
+            )
+            if isinstance(result, Response):
+                return result
+            return ORJSONResponse(content=result, status_code=response.status_code, headers=response.headers)
+        
+        return await IdempotencyService.execute(
+            client_id=current_client.id,
+            key=idempotency_key,
+            request_hash=request_hash,
+            operation=operation
+        )
+
+    @BaseService.with_session
+    async def add_items_to_order(
+        order_id: int,
+        request: AddItemsBatchRequest,
+        current_client: Client,
+        response: Response,
+        session: AsyncSession
+    ) -> BaseResponseModel[BatchAddItemsResponse]:
+        """
+        Добавляет в заказ несколько товаров одной транзакцией.
+        
+        Строки товаров без шардов блокируются одним запросом в порядке возрастания id.
+        Строки товаров с шардами не блокируются: их остаток списывается из шардов,
+        а цена берётся из строки, которую вернуло списание. Позиции обрабатываются
+        в порядке id товара, поэтому параллельные пакеты берут блокировки в одном
+        порядке и не могут взаимно заблокироваться. Позиции, которых нет
+        в номенклатуре или на складе, пропускаются и возвращаются в results
+        со своим статусом, остальные добавляются.
+        
+        Args:
+            order_id: ID заказа
+            request: Список позиций для добавления
+            current_client: Текущий авторизованный клиент
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            
+        Returns:
+            BaseResponseModel с полным заказом и результатами по позициям
+            
+        Raises:
+            HTTPException 404: Заказ не найден
+            HTTPException 403: Заказ принадлежит другому клиенту
+            HTTPException 423: Заказ заблокирован (статус не позволяет изменения)
+        """
+        order = await OrderService._get_editable_order(session, order_id, current_client)
+        
+        # Блокируем товары без шардов одним запросом в детерминированном порядке.
+        # Условие stock_shards = 0 перепроверяется на заблокированной строке
+        nomenclature_ids = sorted({line.nomenclature_id for line in request.items})
         stmt = select(Nomenclature).where(
-            Nomenclature.id == request.nomenclature_id
-        ).with_for_update()
+            Nomenclature.id.in_(nomenclature_ids),
+            Nomenclature.stock_shards == 0
+        ).order_by(Nomenclature.id).with_for_update()
+        products = {
+            product.id: product
+            for product in (await session.execute(stmt)).scalars()
+        }
+        
+        # Остальные товары либо шардированы, либо отсутствуют: их строки не блокируем,
+        # иначе все покупки популярного товара снова выстроились бы в очередь за одной строкой
+        shards_by_product = {}
+        other_ids = [nomenclature_id for nomenclature_id in nomenclature_ids if nomenclature_id not in products]
+        if other_ids:
+            stmt = select(Nomenclature.id, Nomenclature.stock_shards).where(Nomenclature.id.in_(other_ids))
+            shards_by_product = dict((await session.execute(stmt)).tuples().all())
+        
+        # Позиции прочитаны под блокировкой заказа, поэтому новый товар вставляется один раз
+        items_by_product = {item.nomenclature_id: item for item in order.items}
+        results = []
+        amount_delta = Decimal(0)
+        new_items = 0
+        
+        # Шарды блокируются по ходу списания: обходим позиции в порядке id товара,
+        # чтобы все транзакции брали блокировки в одном порядке
+        lines = sorted(enumerate(request.items), key=lambda indexed: indexed[1].nomenclature_id)
+        for index, line in lines:
+            product = products.get(line.nomenclature_id)
+            
+            if product is None and line.nomenclature_id not in shards_by_product:
+                results.append(BatchItemResult(
+                    index=index,
+                    nomenclature_id=line.nomenclature_id,
+                    quantity=line.quantity,
+                    status="not_found"
+                ))
+                continue
+            
+            if product is None:
+                shards = shards_by_product[line.nomenclature_id]
+                if shards:
+                    # Остаток популярного товара разложен по шардам: строку товара не трогаем
+                    reserved = await NomenclatureRepository.reserve_sharded_stock(
+                        session, line.nomenclature_id, line.quantity, shards
+                    )
+                else:
+                    # Шардирование выключили между двумя запросами: обычное списание
+                    reserved = await NomenclatureRepository.reserve_stock(
+                        session, line.nomenclature_id, line.quantity
+                    )
+                available = None
+                if reserved is None:
+                    available = await NomenclatureRepository.get_stock(session, line.nomenclature_id) or 0
+                else:
+                    price = reserved.price
+            elif product.quantity >= line.quantity:
+                product.quantity -= line.quantity
+                price = product.price
+                available = None
+            else:
+                available = product.quantity
+            
+            if available is not None:
+                results.append(BatchItemResult(
+                    index=index,
+                    nomenclature_id=line.nomenclature_id,
+                    quantity=line.quantity,
+                    status="insufficient_stock",
+                    available=available
+                ))
+                continue
+            
+            existing_item = items_by_product.get(line.nomenclature_id)
+            if existing_item:
+                existing_item.quantity += line.quantity
+                amount_delta += existing_item.price_at_order * line.quantity
+            else:
+                new_item = OrderItem(
+                    nomenclature_id=line.nomenclature_id,
+                    quantity=line.quantity,
+                    price_at_order=price
+                )
+                # Добавляем в коллекцию заказа, чтобы не перечитывать позиции после flush
+                order.items.append(new_item)
+                items_by_product[line.nomenclature_id] = new_item
+                amount_delta += price * line.quantity
+                new_items += 1
+            
+            results.append(BatchItemResult(
+                index=index,
+                nomenclature_id=line.nomenclature_id,
+                quantity=line.quantity,
+                status="added"
+            ))
+        
+        if amount_delta or new_items:
+            await OrderService._apply_totals_delta(session, order, amount=amount_delta, new_items=new_items)
+        
+        # Сохраняем изменения (commit выполнит декоратор)
+        await session.flush()
+        
+        results.sort(key=lambda result: result.index)
+        failed = sum(1 for result in results if result.status != "added")
+        if settings.fast_json_responses:
+            data = {"order": OrderService._build_order_payload(order, order.items), "results": results}
+        else:
+            data = BatchAddItemsResponse(
+                order=OrderService._build_order_response(order, order.items),
+                results=results
+            )
+        
+        return await OrderService.format_response(
+            response=response,
+            data=data,
+            message=(
+                "Items added to order successfully" if not failed
+                else f"{len(results) - failed} of {len(results)} items added to order"
+            ),
+            success=not failed
+        )
+
+    @BaseService.with_session
+    async def get_order(
+        order_id: int,
+        current_client: Client,
+        response: Response,
+        session: AsyncSession,
+        if_none_match: Optional[str] = None
+    ) -> BaseResponseModel[OrderResponse] | Response:
+        """
+        Возвращает заказ с позициями; ETag — версия заказа.
+        
+        Версия растёт при любом изменении заказа, включая позиции, поэтому
+        If-None-Match проверяется по одной строке заказа: при совпадении
+        отдаётся 304 без загрузки позиций и сборки ответа.
         
-        nomenclature = (await session.execute(stmt)).scalar_one_or_none()
+        Args:
+            order_id: ID заказа
+            current_client: Текущий авторизованный клиент
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            if_none_match: Заголовок If-None-Match
+            
+        Returns:
+            BaseResponseModel с заказом или ответ 304
+            
+        Raises:
+            HTTPException 404: Заказ не найден
+            HTTPException 403: Заказ принадлежит другому клиенту
+        """
+        current = await OrdersRepository.get_version(session, order_id)
         
-        if not nomenclature:
+        if current is None:
             raise HTTPException(
                 status_code=http_status.HTTP_404_NOT_FOUND,
-                detail=f"Product {request.nomenclature_id} not found"
+                detail=f"Order {order_id} not found"
             )
         
-        # 5. Проверяем наличие товара на складе
-        if nomenclature.quantity < request.quantity:
+        if current.client_id != current_client.id:
             raise HTTPException(
-                status_code=http_status.HTTP_409_CONFLICT,
-                detail=f"Insufficient stock. Available: {nomenclature.quantity}, requested: {request.quantity}"
+                status_code=http_status.HTTP_403_FORBIDDEN,
+                detail="You can only view your own orders"
             )
         
-        # 6. Ищем существующую позицию в заказе
-        existing_item = None
-        for item in order.items:
-            if item.nomenclature_id == request.nomenclature_id:
-                existing_item = item
-                break
+        etag = make_etag("order", order_id, current.version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, ORDER_CACHE_CONTROL)
         
-        if existing_item:
-            # Товар уже есть в заказе — увеличиваем количество
-            new_quantity = existing_item.quantity + request.quantity
+        stmt = select(Order).where(Order.id == order_id).options(selectinload(Order.items))
+        order = (await session.execute(stmt)).scalar_one()
+        
+        # Заказ мог измениться после проверки версии — ETag берём у загруженного
+        set_cache_headers(response, make_etag("order", order.id, order.version), ORDER_CACHE_CONTROL)
+        return await OrderService.format_response(
+            response=response,
+            data=OrderService._build_order_data(order, order.items),
+            message="Order retrieved"
+        )
+
+    @BaseService.with_session
+    async def change_order_status(
+        order_id: int,
+        request: OrderStatusChangeRequest,
+        response: Response,
+        session: AsyncSession
+    ) -> BaseResponseModel[OrderStatusInfo]:
+        """
+        Переводит заказ в другой статус с проверкой версии (оптимистичная блокировка).
+        
+        Версия, текущий статус и допустимость перехода проверяются условием
+        одного UPDATE, без предварительной блокировки строки. При отмене товары
+        заказа возвращаются на склад в той же транзакции.
+        
+        Args:
+            order_id: ID заказа
+            request: Новый статус и версия, которую видел вызывающий
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            
+        Returns:
+            BaseResponseModel со статусом и новой версией заказа
             
-            # Проверяем что хватит товара для нового количества
-            if nomenclature.quantity < request.quantity:
+        Raises:
+            HTTPException 404: Заказ не найден
+            HTTPException 409: Заказ изменён после указанной версии или переход не разрешён
+        """
+        row = await OrdersRepository.change_status(
+            session, order_id, request.status, _source_statuses(request.status), request.version
+        )
+        
+        if row is None:
+            # UPDATE не прошёл — выясняем причину
+            current = next(iter(await OrdersRepository.get_statuses(session, [order_id])), None)
+            if current is None:
+                raise HTTPException(
+                    status_code=http_status.HTTP_404_NOT_FOUND,
+                    detail=f"Order {order_id} not found"
+                )
+            if current.version != request.version:
                 raise HTTPException(
                     status_code=http_status.HTTP_409_CONFLICT,
-                    detail=f"Insufficient stock for total quantity. Available: {nomenclature.quantity}"
+                    detail=f"Order {order_id} has been modified: current version {current.version}, "
+                           f"expected {request.version}"
                 )
+            raise HTTPException(
+                status_code=http_status.HTTP_409_CONFLICT,
+                detail=f"Cannot change order status from '{current.status}' to '{request.status}'"
+            )
+        
+        if request.status == "cancelled":
+            await NomenclatureRepository.release_order_stock(session, [order_id])
+        
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Order status updated",
+            data=OrderStatusInfo(id=row.id, status=row.status, version=row.version, updated_at=row.updated_at)
+        )
+
+    @BaseService.with_session
+    async def change_orders_status_bulk(
+        request: BulkOrderStatusRequest,
+        response: Response,
+        session: AsyncSession
+    ) -> BaseResponseModel[BulkOrderStatusResponse]:
+        """
+        Переводит много заказов в один статус одним UPDATE.
+        
+        Переводятся заказы, для которых переход из текущего статуса разрешён;
+        версии не проверяются. Для остальных одним запросом читается текущий
+        статус, чтобы сообщить причину. При отмене товары переведённых заказов
+        возвращаются на склад одним UPDATE на таблицу.
+        
+        Args:
+            request: ID заказов и целевой статус
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
             
-            existing_item.quantity = new_quantity
-            nomenclature.quantity -= request.quantity
-            
-        else:
-            # Создаём новую позицию в заказе
-            new_item = OrderItem(
+        Returns:
+            BaseResponseModel с результатом по каждому заказу в порядке запроса
+            (success = false, если переведены не все)
+        """
+        order_ids = list(dict.fromkeys(request.order_ids))
+        rows = await OrdersRepository.change_status_bulk(
+            session, order_ids, request.status, _source_statuses(request.status)
+        )
+        updated = {row.id: row for row in rows}
+        
+        if request.status == "cancelled" and updated:
+            await NomenclatureRepository.release_order_stock(session, list(updated))
+        
+        skipped = [order_id for order_id in order_ids if order_id not in updated]
+        current = (
+            {row.id: row for row in await OrdersRepository.get_statuses(session, skipped)}
+            if skipped else {}
+        )
+        
+        results = []
+        for order_id in order_ids:
+            row = updated.get(order_id) or current.get(order_id)
+            if row is None:
+                results.append(BulkOrderStatusResult(order_id=order_id, result="not_found"))
+                continue
+            results.append(BulkOrderStatusResult(
                 order_id=order_id,
-                nomenclature_id=request.nomenclature_id,
-                quantity=request.quantity,
-                price_at_order=nomenclature.price
+                result="updated" if order_id in updated else "invalid_transition",
+                status=row.status,
+                version=row.version
+            ))
+        
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=len(updated) == len(order_ids),
+            message=f"{len(updated)} of {len(order_ids)} orders moved to '{request.status}'",
+            data=BulkOrderStatusResponse(status=request.status, updated=len(updated), results=results)
+        )
+
+    @BaseService.with_session
+    async def cancel_abandoned_orders(session: AsyncSession, limit: Optional[int] = None) -> int:
+        """
+        Отменяет одну пачку брошенных заказов и возвращает их товары на склад.
+        
+        Заказ считается брошенным, если он в статусе created и не менялся дольше
+        ORDER_EXPIRY_TTL_MINUTES. Отмена пачки и возврат товаров (один UPDATE
+        на таблицу) выполняются в одной транзакции.
+        
+        Args:
+            session: Сессия БД (инжектится декоратором)
+            limit: Размер пачки (по умолчанию из настроек)
+            
+        Returns:
+            Число отменённых заказов
+        """
+        order_ids = await OrdersRepository.cancel_abandoned(
+            session,
+            ttl=timedelta(minutes=settings.order_expiry_ttl_minutes),
+            limit=limit or settings.order_expiry_batch_size
+        )
+        if order_ids:
+            await NomenclatureRepository.release_order_stock(session, order_ids)
+        return len(order_ids)
+
+    @staticmethod
+    async def run_expiry_loop(interval: Optional[float] = None) -> None:
+        """
+        Периодически отменяет брошенные заказы пачками.
+        Запускается фоновой задачей при старте приложения; при нескольких
+        процессах каждый берёт свои заказы (SKIP LOCKED). Пачки идут подряд
+        с паузой ORDER_EXPIRY_BATCH_PAUSE_SECONDS, пока находятся брошенные заказы.
+        
+        Args:
+            interval: Период между проходами, сек (по умолчанию из настроек)
+        """
+        interval = interval or settings.order_expiry_interval_seconds
+        while True:
+            try:
+                total = 0
+                while True:
+                    cancelled = await OrderService.cancel_abandoned_orders()
+                    total += cancelled
+                    if cancelled < settings.order_expiry_batch_size:
+                        break
+                    await asyncio.sleep(settings.order_expiry_batch_pause_seconds)
+                if total:
+                    logger.info(f"Отменено брошенных заказов: {total}")
+            except Exception:
+                logger.exception("Ошибка отмены брошенных заказов")
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    async def _get_editable_order(
+        session: AsyncSession,
+        order_id: int,
+        current_client: Client,
+        with_items: bool = True
+    ) -> Order:
+        """
+        Загружает заказ и проверяет, что клиент может его изменять.
+        
+        Строка заказа блокируется (FOR NO KEY UPDATE) до конца транзакции: смена
+        статуса не может проскочить между проверкой статуса и изменением позиций,
+        а блокировки берутся в общем порядке — сначала заказ, затем товары.
+        Эта же блокировка выстраивает в очередь параллельные добавления в один заказ:
+        позиции читаются уже после неё, поэтому выбор между вставкой позиции и
+        увеличением количества не нарушает uq_orderitem_order_nomenclature
+        (иначе два параллельных добавления нового товара вставили бы две позиции
+        и второе упало бы с IntegrityError).
+        
+        Args:
+            session: Сессия БД
+            order_id: ID заказа
+            current_client: Текущий авторизованный клиент
+            with_items: Загрузить позиции заказа
+            
+        Returns:
+            Заказ (с позициями, если with_items)
+            
+        Raises:
+            HTTPException 404: Заказ не найден
+            HTTPException 403: Заказ принадлежит другому клиенту
+            HTTPException 423: Заказ заблокирован (статус не позволяет изменения)
+        """
+        stmt = select(Order).where(Order.id == order_id).with_for_update(key_share=True)
+        if with_items:
+            stmt = stmt.options(selectinload(Order.items))
+        order = (await session.execute(stmt)).scalar_one_or_none()
+        
+        if not order:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"Order {order_id} not found"
             )
-            session.add(new_item)
-            nomenclature.quantity -= request.quantity
         
-        # 7. Сохраняем изменения (commit выполнит декоратор)
-        await session.flush()
+        # Проверяем принадлежность заказа текущему клиенту
+        if order.client_id != current_client.id:
+            raise HTTPException(
+                status_code=http_status.HTTP_403_FORBIDDEN,
+                detail="You can only modify your own orders"
+            )
+        
+        # Проверяем статус заказа (редактировать можно только created)
+        if order.status != "created":
+            raise HTTPException(
+                status_code=http_status.HTTP_423_LOCKED,
+                detail=f"Cannot modify order with status '{order.status}'. Only 'created' orders can be modified."
+            )
+        
+        return order
+
+    @staticmethod
+    async def _apply_totals_delta(
+        session: AsyncSession,
+        order: Order,
+        amount: Decimal,
+        new_items: int
+    ) -> None:
+        """
+        Увеличивает денормализованные итоги заказа на стороне БД.
         
-        # 8. Формируем ответ с полным заказом
-        await session.refresh(order, ["items"])
+        Инкремент выполняется в SQL, поэтому параллельные изменения одного
+        заказа не теряют друг друга; версия заказа растёт вместе с итогами.
+        Новые значения записываются в объект заказа без пометки его изменённым.
         
-        # Считаем общую сумму заказа
-        total_amount = Decimal(0)
-        items_response = []
+        Args:
+            session: Сессия БД
+            order: Изменяемый заказ
+            amount: Прирост суммы заказа
+            new_items: Число добавленных позиций
+        """
+        stmt = (
+            update(Order)
+            .where(Order.id == order.id)
+            .values(
+                total_amount=Order.total_amount + amount,
+                items_count=Order.items_count + new_items,
+                version=Order.version + 1
+            )
+            .returning(Order.total_amount, Order.items_count, Order.version)
+            .execution_options(synchronize_session=False)
+        )
+        totals = (await session.execute(stmt)).one()
+        set_committed_value(order, "total_amount", totals.total_amount)
+        set_committed_value(order, "items_count", totals.items_count)
+        set_committed_value(order, "version", totals.version)
+
+    @staticmethod
+    def _build_order_data(order: Order, items: list[OrderItem]) -> OrderResponse | dict:
+        """
+        Данные заказа для ответа: DTO или, в быстром режиме, готовый к JSON словарь.
+        
+        Args:
+            order: Заказ
+            items: Позиции, которые нужно включить в ответ
+            
+        Returns:
+            OrderResponse или словарь с теми же полями
+        """
+        if settings.fast_json_responses:
+            return OrderService._build_order_payload(order, items)
+        return OrderService._build_order_response(order, items)
+
+    @staticmethod
+    def _build_order_response(order: Order, items: list[OrderItem]) -> OrderResponse:
+        """
+        Собирает DTO заказа. Итоги берутся из денормализованных полей заказа.
         
-        for item in order.items:
-            total_price = item.price_at_order * item.quantity
-            total_amount += total_price
+        Args:
+            order: Заказ
+            items: Позиции, которые нужно включить в ответ
             
-            items_response.append(OrderItemResponse(
+        Returns:
+            OrderResponse с позициями и итогами
+        """
+        items_response = [
+            OrderItemResponse(
                 id=item.id,
                 nomenclature_id=item.nomenclature_id,
                 quantity=item.quantity,
                 unit_price=item.price_at_order,
-                total_price=total_price
-            ))
+                total_price=item.price_at_order * item.quantity
+            )
+            for item in items
+        ]
         
-        order_data = OrderResponse(
+        return OrderResponse(
             id=order.id,
             client_id=order.client_id,
             status=order.status,
             items=items_response,
-            total_amount=total_amount
+            total_amount=order.total_amount,
+            items_count=order.items_count,
+            version=order.version
         )
+
+    @staticmethod
+    def _build_order_payload(order: Order, items: list[OrderItem]) -> dict:
+        """
+        Собирает ответ с полями OrderResponse сразу в виде словаря для orjson.
         
-        return await OrderService.format_response(
-            response=response,
-            data=order_data,
-            message="Item added to order successfully"
-        )
+        Значения берутся из ORM-объектов, уже прошедших проверки сервиса,
+        поэтому Pydantic-модели не создаются и ответ не валидируется повторно.
+        
+        Args:
+            order: Заказ
+            items: Позиции, которые нужно включить в ответ
+            
+        Returns:
+            Словарь с полями OrderResponse
+        """
+        return {
+            "id": order.id,
+            "client_id": order.client_id,
+            "status": order.status,
+            "items": [
+                {
+                    "id": item.id,
+                    "nomenclature_id": item.nomenclature_id,
+                    "quantity": item.quantity,
+                    "unit_price": item.price_at_order,
+                    "total_price": item.price_at_order * item.quantity
+                }
+                for item in items
+            ],
+            "total_amount": order.total_amount,
+            "items_count": order.items_count,
+            "version": order.version
+        }
 
     @staticmethod
     async def format_response(
         response: Response,
-        data: OrderResponse | None,
-        message: str = ""
-    ) -> BaseResponseModel:
+        data: OrderResponse | BatchAddItemsResponse | dict | None,
+        message: str = "",
+        success: bool = True
+    ) -> BaseResponseModel | ORJSONResponse:
         """
         Форматирует стандартный ответ API.
         
+        В быстром режиме (settings.fast_json_responses) возвращает готовый
+        ORJSONResponse: FastAPI отдаёт его как есть, без валидации по response_model.
+        Заголовки, выставленные в response, переносятся в него.
+        
         Args:
             response: FastAPI Response для установки статус-кода
             data: Полезная нагрузка ответа
             message: Текстовое сообщение
+            success: Флаг успеха операции
             
         Returns:
-            BaseResponseModel с флагом успеха и данными
+            BaseResponseModel с флагом успеха и данными или ORJSONResponse с тем же телом
         """
+        if settings.fast_json_responses:
+            return ORJSONResponse(
+                content={"success": success, "message": message, "data": data},
+                status_code=http_status.HTTP_200_OK,
+                headers=response.headers
+            )
+        
         response.status_code = http_status.HTTP_200_OK
         return BaseResponseModel(
-            success=True,
+            success=success,
             message=message,
             data=data
         )
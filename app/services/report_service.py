@@ -0,0 +1,187 @@
+"""
+Сервис отчётов по продажам на основе предрассчитанных агрегатов
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Response, HTTPException, status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.base import BaseService
+from app.repositories.report_repository import ReportRepository
+from app.dto.base import BaseResponseModel
+from app.dto.report import (
+    CategorySales,
+    CategorySalesReport,
+    SalesRefreshResult,
+    TopProduct,
+    TopProductsReport,
+)
+
+
+class ReportService:
+    """Сервис отчётов по продажам"""
+
+    @BaseService.with_session
+    async def refresh(session: AsyncSession, full: bool = False) -> SalesRefreshResult:
+        """
+        Инкрементально обновляет агрегаты продаж.
+        
+        Пересчитываются целиком дни, в которых есть заказы, созданные или изменённые
+        после прошлого обновления (с перекрытием sales_refresh_overlap_seconds на
+        транзакции, которые были открыты во время прошлого обновления).
+        
+        Args:
+            session: Сессия БД (инжектится декоратором)
+            full: Пересчитать все дни с заказами
+            
+        Returns:
+            Результат обновления
+        """
+        if not await ReportRepository.try_lock_refresh(session):
+            return SalesRefreshResult(refreshed=False, full=full)
+        
+        started_at = await ReportRepository.get_transaction_time(session)
+        watermark = None if full else await ReportRepository.get_watermark(session)
+        full = watermark is None
+        changed_since = None if full else watermark - timedelta(seconds=settings.sales_refresh_overlap_seconds)
+        
+        days = await ReportRepository.get_changed_days(session, changed_since)
+        if days:
+            await ReportRepository.rebuild_days(session, days)
+        await ReportRepository.set_watermark(session, started_at)
+        
+        return SalesRefreshResult(
+            refreshed=True,
+            full=full,
+            days=len(days),
+            refreshed_at=started_at
+        )
+
+    @staticmethod
+    async def refresh_now(response: Response, full: bool = False) -> BaseResponseModel[SalesRefreshResult]:
+        """
+        Обновляет агрегаты продаж по запросу администратора.
+        
+        Args:
+            response: FastAPI Response объект
+            full: Пересчитать все дни с заказами
+            
+        Returns:
+            BaseResponseModel с результатом обновления
+            
+        Raises:
+            HTTPException 409: Обновление уже выполняется
+        """
+        result = await ReportService.refresh(full=full)
+        if not result.refreshed:
+            raise HTTPException(
+                status_code=http_status.HTTP_409_CONFLICT,
+                detail="Sales aggregates refresh is already in progress"
+            )
+        
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Sales aggregates refreshed",
+            data=result
+        )
+
+    @BaseService.with_session(readonly=True)
+    async def get_top_products(
+        response: Response,
+        session: AsyncSession,
+        days: int = 7,
+        limit: int = 5
+    ) -> BaseResponseModel[TopProductsReport]:
+        """
+        Возвращает самые продаваемые товары за последние days дней.
+        
+        Args:
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            days: Длина периода в днях, включая сегодняшний (UTC)
+            limit: Число товаров
+            
+        Returns:
+            BaseResponseModel с рейтингом товаров
+        """
+        date_from = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        rows = await ReportRepository.get_top_products(session, date_from, limit)
+        
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Top products retrieved",
+            data=TopProductsReport(
+                date_from=date_from,
+                refreshed_at=await ReportRepository.get_watermark(session),
+                items=[TopProduct.model_validate(row) for row in rows]
+            )
+        )
+
+    @BaseService.with_session(readonly=True)
+    async def get_category_sales(
+        response: Response,
+        session: AsyncSession,
+        days: int = 7,
+        parent_id: Optional[int] = None
+    ) -> BaseResponseModel[CategorySalesReport]:
+        """
+        Возвращает продажи по дочерним категориям parent_id (по умолчанию — по корневым).
+        
+        Args:
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            days: Длина периода в днях, включая сегодняшний (UTC)
+            parent_id: ID родительской категории
+            
+        Returns:
+            BaseResponseModel с продажами по категориям
+            
+        Raises:
+            HTTPException 404: Родительская категория не найдена
+        """
+        if parent_id is not None and not await ReportRepository.category_exists(session, parent_id):
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"Category {parent_id} not found"
+            )
+        
+        date_from = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        rows = await ReportRepository.get_category_sales(session, date_from, parent_id)
+        
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Category sales retrieved",
+            data=CategorySalesReport(
+                date_from=date_from,
+                parent_id=parent_id,
+                refreshed_at=await ReportRepository.get_watermark(session),
+                items=[CategorySales.model_validate(row) for row in rows]
+            )
+        )
+
+    @staticmethod
+    async def run_refresh_loop(interval: Optional[float] = None) -> None:
+        """
+        Периодически обновляет агрегаты продаж.
+        Запускается фоновой задачей при старте приложения; при нескольких
+        процессах обновление выполняет тот, кто первым взял блокировку.
+        
+        Args:
+            interval: Период между обновлениями, сек (по умолчанию из настроек)
+        """
+        interval = interval or settings.sales_refresh_interval_seconds
+        while True:
+            try:
+                result = await ReportService.refresh()
+                if result.refreshed and result.days:
+                    logger.info(f"Агрегаты продаж обновлены, пересчитано дней: {result.days}")
+            except Exception:
+                logger.exception("Ошибка обновления агрегатов продаж")
+            await asyncio.sleep(interval)
@@ -0,0 +1,99 @@
+"""
+Сервис шардированного остатка популярных товаров
+"""
+import asyncio
+from typing import Optional
+
+from fastapi import Response, HTTPException, status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.base import BaseService
+from app.repositories.nomenclature_repository import NomenclatureRepository
+from app.dto.base import BaseResponseModel
+from app.dto.nomenclature import StockShardsInfo, StockShardsRequest
+
+
+class StockService:
+    """Сервис управления шардами остатка"""
+
+    @BaseService.with_session
+    async def set_stock_shards(
+        nomenclature_id: int,
+        request: StockShardsRequest,
+        response: Response,
+        session: AsyncSession
+    ) -> BaseResponseModel[StockShardsInfo]:
+        """
+        Включает, меняет или выключает шардирование остатка товара.
+        
+        Args:
+            nomenclature_id: ID товара
+            request: Новое число шардов
+            response: FastAPI Response объект
+            session: Сессия БД (инжектится декоратором)
+            
+        Returns:
+            BaseResponseModel с режимом хранения остатка
+            
+        Raises:
+            HTTPException 404: Товар не найден
+        """
+        row = await NomenclatureRepository.set_stock_shards(session, nomenclature_id, request.shards)
+        if row is None:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"Product {nomenclature_id} not found"
+            )
+        
+        logger.info(f"Остаток товара {nomenclature_id}: шардов {row.stock_shards}, остаток {row.quantity}")
+        response.status_code = http_status.HTTP_200_OK
+        return BaseResponseModel(
+            success=True,
+            message="Stock shards updated",
+            data=StockShardsInfo(
+                nomenclature_id=row.id,
+                stock_shards=row.stock_shards,
+                quantity=row.quantity
+            )
+        )
+
+    @BaseService.with_session
+    async def consolidate(nomenclature_id: int, session: AsyncSession) -> Optional[int]:
+        """
+        Выравнивает остаток между шардами одного товара в отдельной транзакции,
+        чтобы шарды были заблокированы как можно меньше.
+        
+        Args:
+            nomenclature_id: ID товара
+            session: Сессия БД (инжектится декоратором)
+            
+        Returns:
+            Точный остаток товара или None, если товар пропущен
+        """
+        return await NomenclatureRepository.consolidate_stock_shards(session, nomenclature_id)
+
+    @BaseService.with_session
+    async def list_sharded(session: AsyncSession) -> list[int]:
+        """ID товаров с шардированным остатком"""
+        return await NomenclatureRepository.list_sharded_ids(session)
+
+    @staticmethod
+    async def run_consolidation_loop(interval: Optional[float] = None) -> None:
+        """
+        Периодически выравнивает остаток между шардами всех товаров с шардами.
+        Запускается фоновой задачей при старте приложения; при нескольких
+        процессах каждый товар консолидирует тот, кто первым взял его блокировку.
+        
+        Args:
+            interval: Период между проходами, сек (по умолчанию из настроек)
+        """
+        interval = interval or settings.stock_shard_consolidate_interval_seconds
+        while True:
+            try:
+                for nomenclature_id in await StockService.list_sharded():
+                    await StockService.consolidate(nomenclature_id=nomenclature_id)
+            except Exception:
+                logger.exception("Ошибка консолидации шардов остатка")
+            await asyncio.sleep(interval)
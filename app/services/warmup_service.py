@@ -0,0 +1,135 @@
+"""
+Прогрев при старте: открытие пула соединений и первое выполнение горячих запросов
+"""
+import asyncio
+from typing import Awaitable, Callable, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.db import engine, replica_engine, has_replica, TimedAsyncQueuePool
+from app.core.logger import logger
+from app.core.startup import StartupTimer
+from app.repositories.category_repository import CategoryRepository
+from app.repositories.clients_repository import ClientsRepository
+from app.repositories.nomenclature_repository import NomenclatureRepository
+from app.repositories.orders_repository import OrdersRepository
+from app.services.order_service import OrderService
+
+# Несуществующие ID и ключ: запросы проходят полный путь (компиляция, план, чтение индекса),
+# но не находят и не меняют ни одной строки
+MISSING_ID = 0
+MISSING_API_KEY = ""
+
+
+async def _load_order(session: AsyncSession) -> None:
+    """Загрузка заказа с блокировкой и позициями, как при изменении заказа"""
+    try:
+        await OrderService._get_editable_order(session, MISSING_ID, current_client=None)
+    except HTTPException:
+        pass  # 404: заказа нет, запрос выполнен
+
+
+# Запросы, с которых начинается большинство обращений к API
+HOT_QUERIES: dict[str, Callable[[AsyncSession], Awaitable]] = {
+    "auth": lambda session: ClientsRepository.get_by_api_key(session, MISSING_API_KEY),
+    "nomenclature_item": lambda session: NomenclatureRepository.get_by_id(session, MISSING_ID),
+    "catalog_page": lambda session: NomenclatureRepository.list_page(session, limit=1),
+    "category_subtree": lambda session: CategoryRepository.get_subtree(session, MISSING_ID),
+    "stock": lambda session: NomenclatureRepository.get_stock(session, MISSING_ID),
+    "reserve_stock": lambda session: NomenclatureRepository.reserve_stock(session, MISSING_ID, 1),
+    "order": _load_order,
+    "order_version": lambda session: OrdersRepository.get_version(session, MISSING_ID),
+    "order_statuses": lambda session: OrdersRepository.get_statuses(session, [MISSING_ID]),
+}
+
+# Запросы на чтение, которые идут на реплику (проверка ключа, каталог, категории)
+REPLICA_HOT_QUERIES = ("auth", "nomenclature_item", "catalog_page", "category_subtree")
+
+
+class WarmupService:
+    """Прогрев соединений и запросов до приёма трафика"""
+
+    @staticmethod
+    async def warm_up(timer: StartupTimer, connections: Optional[int] = None) -> None:
+        """
+        Открывает соединения пула и выполняет на каждом горячие запросы.
+        
+        Без прогрева первые запросы после деплоя ждут открытия соединения
+        (TCP, аутентификация, настройка сессии), компиляции SQL в SQLAlchemy
+        и загрузки каталога таблиц в кэш процесса PostgreSQL — у каждого
+        соединения свой. Запросы выполняются в транзакции, которая
+        откатывается, и с несуществующими ID, поэтому данные не меняются.
+        Реплика, если она настроена, прогревается запросами на чтение.
+        
+        Args:
+            timer: Таймер старта, в который пишутся фазы db_pool и warmup_queries
+                (replica_pool и replica_warmup_queries для реплики)
+            connections: Сколько соединений открыть в каждом пуле (по умолчанию db_pool_size)
+        """
+        connections = connections or settings.db_pool_size
+        await WarmupService._warm_engine(engine, list(HOT_QUERIES), connections, timer, "")
+        if has_replica():
+            await WarmupService._warm_engine(replica_engine, REPLICA_HOT_QUERIES, connections, timer, "replica_")
+
+    @staticmethod
+    async def _warm_engine(
+        target: AsyncEngine,
+        queries: Sequence[str],
+        connections: int,
+        timer: StartupTimer,
+        phase_prefix: str
+    ) -> None:
+        """
+        Прогревает пул одного engine.
+        
+        Args:
+            target: Engine
+            queries: Имена запросов из HOT_QUERIES
+            connections: Сколько соединений открыть
+            timer: Таймер старта
+            phase_prefix: Префикс названий фаз в отчёте о старте
+        """
+        pool_phase = "replica_pool" if phase_prefix else "db_pool"
+        with timer.phase(pool_phase):
+            # Соединения берутся одновременно, поэтому пул открывает новые, а не выдаёт одно и то же
+            opened = await asyncio.gather(
+                *(target.connect().start() for _ in range(connections)),
+                return_exceptions=True
+            )
+        connected = [conn for conn in opened if isinstance(conn, AsyncConnection)]
+        try:
+            errors = [error for error in opened if isinstance(error, BaseException)]
+            if errors:
+                raise errors[0]
+            
+            with timer.phase(f"{phase_prefix}warmup_queries"):
+                await asyncio.gather(*(WarmupService._run_hot_queries(conn, queries) for conn in connected))
+        finally:
+            for conn in connected:
+                await conn.close()
+            # Ожидание соединений при прогреве не должно попадать в статистику пула
+            if isinstance(target.pool, TimedAsyncQueuePool):
+                target.pool.reset_stats()
+        
+        logger.info(
+            f"Прогрев {'реплики' if phase_prefix else 'основной БД'}: соединений {len(connected)}, "
+            f"горячих запросов {len(queries)} на каждом"
+        )
+
+    @staticmethod
+    async def _run_hot_queries(conn: AsyncConnection, queries: Sequence[str]) -> None:
+        """
+        Выполняет горячие запросы на одном соединении и откатывает транзакцию.
+        
+        Args:
+            conn: Соединение из пула
+            queries: Имена запросов из HOT_QUERIES
+        """
+        async with AsyncSession(bind=conn) as session:
+            try:
+                for name in queries:
+                    await HOT_QUERIES[name](session)
+            finally:
+                await session.rollback()
@@ -0,0 +1,254 @@
+"""
+Микробенчмарки слоёв горячего пути запроса POST /api/orders/{order_id}/items.
+
+Каждый слой замеряется изолированно:
+
+- auth_cache_hit / auth_cache_miss — get_current_client с кэшем и без;
+- with_session — накладные расходы декоратора BaseService.with_session;
+- query_load_order — загрузка и проверка заказа (первый запрос add_item_to_order);
+- query_reserve_stock — условное списание остатка (второй запрос add_item_to_order);
+- build_order_response — сборка OrderResponse и BaseResponseModel;
+- serialize_response — сериализация ответа FastAPI (валидация по response_model и JSON).
+
+По умолчанию используется временная SQLite через aiosqlite; для замеров
+на PostgreSQL задайте BENCH_DATABASE_URL (схема создаётся и удаляется,
+поэтому нужна отдельная пустая БД).
+
+SQLite не поддерживает блокировки строк: with_for_update там ничего не добавляет
+в запрос, поэтому query_load_order на SQLite меряет обычный SELECT заказа без
+FOR NO KEY UPDATE, а UPDATE в query_reserve_stock блокирует файл БД целиком,
+а не строку товара. Такие цифры годятся для поиска регрессий в Python-слоях,
+но не для оценки времени запросов на PostgreSQL; это отмечено в meta.row_locks
+результата. Сравнивать стоит только результаты на одной и той же БД (meta.database).
+
+Результаты сохраняются в JSON, чтобы регрессия любого слоя была видна в диффе:
+    python -m benchmarks.layers --save benchmarks/baselines/layers.json
+    python -m benchmarks.layers --compare benchmarks/baselines/layers.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DATABASE_URL = os.environ.get(
+    "BENCH_DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'order_service_bench.db')}"
+)
+# Настройки приложения читаются при импорте, поэтому подменяем БД до импорта app.*
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+import sqlalchemy  # noqa: E402
+from fastapi import Response  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+from app.__main__ import app  # noqa: E402
+from app.core.db import engine, AsyncSessionLocal  # noqa: E402
+from app.core.security import get_current_client, client_cache  # noqa: E402
+from app.models import Base, Client, Nomenclature, Order, OrderItem  # noqa: E402
+from app.repositories.nomenclature_repository import NomenclatureRepository  # noqa: E402
+from app.services.base import BaseService  # noqa: E402
+from app.services.order_service import OrderService  # noqa: E402
+
+API_KEY = "bench_layers_key"
+ORDER_ITEMS = 50
+
+
+async def seed() -> dict:
+    """Создаёт схему и данные: клиент, заказ на ORDER_ITEMS позиций, товары"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    
+    async with AsyncSessionLocal() as session:
+        client = Client(name="Bench", api_key=API_KEY)
+        products = [
+            Nomenclature(sku=f"BENCH{i:04d}", name=f"Bench product {i}", price=100 + i, quantity=10_000_000)
+            for i in range(ORDER_ITEMS + 1)
+        ]
+        session.add(client)
+        session.add_all(products)
+        await session.flush()
+        
+        order = Order(client_id=client.id, status="created", total_amount=0, items_count=ORDER_ITEMS)
+        session.add(order)
+        await session.flush()
+        for product in products[:ORDER_ITEMS]:
+            session.add(OrderItem(order_id=order.id, nomenclature_id=product.id, quantity=1, price_at_order=product.price))
+            order.total_amount += product.price
+        await session.commit()
+        return {"client": client, "order_id": order.id, "hot_product_id": products[-1].id}
+
+
+async def measure(fn, number: int, repeat: int) -> dict:
+    """
+    Замеряет асинхронную функцию: repeat серий по number вызовов.
+    
+    Returns:
+        Статистика времени одного вызова в микросекундах
+    """
+    for _ in range(max(1, number // 10)):
+        await fn()
+    
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        samples.append((time.perf_counter() - started) / number * 1_000_000)
+    
+    return {
+        "median_us": round(statistics.median(samples), 2),
+        "min_us": round(min(samples), 2),
+        "mean_us": round(statistics.fmean(samples), 2),
+        "stdev_us": round(statistics.stdev(samples), 2) if len(samples) > 1 else 0.0,
+        "ops_per_sec": round(1_000_000 / statistics.median(samples), 1),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def find_route(path: str, method: str) -> APIRoute:
+    """Находит маршрут приложения по шаблону пути и методу"""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and method in route.methods:
+            return route
+    raise LookupError(f"Route {method} {path} not found")
+
+
+async def run(number: int, repeat: int) -> dict:
+    """Готовит данные, замеряет все слои и возвращает результаты с метаданными"""
+    ids = await seed()
+    client = ids["client"]
+    order_id = ids["order_id"]
+    hot_product_id = ids["hot_product_id"]
+    
+    # Готовые данные для слоёв, не связанных с БД
+    async with AsyncSessionLocal() as session:
+        order = await OrderService._get_editable_order(session, order_id, client)
+        items = list(order.items)
+    
+    payload = await OrderService.format_response(
+        response=Response(),
+        data=OrderService._build_order_response(order, items),
+        message="Item added to order successfully"
+    )
+    route = find_route("/api/orders/{order_id}/items", "POST")
+    response_class = getattr(route.response_class, "value", route.response_class)
+
+    async def auth_cache_hit():
+        await get_current_client(API_KEY)
+
+    async def auth_cache_miss():
+        client_cache.clear()
+        await get_current_client(API_KEY)
+
+    @BaseService.with_session
+    async def noop(session):
+        return None
+
+    async def query_load_order():
+        async with AsyncSessionLocal() as session:
+            await OrderService._get_editable_order(session, order_id, client)
+
+    async def query_reserve_stock():
+        async with AsyncSessionLocal() as session:
+            await NomenclatureRepository.reserve_stock(session, hot_product_id, 1)
+            await session.rollback()
+
+    async def build_order_response():
+        await OrderService.format_response(
+            response=Response(),
+            data=OrderService._build_order_response(order, items),
+            message="Item added to order successfully"
+        )
+
+    async def serialize():
+        content = await serialize_response(field=route.response_field, response_content=payload)
+        response_class(content)
+    
+    cases = {
+        "auth_cache_hit": (auth_cache_hit, number * 10),
+        "auth_cache_miss": (auth_cache_miss, number),
+        "with_session": (noop, number),
+        "query_load_order": (query_load_order, number),
+        "query_reserve_stock": (query_reserve_stock, number),
+        "build_order_response": (build_order_response, number),
+        "serialize_response": (serialize, number),
+    }
+    
+    results = {}
+    try:
+        for name, (fn, case_number) in cases.items():
+            results[name] = await measure(fn, case_number, repeat)
+            print(f"{name:<22} median {results[name]['median_us']:>10.2f} us   {results[name]['ops_per_sec']:>12.1f} ops/s")
+    finally:
+        await engine.dispose()
+    
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "database": engine.url.get_backend_name(),
+            # На SQLite with_for_update не порождает блокировку строки
+            "row_locks": engine.url.get_backend_name() != "sqlite",
+            "order_items": ORDER_ITEMS,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline_path: str, threshold: float) -> bool:
+    """
+    Сравнивает медианы с сохранённым baseline.
+    
+    Returns:
+        True, если ни один слой не замедлился больше чем на threshold
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    
+    base_db = baseline["meta"].get("database")
+    if base_db != current["meta"]["database"]:
+        print(f"WARNING: baseline снят на {base_db}, текущий замер — на {current['meta']['database']}")
+    
+    ok = True
+    print(f"\n{'layer':<22} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<22} {'—':>12} {result['median_us']:>12.2f}")
+            continue
+        change = (result["median_us"] - base["median_us"]) / base["median_us"]
+        regressed = change > threshold
+        ok = ok and not regressed
+        print(
+            f"{name:<22} {base['median_us']:>12.2f} {result['median_us']:>12.2f} "
+            f"{change:>+8.1%}{'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Микробенчмарки слоёв горячего пути")
+    parser.add_argument("--number", type=int, default=200, help="Вызовов в одной серии")
+    parser.add_argument("--repeat", type=int, default=7, help="Число серий")
+    parser.add_argument("--save", metavar="PATH", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Сравнить с сохранённым JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Допустимое замедление медианы (0.25 = 25%%)")
+    args = parser.parse_args()
+    
+    current = asyncio.run(run(args.number, args.repeat))
+    
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    
+    if args.compare and not compare(current, args.compare, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,137 @@
+"""
+Бенчмарк сериализации ответа на добавление товара в заказ.
+
+Сравнивает два пути от ORM-объектов заказа до байтов HTTP-ответа:
+
+- current — DTO OrderItemResponse/OrderResponse в BaseResponseModel, повторная
+  валидация FastAPI по response_model и кодирование стандартным json;
+- fast — быстрый режим (FAST_JSON_RESPONSES): словарь из ORM-объектов
+  без Pydantic-моделей, кодирование orjson, ответ отдаётся как есть.
+
+БД не нужна: заказ и позиции создаются в памяти. Тела ответов обоих путей
+сверяются перед замером.
+
+Запуск:
+    python -m benchmarks.serialization --lines 10 100 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+# Настройки приложения читаются при импорте; БД в этом бенчмарке не используется
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'order_service_bench.db')}"
+)
+
+from fastapi import Response  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+from app.__main__ import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models import Order, OrderItem  # noqa: E402
+from app.services.order_service import OrderService  # noqa: E402
+
+
+def make_order(lines: int) -> Order:
+    """Создаёт заказ с заданным числом позиций без обращения к БД"""
+    order = Order(id=1, client_id=1, status="created", total_amount=Decimal(0), items_count=lines, version=1)
+    for i in range(lines):
+        item = OrderItem(
+            id=i + 1,
+            order_id=1,
+            nomenclature_id=i + 1,
+            quantity=i % 5 + 1,
+            price_at_order=Decimal("1999.99") + i
+        )
+        order.items.append(item)
+        order.total_amount += item.price_at_order * item.quantity
+    return order
+
+
+def find_response_field():
+    """Поле response_model маршрута добавления товара"""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == "/api/orders/{order_id}/items":
+            return route.response_field
+    raise LookupError("Route POST /api/orders/{order_id}/items not found")
+
+
+async def current_path(order: Order, field) -> bytes:
+    """DTO → валидация по response_model → json"""
+    settings.fast_json_responses = False
+    payload = await OrderService.format_response(
+        response=Response(),
+        data=OrderService._build_order_data(order, order.items),
+        message="Item added to order successfully"
+    )
+    content = await serialize_response(field=field, response_content=payload)
+    return JSONResponse(content).body
+
+
+async def fast_path(order: Order, field) -> bytes:
+    """Словарь из ORM-объектов → orjson"""
+    settings.fast_json_responses = True
+    response = await OrderService.format_response(
+        response=Response(),
+        data=OrderService._build_order_data(order, order.items),
+        message="Item added to order successfully"
+    )
+    return response.body
+
+
+async def measure(fn, order: Order, field, number: int, repeat: int) -> float:
+    """Медиана времени одного вызова, мкс"""
+    for _ in range(max(1, number // 10)):
+        await fn(order, field)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn(order, field)
+        samples.append((time.perf_counter() - started) / number * 1_000_000)
+    return statistics.median(samples)
+
+
+async def run(lines_list: list[int], number: int, repeat: int) -> dict:
+    """Сверяет тела ответов и замеряет оба пути для каждого размера заказа"""
+    field = find_response_field()
+    results = {}
+    print(f"{'lines':>6} {'current, us':>13} {'fast, us':>10} {'speedup':>8} {'bytes':>8}")
+    try:
+        for lines in lines_list:
+            order = make_order(lines)
+            
+            current_body = await current_path(order, field)
+            fast_body = await fast_path(order, field)
+            if json.loads(current_body) != json.loads(fast_body):
+                raise AssertionError(f"Response bodies differ for {lines} lines")
+            
+            current = await measure(current_path, order, field, number, repeat)
+            fast = await measure(fast_path, order, field, number, repeat)
+            results[lines] = {
+                "current_us": round(current, 2),
+                "fast_us": round(fast, 2),
+                "speedup": round(current / fast, 2),
+                "bytes": len(fast_body),
+            }
+            print(f"{lines:>6} {current:>13.2f} {fast:>10.2f} {current / fast:>7.2f}x {len(fast_body):>8}")
+    finally:
+        settings.fast_json_responses = False
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сериализация ответа: текущий путь против быстрого")
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 10, 100, 500], help="Число позиций в заказе")
+    parser.add_argument("--number", type=int, default=200, help="Вызовов в одной серии")
+    parser.add_argument("--repeat", type=int, default=5, help="Число серий")
+    args = parser.parse_args()
+    
+    asyncio.run(run(args.lines, args.number, args.repeat))
@@ -0,0 +1,188 @@
+"""
+Бенчмарк конкуренции за один популярный товар (hot SKU).
+
+Сравнивает способы списания остатка при добавлении товара в заказ:
+
+- select_for_update — прежний путь: SELECT ... FOR UPDATE, проверка остатка
+  в Python, вставка позиции и UPDATE при flush; блокировка строки держится
+  все эти round trip'ы;
+- guarded_update — путь товара без шардов: UPDATE ... WHERE quantity >= :q
+  RETURNING, затем вставка позиции;
+- sharded — путь товара с шардированным остатком
+  (NomenclatureRepository.reserve_sharded_stock): списание из случайного
+  свободного шарда, строка nomenclature не блокируется.
+
+В первых двух стратегиях все покупатели бьют в одну строку номенклатуры, поэтому
+пропускная способность определяется тем, сколько времени строка остаётся
+заблокированной; в sharded — в одну из --shards строк. Работа вне блокировки
+у стратегий одинаковая (вставка позиции заказа), так что разница — только в том,
+как долго и какая строка заблокирована. У каждого покупателя свой заказ,
+повторная покупка увеличивает количество в позиции.
+
+Запуск (нужен PostgreSQL, адрес берётся из DATABASE_URL):
+    python -m benchmarks.stock_contention --concurrency 8 32 64 --shards 16 --duration 10
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import engine
+from app.repositories.nomenclature_repository import NomenclatureRepository
+
+SETUP_SQL = [
+    "INSERT INTO client (name, api_key) VALUES (:name, :api_key) RETURNING id",
+    "INSERT INTO \"order\" (client_id, status) VALUES (:client_id, 'created') RETURNING id",
+    "INSERT INTO nomenclature (sku, name, price, quantity) VALUES (:sku, :name, 10.00, :quantity) RETURNING id",
+]
+
+# Позиция заказа уникальна по (order_id, nomenclature_id): повторная покупка увеличивает количество
+INSERT_ITEM_SQL = (
+    "INSERT INTO orderitem (order_id, nomenclature_id, quantity, price_at_order) "
+    "VALUES (:order_id, :nomenclature_id, 1, :price) "
+    "ON CONFLICT (order_id, nomenclature_id) DO UPDATE SET quantity = orderitem.quantity + 1"
+)
+
+
+async def setup(stock: int, buyers: int, shards: int) -> dict:
+    """Создаёт клиента, по заказу на покупателя и товар с большим остатком для бенчмарка"""
+    marker = uuid.uuid4().hex[:12]
+    async with engine.begin() as conn:
+        client_id = (await conn.execute(
+            text(SETUP_SQL[0]), {"name": f"bench-{marker}", "api_key": f"bench_{marker}"}
+        )).scalar_one()
+        order_ids = [
+            (await conn.execute(text(SETUP_SQL[1]), {"client_id": client_id})).scalar_one()
+            for _ in range(buyers)
+        ]
+        nomenclature_id = (await conn.execute(
+            text(SETUP_SQL[2]), {"sku": f"BENCH-{marker}", "name": f"bench {marker}", "quantity": stock}
+        )).scalar_one()
+    
+    # Отдельный товар с тем же остатком, разложенным по шардам
+    async with engine.begin() as conn:
+        sharded_id = (await conn.execute(
+            text(SETUP_SQL[2]), {"sku": f"BENCH-S-{marker}", "name": f"bench sharded {marker}", "quantity": stock}
+        )).scalar_one()
+        await NomenclatureRepository.set_stock_shards(AsyncSession(bind=conn), sharded_id, shards)
+    return {
+        "client_id": client_id,
+        "order_ids": order_ids,
+        "nomenclature_id": nomenclature_id,
+        "sharded_id": sharded_id,
+        "shards": shards,
+    }
+
+
+async def teardown(ids: dict) -> None:
+    """Удаляет данные бенчмарка"""
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM orderitem WHERE order_id IN (SELECT id FROM \"order\" WHERE client_id = :client_id)"),
+            ids
+        )
+        await conn.execute(text("DELETE FROM \"order\" WHERE client_id = :client_id"), ids)
+        await conn.execute(
+            text("DELETE FROM nomenclature WHERE id IN (:nomenclature_id, :sharded_id)"), ids
+        )
+        await conn.execute(text("DELETE FROM client WHERE id = :client_id"), ids)
+
+
+async def select_for_update(conn, ids: dict, order_id: int) -> bool:
+    """Прежний путь: блокировка строки на несколько round trip'ов"""
+    params = {"order_id": order_id, "nomenclature_id": ids["nomenclature_id"]}
+    row = (await conn.execute(
+        text("SELECT price, quantity FROM nomenclature WHERE id = :nomenclature_id FOR UPDATE"), params
+    )).one()
+    if row.quantity < 1:
+        return False
+    await conn.execute(text(INSERT_ITEM_SQL), {**params, "price": row.price})
+    await conn.execute(
+        text("UPDATE nomenclature SET quantity = :quantity WHERE id = :nomenclature_id"),
+        {**params, "quantity": row.quantity - 1}
+    )
+    return True
+
+
+async def guarded_update(conn, ids: dict, order_id: int) -> bool:
+    """Путь товара без шардов: проверка и списание одним запросом"""
+    params = {"order_id": order_id, "nomenclature_id": ids["nomenclature_id"]}
+    row = (await conn.execute(
+        text("UPDATE nomenclature SET quantity = quantity - 1 "
+             "WHERE id = :nomenclature_id AND quantity >= 1 RETURNING price, quantity"),
+        params
+    )).one_or_none()
+    if row is None:
+        return False
+    await conn.execute(text(INSERT_ITEM_SQL), {**params, "price": row.price})
+    return True
+
+
+async def sharded(conn, ids: dict, order_id: int) -> bool:
+    """Путь товара с шардированным остатком: код репозитория в транзакции соединения"""
+    session = AsyncSession(bind=conn)
+    row = await NomenclatureRepository.reserve_sharded_stock(session, ids["sharded_id"], 1, ids["shards"])
+    if row is None:
+        return False
+    await conn.execute(
+        text(INSERT_ITEM_SQL),
+        {"order_id": order_id, "nomenclature_id": ids["sharded_id"], "price": row.price}
+    )
+    return True
+
+
+async def run_strategy(strategy, ids: dict, concurrency: int, duration: float) -> dict:
+    """Запускает concurrency покупателей на duration секунд и считает транзакции"""
+    deadline = time.perf_counter() + duration
+    latencies: list[float] = []
+
+    async def buyer(order_id: int):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            async with engine.begin() as conn:
+                await strategy(conn, ids, order_id)
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(buyer(order_id) for order_id in ids["order_ids"][:concurrency]))
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        "strategy": strategy.__name__,
+        "concurrency": concurrency,
+        "transactions": len(latencies),
+        "tps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+    }
+
+
+async def main(concurrency: list[int], duration: float, shards: int) -> None:
+    ids = await setup(stock=10_000_000, buyers=max(concurrency), shards=shards)
+    try:
+        for level in concurrency:
+            for strategy in (select_for_update, guarded_update, sharded):
+                result = await run_strategy(strategy, ids, level, duration)
+                print(
+                    f"{result['strategy']:<18} x{result['concurrency']:<4} {result['transactions']:>8} tx  "
+                    f"{result['tps']:>8} tx/s  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms"
+                )
+    finally:
+        await teardown(ids)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк конкуренции за один товар")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[32],
+        help="Число параллельных покупателей; несколько значений — прогон для каждого"
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность каждого прогона, сек")
+    parser.add_argument("--shards", type=int, default=16, help="Число шардов остатка для стратегии sharded")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.duration, args.shards))
@@ -0,0 +1,178 @@
+"""
+Нагрузочный тест: пропускная способность HTTP в зависимости от числа процессов.
+
+Для каждого значения --workers запускает сервис через python -m app.cli.serve,
+ждёт, пока все процессы прогреются, и --duration секунд нагружает его
+запросами на чтение: товар по ID, страница каталога, поддерево категории.
+Нагрузку дают --clients отдельных процессов (по --concurrency / --clients
+соединений в каждом), чтобы генератор сам не упирался в одно ядро. После
+прогона сервис останавливается по SIGTERM и должен завершиться штатно (exit 0).
+
+Прирост с числом процессов ограничен числом ядер машины: генератор нагрузки,
+процессы сервиса и PostgreSQL делят одни и те же CPU.
+
+Запуск (нужен PostgreSQL с миграциями и тестовыми данными, адрес из DATABASE_URL):
+    python -m benchmarks.workers_scaling --workers 1 2 4 --concurrency 64 --duration 15
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+from sqlalchemy import select
+
+from app.core.db import engine
+from app.models.client import Client
+from app.models.nomenclature import Category, Nomenclature
+
+READY_MARKER = "Старт за"  # Строка отчёта о старте, которую пишет каждый процесс сервиса
+
+
+async def load_targets() -> dict:
+    """ID товаров и категорий и API ключ для запросов"""
+    async with engine.connect() as conn:
+        nomenclature_ids = list(await conn.scalars(select(Nomenclature.id).order_by(Nomenclature.id).limit(1000)))
+        category_ids = list(await conn.scalars(select(Category.id).order_by(Category.id).limit(100)))
+        api_key = await conn.scalar(select(Client.api_key).order_by(Client.id).limit(1))
+    await engine.dispose()
+    if not nomenclature_ids or not category_ids:
+        raise SystemExit("Нет товаров или категорий: загрузите тестовые данные")
+    return {"nomenclature_ids": nomenclature_ids, "category_ids": category_ids, "api_key": api_key or ""}
+
+
+def random_path(targets: dict) -> str:
+    """Случайный запрос из смеси: товар по ID, страница каталога, поддерево категории"""
+    kind = random.random()
+    if kind < 0.5:
+        return f"/api/nomenclature/{random.choice(targets['nomenclature_ids'])}"
+    if kind < 0.8:
+        return f"/api/nomenclature?limit=20&sort=price&min_price={random.randint(0, 100)}"
+    return f"/api/categories/{random.choice(targets['category_ids'])}/subtree"
+
+
+async def client_loop(base_url: str, targets: dict, connections: int, duration: float) -> dict:
+    """Держит connections параллельных запросов duration секунд"""
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    headers = {"X-API-Key": targets["api_key"]}
+    
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, headers=headers, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(random_path(targets))
+                    if response.status_code >= 500:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+        
+        await asyncio.gather(*(worker() for _ in range(connections)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def run_client(base_url: str, targets: dict, connections: int, duration: float) -> dict:
+    """Точка входа процесса-генератора нагрузки"""
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # Без строки лога на каждый запрос
+    return asyncio.run(client_loop(base_url, targets, connections, duration))
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    """Запускает сервис и ждёт отчёта о старте от каждого процесса"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.cli.serve", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        env={**os.environ, "LOG_LEVEL": "WARNING"},
+    )
+    started = 0
+    for line in process.stdout:
+        if READY_MARKER in line:
+            started += 1
+            if started == workers:
+                break
+    else:
+        raise SystemExit(f"Сервис не запустился (код {process.wait()})")
+    return process
+
+
+def stop_server(process: subprocess.Popen) -> int:
+    """Останавливает сервис по SIGTERM и возвращает код выхода"""
+    process.send_signal(signal.SIGTERM)
+    # Вывод дочитываем, чтобы процесс не заблокировался на заполненном канале
+    process.stdout.read()
+    code = process.wait(timeout=60)
+    # Один процесс uvicorn после штатной остановки повторяет полученный сигнал по умолчанию
+    return 0 if code == -signal.SIGTERM else code
+
+
+def run_level(workers: int, port: int, targets: dict, concurrency: int, clients: int, duration: float) -> dict:
+    """Один прогон: сервис с workers процессами под нагрузкой"""
+    process = start_server(workers, port)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        per_client = [concurrency // clients + (1 if index < concurrency % clients else 0) for index in range(clients)]
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(
+                run_client,
+                [base_url] * clients, [targets] * clients, per_client, [duration] * clients
+            ))
+        elapsed = time.perf_counter() - started
+    finally:
+        exit_code = stop_server(process)
+    
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+        "errors": sum(result["errors"] for result in results),
+        "exit_code": exit_code,
+    }
+
+
+def main(workers: list[int], port: int, concurrency: int, clients: int, duration: float) -> None:
+    targets = asyncio.run(load_targets())
+    baseline = None
+    for level in workers:
+        result = run_level(level, port, targets, concurrency, clients, duration)
+        baseline = baseline or result["rps"]
+        print(
+            f"workers {result['workers']:<3} {result['requests']:>8} req  {result['rps']:>8} req/s  "
+            f"x{result['rps'] / baseline:.2f}  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  "
+            f"errors {result['errors']}  exit {result['exit_code']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пропускная способность HTTP в зависимости от числа процессов")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4],
+        help="Число процессов сервиса; несколько значений — прогон для каждого"
+    )
+    parser.add_argument("--port", type=int, default=8090, help="Порт сервиса на время теста")
+    parser.add_argument("--concurrency", type=int, default=64, help="Параллельных запросов всего")
+    parser.add_argument(
+        "--clients", type=int, default=max(2, (os.cpu_count() or 2) // 2),
+        help="Процессов-генераторов нагрузки"
+    )
+    parser.add_argument("--duration", type=float, default=15.0, help="Длительность каждого прогона, сек")
+    args = parser.parse_args()
+    main(args.workers, args.port, args.concurrency, args.clients, args.duration)
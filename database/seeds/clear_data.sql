@@ -9,10 +9,14 @@ BEGIN;
 
 -- Удаляем данные в правильном порядке (учитывая FK)
 TRUNCATE 
+    product_sales_daily,
+    category_sales_daily,
+    sales_refresh_state,
     orderitem,
     "order", 
     nomenclature_categories,
     nomenclature,
+    category_closure,
     categories,
     client
 RESTART IDENTITY CASCADE;
@@ -153,6 +153,17 @@ INSERT INTO orderitem (id, order_id, nomenclature_id, quantity, price_at_order)
 -- Обновляем последовательность для orderitem  
 SELECT setval('orderitem_id_seq', (SELECT MAX(id) FROM orderitem));
 
+-- Пересчитываем денормализованные итоги заказов
+UPDATE "order" AS o
+SET total_amount = totals.total_amount,
+    items_count = totals.items_count
+FROM (
+    SELECT order_id, SUM(price_at_order * quantity) AS total_amount, COUNT(*) AS items_count
+    FROM orderitem
+    GROUP BY order_id
+) AS totals
+WHERE o.id = totals.order_id;
+
 -- Фиксируем транзакцию
 COMMIT;
 
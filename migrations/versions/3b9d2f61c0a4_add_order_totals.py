@@ -0,0 +1,41 @@
+"""add denormalized total_amount and items_count to order
+
+Revision ID: 3b9d2f61c0a4
+Revises: 7466ab0e5e73
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2f61c0a4'
+down_revision = '7466ab0e5e73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('order', sa.Column('total_amount', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False, comment='Общая сумма заказа'))
+    op.add_column('order', sa.Column('items_count', sa.Integer(), server_default='0', nullable=False, comment='Число позиций в заказе'))
+
+    # Заполняем итоги для уже существующих заказов
+    op.execute("""
+        UPDATE "order" AS o
+        SET total_amount = totals.total_amount,
+            items_count = totals.items_count
+        FROM (
+            SELECT order_id,
+                   SUM(price_at_order * quantity) AS total_amount,
+                   COUNT(*) AS items_count
+            FROM orderitem
+            GROUP BY order_id
+        ) AS totals
+        WHERE o.id = totals.order_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('order', 'items_count')
+    op.drop_column('order', 'total_amount')
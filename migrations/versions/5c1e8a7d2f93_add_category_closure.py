@@ -0,0 +1,113 @@
+"""add category closure table maintained by triggers
+
+Revision ID: 5c1e8a7d2f93
+Revises: 3b9d2f61c0a4
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e8a7d2f93'
+down_revision = '3b9d2f61c0a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False, comment='ID категории-предка'),
+    sa.Column('descendant_id', sa.Integer(), nullable=False, comment='ID категории-потомка'),
+    sa.Column('depth', sa.Integer(), nullable=False, comment='Расстояние от предка до потомка'),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_category_closure_descendant', 'category_closure', ['descendant_id', 'ancestor_id'], unique=False)
+    op.create_index('ix_nomenclature_categories_category', 'nomenclature_categories', ['category_id', 'nomenclature_id'], unique=False)
+    
+    # Заполняем closure table для существующего дерева
+    op.execute("""
+        WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM categories
+            UNION ALL
+            SELECT tree.ancestor_id, c.id, tree.depth + 1
+            FROM tree
+            JOIN categories AS c ON c.parent_id = tree.descendant_id
+        )
+        INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM tree
+    """)
+    
+    # Новая категория: связь с собой и со всеми предками родителя
+    op.execute("""
+        CREATE FUNCTION category_closure_insert() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+            SELECT NEW.id, NEW.id, 0
+            UNION ALL
+            SELECT ancestor_id, NEW.id, depth + 1
+            FROM category_closure
+            WHERE descendant_id = NEW.parent_id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_category_closure_insert
+        AFTER INSERT ON categories
+        FOR EACH ROW EXECUTE FUNCTION category_closure_insert()
+    """)
+    
+    # Перенос категории: поддерево отвязывается от старых предков и привязывается к новым.
+    # Перенос категории внутрь собственного поддерева запрещён.
+    op.execute("""
+        CREATE FUNCTION category_closure_move() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.parent_id IS NOT NULL AND EXISTS (
+                SELECT 1 FROM category_closure
+                WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+            ) THEN
+                RAISE EXCEPTION 'Category % cannot be moved into its own subtree (parent %)', NEW.id, NEW.parent_id
+                    USING ERRCODE = 'check_violation';
+            END IF;
+            
+            DELETE FROM category_closure
+            WHERE descendant_id IN (
+                    SELECT descendant_id FROM category_closure WHERE ancestor_id = NEW.id
+                )
+              AND ancestor_id IN (
+                    SELECT ancestor_id FROM category_closure
+                    WHERE descendant_id = NEW.id AND ancestor_id <> NEW.id
+                );
+                
+            INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+            SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+            FROM category_closure AS above
+            CROSS JOIN category_closure AS below
+            WHERE above.descendant_id = NEW.parent_id
+              AND below.ancestor_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_category_closure_move
+        AFTER UPDATE OF parent_id ON categories
+        FOR EACH ROW
+        WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+        EXECUTE FUNCTION category_closure_move()
+    """)
+    # Удаление категории чистит closure table через ON DELETE CASCADE
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_category_closure_move ON categories")
+    op.execute("DROP TRIGGER IF EXISTS trg_category_closure_insert ON categories")
+    op.execute("DROP FUNCTION IF EXISTS category_closure_move()")
+    op.execute("DROP FUNCTION IF EXISTS category_closure_insert()")
+    op.drop_index('ix_nomenclature_categories_category', table_name='nomenclature_categories')
+    op.drop_index('ix_category_closure_descendant', table_name='category_closure')
+    op.drop_table('category_closure')
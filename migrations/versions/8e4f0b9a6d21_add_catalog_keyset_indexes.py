@@ -0,0 +1,28 @@
+"""add composite indexes for keyset-paginated catalog
+
+Revision ID: 8e4f0b9a6d21
+Revises: 5c1e8a7d2f93
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f0b9a6d21'
+down_revision = '5c1e8a7d2f93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_nomenclature_price_id', 'nomenclature', ['price', 'id'], unique=False)
+    op.create_index('ix_nomenclature_in_stock_id', 'nomenclature', ['id'], unique=False, postgresql_where=sa.text('quantity > 0'))
+    op.create_index('ix_nomenclature_in_stock_price_id', 'nomenclature', ['price', 'id'], unique=False, postgresql_where=sa.text('quantity > 0'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_nomenclature_in_stock_price_id', table_name='nomenclature', postgresql_where=sa.text('quantity > 0'))
+    op.drop_index('ix_nomenclature_in_stock_id', table_name='nomenclature', postgresql_where=sa.text('quantity > 0'))
+    op.drop_index('ix_nomenclature_price_id', table_name='nomenclature')
@@ -0,0 +1,30 @@
+"""add order version and status check
+
+Revision ID: a5c7e2d9f184
+Revises: f3b8d1e6a402
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c7e2d9f184'
+down_revision = 'f3b8d1e6a402'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('order', sa.Column('version', sa.Integer(), server_default='1', nullable=False, comment='Версия строки, растёт при каждом изменении заказа и его позиций'))
+    op.create_check_constraint(
+        'chk_order_status_valid',
+        'order',
+        "status IN ('created', 'paid', 'shipped', 'completed', 'cancelled')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('chk_order_status_valid', 'order', type_='check')
+    op.drop_column('order', 'version')
@@ -0,0 +1,24 @@
+"""add row version to nomenclature
+
+Revision ID: a7d3c5e1f048
+Revises: 8e4f0b9a6d21
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3c5e1f048'
+down_revision = '8e4f0b9a6d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('nomenclature', sa.Column('version', sa.Integer(), server_default='1', nullable=False, comment='Версия строки, растёт при каждом изменении'))
+
+
+def downgrade() -> None:
+    op.drop_column('nomenclature', 'version')
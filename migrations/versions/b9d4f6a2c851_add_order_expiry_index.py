@@ -0,0 +1,30 @@
+"""add index for expiry of abandoned orders
+
+Revision ID: b9d4f6a2c851
+Revises: a5c7e2d9f184
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4f6a2c851'
+down_revision = 'a5c7e2d9f184'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_order_created_last_change',
+        'order',
+        [sa.text('coalesce(updated_at, created_at)')],
+        unique=False,
+        postgresql_where=sa.text("status = 'created'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_created_last_change', table_name='order', postgresql_where=sa.text("status = 'created'"))
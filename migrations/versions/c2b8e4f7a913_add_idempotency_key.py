@@ -0,0 +1,39 @@
+"""add idempotency_key table
+
+Revision ID: c2b8e4f7a913
+Revises: a7d3c5e1f048
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2b8e4f7a913'
+down_revision = 'a7d3c5e1f048'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('idempotency_key',
+    sa.Column('client_id', sa.Integer(), nullable=False, comment='ID клиента'),
+    sa.Column('key', sa.String(length=255), nullable=False, comment='Значение заголовка Idempotency-Key'),
+    sa.Column('request_hash', sa.LargeBinary(length=32), nullable=False, comment='SHA-256 отпечаток запроса'),
+    sa.Column('status_code', sa.Integer(), nullable=True, comment='HTTP статус сохранённого ответа'),
+    sa.Column('response_body', sa.LargeBinary(), nullable=True, comment='Тело сохранённого ответа (JSON)'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='Время первого запроса'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['client.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('client_id', 'key', name='uq_idempotency_key_client_key')
+    )
+    op.create_index(op.f('ix_idempotency_key_id'), 'idempotency_key', ['id'], unique=False)
+    op.create_index('ix_idempotency_key_created_at', 'idempotency_key', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_key_created_at', table_name='idempotency_key')
+    op.drop_index(op.f('ix_idempotency_key_id'), table_name='idempotency_key')
+    op.drop_table('idempotency_key')
@@ -0,0 +1,24 @@
+"""add client tier for rate limits
+
+Revision ID: c6e2a8f4d193
+Revises: b9d4f6a2c851
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e2a8f4d193'
+down_revision = 'b9d4f6a2c851'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('client', sa.Column('tier', sa.String(length=32), server_default='standard', nullable=False, comment='Тариф клиента: множитель лимитов запросов (RATE_LIMIT_TIERS)'))
+
+
+def downgrade() -> None:
+    op.drop_column('client', 'tier')
@@ -0,0 +1,60 @@
+"""add order timestamps and daily sales aggregates
+
+Revision ID: d4a9f2c6b715
+Revises: c2b8e4f7a913
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a9f2c6b715'
+down_revision = 'c2b8e4f7a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Время создания существующих заказов неизвестно: они остаются с NULL и не попадают
+    # в агрегаты продаж (now() отнёс бы всю историю на день миграции). Значение
+    # по умолчанию задаётся после добавления столбца и действует только для новых заказов
+    op.add_column('order', sa.Column('created_at', sa.DateTime(timezone=True), nullable=True))
+    op.alter_column('order', 'created_at', server_default=sa.text('now()'))
+    op.add_column('order', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_order_created_at', 'order', ['created_at'], unique=False)
+    op.create_index('ix_order_updated_at', 'order', ['updated_at'], unique=False)
+    
+    op.create_table('product_sales_daily',
+    sa.Column('day', sa.Date(), nullable=False, comment='День создания заказа (UTC)'),
+    sa.Column('nomenclature_id', sa.Integer(), nullable=False, comment='ID товара'),
+    sa.Column('units', sa.Integer(), nullable=False, comment='Продано единиц'),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False, comment='Выручка'),
+    sa.Column('orders_count', sa.Integer(), nullable=False, comment='Число заказов с товаром'),
+    sa.ForeignKeyConstraint(['nomenclature_id'], ['nomenclature.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'nomenclature_id')
+    )
+    op.create_table('category_sales_daily',
+    sa.Column('day', sa.Date(), nullable=False, comment='День создания заказа (UTC)'),
+    sa.Column('category_id', sa.Integer(), nullable=False, comment='ID категории'),
+    sa.Column('units', sa.Integer(), nullable=False, comment='Продано единиц'),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False, comment='Выручка'),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'category_id')
+    )
+    op.create_table('sales_refresh_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False, comment='Изменения заказов до этого момента учтены'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sales_refresh_state')
+    op.drop_table('category_sales_daily')
+    op.drop_table('product_sales_daily')
+    op.drop_index('ix_order_updated_at', table_name='order')
+    op.drop_index('ix_order_created_at', table_name='order')
+    op.drop_column('order', 'updated_at')
+    op.drop_column('order', 'created_at')
@@ -0,0 +1,88 @@
+"""add indexes for foreign keys and unique order line per product
+
+Revision ID: e7c1a9d3b520
+Revises: d4a9f2c6b715
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c1a9d3b520'
+down_revision = 'd4a9f2c6b715'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Повторяющиеся позиции одного товара по разным ценам не сливаются автоматически:
+    # любая общая цена изменила бы сумму исторического заказа
+    conflicts = op.get_bind().execute(sa.text("""
+        SELECT order_id, nomenclature_id, array_agg(DISTINCT price_at_order ORDER BY price_at_order) AS prices
+        FROM orderitem
+        GROUP BY order_id, nomenclature_id
+        HAVING COUNT(DISTINCT price_at_order) > 1
+        ORDER BY order_id, nomenclature_id
+    """)).all()
+    if conflicts:
+        listed = "\n".join(
+            f"  order {row.order_id}, nomenclature {row.nomenclature_id}: prices {', '.join(map(str, row.prices))}"
+            for row in conflicts
+        )
+        raise RuntimeError(
+            "orderitem has duplicate lines of one product with different prices; "
+            "merge them manually before adding uq_orderitem_order_nomenclature:\n" + listed
+        )
+    
+    # Сливаем повторяющиеся позиции (цена у них одна, сумма заказа не меняется)
+    # в позицию с меньшим id и пересчитываем число позиций затронутых заказов,
+    # иначе уникальный индекс не создать
+    op.execute("""
+        CREATE TEMPORARY TABLE orderitem_duplicates ON COMMIT DROP AS
+        SELECT order_id, nomenclature_id, MIN(id) AS keep_id, SUM(quantity) AS quantity
+        FROM orderitem
+        GROUP BY order_id, nomenclature_id
+        HAVING COUNT(*) > 1
+    """)
+    op.execute("""
+        UPDATE orderitem AS oi
+        SET quantity = d.quantity
+        FROM orderitem_duplicates AS d
+        WHERE oi.id = d.keep_id
+    """)
+    op.execute("""
+        DELETE FROM orderitem AS oi
+        USING orderitem_duplicates AS d
+        WHERE oi.order_id = d.order_id
+          AND oi.nomenclature_id = d.nomenclature_id
+          AND oi.id <> d.keep_id
+    """)
+    op.execute("""
+        UPDATE "order" AS o
+        SET items_count = totals.items_count
+        FROM (
+            SELECT order_id, COUNT(*) AS items_count
+            FROM orderitem
+            WHERE order_id IN (SELECT order_id FROM orderitem_duplicates)
+            GROUP BY order_id
+        ) AS totals
+        WHERE o.id = totals.order_id
+    """)
+    
+    op.create_unique_constraint('uq_orderitem_order_nomenclature', 'orderitem', ['order_id', 'nomenclature_id'])
+    op.create_index('ix_orderitem_nomenclature_id', 'orderitem', ['nomenclature_id'], unique=False)
+    op.create_index('ix_order_client_id_id', 'order', ['client_id', 'id'], unique=False)
+    op.create_index('ix_categories_parent_id', 'categories', ['parent_id'], unique=False)
+    op.create_index('ix_product_sales_daily_nomenclature_id', 'product_sales_daily', ['nomenclature_id'], unique=False)
+    op.create_index('ix_category_sales_daily_category_id', 'category_sales_daily', ['category_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_category_sales_daily_category_id', table_name='category_sales_daily')
+    op.drop_index('ix_product_sales_daily_nomenclature_id', table_name='product_sales_daily')
+    op.drop_index('ix_categories_parent_id', table_name='categories')
+    op.drop_index('ix_order_client_id_id', table_name='order')
+    op.drop_index('ix_orderitem_nomenclature_id', table_name='orderitem')
+    op.drop_constraint('uq_orderitem_order_nomenclature', 'orderitem', type_='unique')
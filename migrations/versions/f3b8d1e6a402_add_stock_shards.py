@@ -0,0 +1,47 @@
+"""add sharded stock counters for hot products
+
+Revision ID: f3b8d1e6a402
+Revises: e7c1a9d3b520
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1e6a402'
+down_revision = 'e7c1a9d3b520'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('nomenclature', sa.Column('stock_shards', sa.Integer(), server_default='0', nullable=False, comment='Число шардов остатка (0 — остаток в quantity)'))
+    op.create_index('ix_nomenclature_sharded_id', 'nomenclature', ['id'], unique=False, postgresql_where=sa.text('stock_shards > 0'))
+    
+    op.create_table('nomenclature_stock_shard',
+    sa.Column('nomenclature_id', sa.Integer(), nullable=False, comment='ID товара'),
+    sa.Column('shard_no', sa.SmallInteger(), nullable=False, comment='Номер шарда, от 0 до stock_shards - 1'),
+    sa.Column('quantity', sa.Integer(), nullable=False, comment='Часть остатка в шарде'),
+    sa.CheckConstraint('quantity >= 0', name='chk_stock_shard_quantity_non_negative'),
+    sa.ForeignKeyConstraint(['nomenclature_id'], ['nomenclature.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('nomenclature_id', 'shard_no')
+    )
+
+
+def downgrade() -> None:
+    # Возвращаем остаток шардированных товаров в nomenclature.quantity
+    op.execute("""
+        UPDATE nomenclature AS n
+        SET quantity = s.total, version = n.version + 1
+        FROM (
+            SELECT nomenclature_id, SUM(quantity) AS total
+            FROM nomenclature_stock_shard
+            GROUP BY nomenclature_id
+        ) AS s
+        WHERE n.id = s.nomenclature_id AND n.stock_shards > 0
+    """)
+    op.drop_table('nomenclature_stock_shard')
+    op.drop_index('ix_nomenclature_sharded_id', table_name='nomenclature', postgresql_where=sa.text('stock_shards > 0'))
+    op.drop_column('nomenclature', 'stock_shards')
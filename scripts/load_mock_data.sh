@@ -24,7 +24,7 @@ fi
 
 # Проверяем что миграции применены
 echo "🔍 Проверяем состояние миграций..."
-if ! docker exec -it server_it_guru alembic current 2>/dev/null | grep -q "dbe5a65fd262"; then
+if ! docker exec -it server_it_guru alembic current 2>/dev/null | grep -q "(head)"; then
     echo "❌ Миграции не применены!"
     echo "   Сначала выполните: docker exec -it server_it_guru alembic upgrade head"
     exit 1
@@ -0,0 +1,13 @@
+"""
+Общая настройка тестов.
+
+Настройки приложения (app.core.config) читаются при импорте модулей app.*
+и требуют DATABASE_URL, даже если тест к БД не обращается. Если адрес не задан,
+подставляется NO_DATABASE_URL: юнит-тесты работают без БД, а тесты, которым
+нужен PostgreSQL, по этому значению понимают, что БД нет, и пропускаются.
+"""
+import os
+
+NO_DATABASE_URL = "postgresql+psycopg_async://no-database.invalid/none"
+
+os.environ.setdefault("DATABASE_URL", NO_DATABASE_URL)
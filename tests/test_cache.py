@@ -0,0 +1,204 @@
+"""
+Юнит-тесты in-process кэшей (app.core.cache).
+
+Время подменяется ручными часами, поэтому истечение срока жизни
+проверяется без ожидания.
+
+Запуск:
+    python -m pytest tests/test_cache.py -v
+"""
+import pytest
+
+from app.core.cache import TTLCache, VersionedCache
+
+
+class FakeClock:
+    """Часы, которые идут только при вызове advance"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def test_get_returns_value_and_counts_hits(clock: FakeClock):
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", "default") == "default"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_entry_expires_after_ttl(clock: FakeClock):
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.advance(4.9)
+    assert cache.get("a") == 1
+    clock.advance(0.1)
+    assert cache.get("a") is None
+    assert len(cache) == 0, "просроченная запись удаляется при чтении"
+    assert cache.misses == 1
+
+
+def test_per_entry_ttl_overrides_default(clock: FakeClock):
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("short", 1, ttl=1)
+    cache.set("forever", 2, ttl=None)
+
+    clock.advance(2)
+    assert cache.get("short") is None
+    clock.advance(10_000)
+    assert cache.get("forever") == 2
+
+
+def test_lru_evicts_least_recently_used(clock: FakeClock):
+    cache = TTLCache(maxsize=2, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_set_existing_key_replaces_value_and_ttl(clock: FakeClock):
+    cache = TTLCache(maxsize=2, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.advance(4)
+    cache.set("a", 2)
+    clock.advance(4)
+
+    assert cache.get("a") == 2
+    assert len(cache) == 1
+
+
+def test_zero_maxsize_disables_cache(clock: FakeClock):
+    cache = TTLCache(maxsize=0, clock=clock)
+    cache.set("a", 1)
+
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_peek_does_not_touch_stats_or_lru_order(clock: FakeClock):
+    cache = TTLCache(maxsize=2, ttl=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.peek("a") == 1
+    assert cache.peek("missing") is None
+    assert (cache.hits, cache.misses) == (0, 0)
+    cache.set("c", 3)
+    assert "a" not in cache, "peek не должен продлевать жизнь записи в LRU"
+
+    clock.advance(5)
+    assert cache.peek("b") is None
+
+
+def test_pop_and_clear(clock: FakeClock):
+    cache = TTLCache(maxsize=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_invalidate_where_removes_matching_entries(clock: FakeClock):
+    cache = TTLCache(maxsize=10, clock=clock)
+    for key in range(6):
+        cache.set(key, key * 10)
+
+    removed = cache.invalidate_where(lambda key, value: key % 2 == 0 or value == 50)
+
+    assert removed == 4
+    assert sorted(key for key in range(6) if key in cache) == [1, 3]
+
+
+def test_stats(clock: FakeClock):
+    cache = TTLCache(maxsize=3, clock=clock)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert stats["size"] == 1
+    assert stats["maxsize"] == 3
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_max_bytes_evicts_oldest_entries(clock: FakeClock):
+    cache = TTLCache(maxsize=100, clock=clock, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.set("c", "xxxx")
+
+    assert "a" not in cache
+    assert cache.stats()["bytes"] == 8
+    assert cache.evictions == 1
+
+
+def test_max_bytes_accounts_for_replaced_and_removed_entries(clock: FakeClock):
+    cache = TTLCache(maxsize=100, clock=clock, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxxxx")
+    cache.set("a", "xx")
+    cache.set("b", "xxxxxxxx")
+    assert cache.stats()["bytes"] == 10
+    assert cache.evictions == 0
+
+    cache.pop("b")
+    cache.invalidate_where(lambda key, value: True)
+    assert cache.stats()["bytes"] == 0
+
+
+def test_entry_larger_than_max_bytes_is_not_kept(clock: FakeClock):
+    cache = TTLCache(maxsize=100, clock=clock, max_bytes=10, sizeof=len)
+    cache.set("small", "x")
+    cache.set("huge", "x" * 11)
+
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def _versioned(clock: FakeClock) -> VersionedCache:
+    return VersionedCache(TTLCache(maxsize=10, ttl=5, clock=clock), version=lambda value: value[0])
+
+
+def test_versioned_put_keeps_newer_version(clock: FakeClock):
+    cache = _versioned(clock)
+
+    assert cache.put("item", (2, "new"))
+    assert not cache.put("item", (1, "stale")), "снимок, прочитанный до коммита, не должен затирать новый"
+    assert not cache.put("item", (2, "same version"))
+    assert cache.get("item") == (2, "new")
+    assert cache.put("item", (3, "newer"))
+    assert cache.get("item") == (3, "newer")
+
+
+def test_versioned_put_after_expiry_or_discard(clock: FakeClock):
+    cache = _versioned(clock)
+    cache.put("item", (5, "cached"))
+
+    clock.advance(5)
+    assert cache.put("item", (4, "from db")), "просроченная запись не мешает записать снимок из БД"
+
+    cache.discard("item")
+    assert cache.put("item", (1, "after delete"))
+    cache.clear()
+    assert cache.get("item") is None
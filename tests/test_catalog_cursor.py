@@ -0,0 +1,85 @@
+"""
+Юнит-тесты курсора постраничной выдачи каталога (NomenclatureService).
+
+Запуск:
+    python -m pytest tests/test_catalog_cursor.py -v
+"""
+import base64
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.nomenclature_service import NomenclatureService
+
+encode_cursor = NomenclatureService._encode_cursor
+decode_cursor = NomenclatureService._decode_cursor
+
+ROW = SimpleNamespace(id=42, price=Decimal("99999.99"))
+
+
+def _raw_cursor(payload) -> str:
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def test_round_trip_by_id():
+    assert decode_cursor(encode_cursor(ROW, "id"), "id") == (42,)
+
+
+@pytest.mark.parametrize("sort", ["price", "-price"])
+def test_round_trip_by_price_keeps_exact_decimal(sort: str):
+    price, key_id = decode_cursor(encode_cursor(ROW, sort), sort)
+
+    assert (price, key_id) == (Decimal("99999.99"), 42)
+    assert isinstance(price, Decimal), "цена в курсоре не должна проходить через float"
+
+
+def test_cursor_is_url_safe_without_padding():
+    for row_id in range(1, 50):
+        cursor = encode_cursor(SimpleNamespace(id=row_id, price=Decimal("0.5")), "-price")
+        assert "=" not in cursor
+        assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize("cursor_sort, request_sort", [
+    ("id", "price"),
+    ("price", "-price"),
+    ("-price", "id"),
+])
+def test_cursor_for_other_sort_is_rejected(cursor_sort: str, request_sort: str):
+    cursor = encode_cursor(ROW, cursor_sort)
+
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, request_sort)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor, sort", [
+    ("", "id"),
+    ("not base64!", "id"),
+    (base64.urlsafe_b64encode(b"\xff\xfe").decode(), "id"),
+    (_raw_cursor([1, 2]), "id"),
+    (_raw_cursor({"s": "id"}), "id"),
+    (_raw_cursor({"s": "id", "i": "abc"}), "id"),
+    (_raw_cursor({"s": "id", "i": None}), "id"),
+    (_raw_cursor({"s": "price", "i": 1}), "price"),
+    (_raw_cursor({"s": "price", "i": 1, "p": "cheap"}), "price"),
+], ids=[
+    "empty",
+    "not-base64",
+    "not-utf8",
+    "not-object",
+    "no-id",
+    "id-not-int",
+    "id-null",
+    "no-price",
+    "price-not-decimal",
+])
+def test_damaged_cursor_is_rejected(cursor: str, sort: str):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, sort)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid cursor"
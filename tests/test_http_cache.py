@@ -0,0 +1,81 @@
+"""
+Юнит-тесты условных GET-запросов (app.core.http_cache).
+
+Запуск:
+    python -m pytest tests/test_http_cache.py -v
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.http_cache import etag_matches, make_etag, make_rows_etag
+
+ETAG = make_etag("order", 1, 3)
+
+
+def _rows(*pairs) -> list:
+    return [SimpleNamespace(id=row_id, version=version) for row_id, version in pairs]
+
+
+def test_make_etag_is_weak():
+    assert ETAG == 'W/"order-1-3"'
+
+
+@pytest.mark.parametrize("if_none_match", [
+    'W/"order-1-3"',
+    '"order-1-3"',
+    ' W/"order-1-3" ',
+    'W/"order-1-2", W/"order-1-3"',
+    '"other",W/"order-1-3"',
+    "*",
+    " * ",
+])
+def test_matches(if_none_match: str):
+    assert etag_matches(if_none_match, ETAG)
+
+
+@pytest.mark.parametrize("if_none_match", [
+    None,
+    "",
+    'W/"order-1-2"',
+    'W/"order-1-30"',
+    'W/"order-1"',
+    "order-1-3",
+    'W/"order-1-2", "order-2-3"',
+])
+def test_does_not_match(if_none_match):
+    assert not etag_matches(if_none_match, ETAG)
+
+
+def test_strong_etag_matches_weakly():
+    assert etag_matches('W/"x"', '"x"')
+
+
+def test_rows_etag_is_stable():
+    rows = _rows((1, 1), (2, 5))
+
+    assert make_rows_etag("catalog", rows) == make_rows_etag("catalog", _rows((1, 1), (2, 5)))
+    assert make_rows_etag("catalog", rows).startswith('W/"catalog-')
+
+
+@pytest.mark.parametrize("changed", [
+    _rows((1, 2), (2, 5)),
+    _rows((1, 1)),
+    _rows((1, 1), (2, 5), (3, 1)),
+    _rows((2, 5), (1, 1)),
+    _rows((1, 1), (3, 5)),
+    _rows((11, 1), (2, 5)),
+    _rows((1, 12), (5, 5)),
+], ids=["version", "row-dropped", "row-added", "order", "other-row", "id-digits", "boundary-shift"])
+def test_rows_etag_changes(changed: list):
+    assert make_rows_etag("catalog", changed) != make_rows_etag("catalog", _rows((1, 1), (2, 5)))
+
+
+def test_rows_etag_depends_on_prefix():
+    rows = _rows((1, 1))
+
+    assert make_rows_etag("catalog", rows) != make_rows_etag("subtree", rows)
+
+
+def test_empty_rows_etag():
+    assert make_rows_etag("catalog", []) == make_rows_etag("catalog", iter(()))
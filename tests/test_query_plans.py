@@ -0,0 +1,432 @@
+"""
+Регрессия планов запросов горячих путей.
+
+Каждый сценарий вызывает настоящий код сервисов и репозиториев в транзакции,
+которая затем откатывается, и перехватывает все отправленные в БД SQL-запросы.
+Для каждого запроса выполняется EXPLAIN с теми же параметрами при
+enable_seqscan = off: если планировщик всё равно выбирает Seq Scan или проходит
+индекс целиком, отфильтровывая строки, значит подходящего индекса нет, и
+тест падает. Чтобы результат не зависел от объёма данных и ANALYZE, на время
+EXPLAIN таблицы в pg_class выглядят большими, а статистика колонок убрана
+(транзакция откатывается) — на маленькой тестовой БД планы такие же, как на большой.
+
+Дополнительно проверяется, что у каждого внешнего ключа есть индекс,
+начинающийся с его колонок (иначе удаление родительской строки и выборки
+по ключу сканируют таблицу целиком).
+
+Нужен PostgreSQL с применёнными миграциями и тестовыми данными
+(database/seeds/mock_data.sql) и роль суперпользователя (для подмены статистики);
+адрес берётся из DATABASE_URL. Без него, без доступа к БД или без тестовых данных
+тесты пропускаются. Данные не меняются.
+
+Запуск:
+    python -m pytest tests/test_query_plans.py -v
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterator, NamedTuple, Optional
+
+import pytest
+
+from tests.conftest import NO_DATABASE_URL
+
+if os.environ.get("DATABASE_URL", NO_DATABASE_URL) == NO_DATABASE_URL:
+    pytest.skip("DATABASE_URL не задан: нужен PostgreSQL с миграциями и тестовыми данными", allow_module_level=True)
+
+from fastapi import Response
+from sqlalchemy import event, exc as sa_exc, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import engine, AsyncSessionLocal
+from app.core.security import get_current_client, client_cache, invalid_key_cache
+from app.dto.order import AddItemRequest, AddItemsBatchRequest, BulkOrderStatusRequest, OrderStatusChangeRequest
+from app.models import Order
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.repositories.nomenclature_repository import NomenclatureRepository, nomenclature_cache
+from app.repositories.order_export_repository import OrderExportRepository
+from app.services.category_service import CategoryService
+from app.services.nomenclature_service import NomenclatureService
+from app.services.order_service import OrderService
+from app.services.report_service import ReportService
+
+# Запросы, для которых EXPLAIN не применим (SET, SAVEPOINT и т.п.), пропускаются
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+# На тестовых данных в несколько строк после ANALYZE стоимости планов почти равны,
+# и планировщик проходит любой индекс целиком вместо поиска по подходящему.
+# В транзакции EXPLAIN (она откатывается) таблицы выглядят большими, а статистика
+# колонок убрана, поэтому планы такие же, как на большой БД без перекосов в данных
+LARGE_TABLES_SQL = (
+    """
+    UPDATE pg_class
+    SET reltuples = 1e6 * greatest(relpages, 1), relpages = greatest(relpages, 1)
+    WHERE relnamespace = 'public'::regnamespace AND relkind IN ('r', 'i')
+    """,
+    """
+    DELETE FROM pg_statistic
+    WHERE starelid IN (SELECT oid FROM pg_class WHERE relnamespace = 'public'::regnamespace)
+    """,
+)
+
+FIXTURES_SQL = """
+    SELECT o.id AS order_id,
+           c.api_key,
+           (SELECT oi.nomenclature_id
+            FROM orderitem oi JOIN nomenclature n ON n.id = oi.nomenclature_id
+            WHERE oi.order_id = o.id AND n.quantity > 0
+            ORDER BY oi.id LIMIT 1) AS existing_product_id,
+           (SELECT n.id FROM nomenclature n
+            WHERE n.quantity > 0
+              AND NOT EXISTS (SELECT 1 FROM orderitem oi WHERE oi.order_id = o.id AND oi.nomenclature_id = n.id)
+            ORDER BY n.id LIMIT 1) AS new_product_id,
+           (SELECT id FROM categories WHERE parent_id IS NULL ORDER BY id LIMIT 1) AS category_id
+    FROM "order" o
+    JOIN client c ON c.id = o.client_id
+    WHERE o.status = 'created'
+    ORDER BY o.id
+    LIMIT 1
+"""
+
+# Внешние ключи, для которых нет индекса с колонками ключа в начале
+UNINDEXED_FK_SQL = """
+    SELECT c.conrelid::regclass::text AS table_name,
+           c.conname AS constraint_name,
+           array_agg(a.attname::text ORDER BY k.n) AS columns
+    FROM pg_constraint c
+    CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, n)
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+    WHERE c.contype = 'f'
+      AND c.connamespace = 'public'::regnamespace
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_index i
+          WHERE i.indrelid = c.conrelid
+            AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] @> c.conkey
+            AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] <@ c.conkey
+      )
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+"""
+
+
+class Fixtures(NamedTuple):
+    """Данные тестовой БД, на которых выполняются сценарии"""
+    order_id: int
+    api_key: str
+    existing_product_id: int
+    new_product_id: int
+    category_id: int
+
+
+class Scenario(NamedTuple):
+    """Горячий путь: функция, выполняющая его запросы в переданной сессии"""
+    name: str
+    run: Callable[[AsyncSession, Fixtures], Awaitable[None]]
+    # Подготовка в той же транзакции, её запросы не проверяются
+    setup: Optional[Callable[[AsyncSession, Fixtures], Awaitable[None]]] = None
+
+
+class StatementCapture:
+    """Собирает SQL-запросы engine, пока включён"""
+
+    def __init__(self):
+        self.statements: list[tuple[str, object]] = []
+        self.active = False
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active and not executemany and statement.lstrip().split(None, 1)[0].upper() in EXPLAINABLE:
+            self.statements.append((statement, parameters))
+
+    def start(self) -> None:
+        self.statements = []
+        self.active = True
+
+    def stop(self) -> list[tuple[str, object]]:
+        self.active = False
+        return self.statements
+
+
+async def auth(session: AsyncSession, fx: Fixtures) -> None:
+    """Аутентификация по X-API-Key (промах кэша)"""
+    await get_current_client(fx.api_key)
+
+
+async def add_item_full(session: AsyncSession, fx: Fixtures) -> None:
+    """Добавление товара, который уже есть в заказе: загрузка заказа с позициями"""
+    client = await get_current_client(fx.api_key)
+    await OrderService.add_item_to_order(
+        order_id=fx.order_id,
+        request=AddItemRequest(nomenclature_id=fx.existing_product_id, quantity=1),
+        current_client=client,
+        response=Response(),
+        view="full",
+        session=session
+    )
+
+
+async def add_item_line(session: AsyncSession, fx: Fixtures) -> None:
+    """Добавление товара без загрузки позиций: поиск позиции товара в заказе"""
+    client = await get_current_client(fx.api_key)
+    for product_id in (fx.existing_product_id, fx.new_product_id):
+        await OrderService.add_item_to_order(
+            order_id=fx.order_id,
+            request=AddItemRequest(nomenclature_id=product_id, quantity=1),
+            current_client=client,
+            response=Response(),
+            view="line",
+            session=session
+        )
+
+
+async def add_items_batch(session: AsyncSession, fx: Fixtures) -> None:
+    """Пакетное добавление товаров с блокировкой номенклатуры"""
+    client = await get_current_client(fx.api_key)
+    await OrderService.add_items_to_order(
+        order_id=fx.order_id,
+        request=AddItemsBatchRequest(items=[
+            AddItemRequest(nomenclature_id=fx.existing_product_id, quantity=1),
+            AddItemRequest(nomenclature_id=fx.new_product_id, quantity=1),
+        ]),
+        current_client=client,
+        response=Response(),
+        session=session
+    )
+
+
+async def client_orders(session: AsyncSession, fx: Fixtures) -> None:
+    """Последние заказы клиента"""
+    client = await get_current_client(fx.api_key)
+    stmt = select(Order).where(Order.client_id == client.id).order_by(Order.id.desc()).limit(20)
+    await session.execute(stmt)
+
+
+async def catalog(session: AsyncSession, fx: Fixtures) -> None:
+    """Каталог: все сортировки, фильтр наличия, следующая страница и фильтр категории"""
+    for sort in ("id", "price", "-price"):
+        for in_stock in (False, True):
+            page = await NomenclatureService.list_catalog(
+                response=Response(), sort=sort, in_stock=in_stock, limit=2, session=session
+            )
+            if page.data.next_cursor:
+                await NomenclatureService.list_catalog(
+                    response=Response(), sort=sort, in_stock=in_stock, limit=2,
+                    cursor=page.data.next_cursor, session=session
+                )
+    await NomenclatureService.list_catalog(response=Response(), category_id=fx.category_id, session=session)
+
+
+async def nomenclature_item(session: AsyncSession, fx: Fixtures) -> None:
+    """Товар по ID (промах кэша номенклатуры)"""
+    await NomenclatureService.get_item(nomenclature_id=fx.new_product_id, response=Response(), session=session)
+
+
+async def categories(session: AsyncSession, fx: Fixtures) -> None:
+    """Поддерево категории и число товаров по категориям"""
+    await CategoryService.get_subtree(category_id=fx.category_id, response=Response(), session=session)
+    await CategoryService.get_product_counts(category_id=fx.category_id, response=Response(), session=session)
+
+
+async def idempotency(session: AsyncSession, fx: Fixtures) -> None:
+    """Занятие и чтение ключа идемпотентности, удаление просроченных ключей"""
+    client = await get_current_client(fx.api_key)
+    await IdempotencyRepository.claim(session, client.id, "query-plans", b"\0" * 32)
+    await IdempotencyRepository.get(session, client.id, "query-plans")
+    await IdempotencyRepository.delete_expired(session, datetime.now(timezone.utc), 1000)
+
+
+async def full_sales_refresh(session: AsyncSession, fx: Fixtures) -> None:
+    """Полная перестройка агрегатов продаж (подготовка)"""
+    await ReportService.refresh(full=True, session=session)
+
+
+async def sales_refresh(session: AsyncSession, fx: Fixtures) -> None:
+    """Инкрементальное обновление агрегатов продаж"""
+    await ReportService.refresh(session=session)
+
+
+async def reports(session: AsyncSession, fx: Fixtures) -> None:
+    """Отчёты: топ товаров и продажи по категориям"""
+    await ReportService.get_top_products(response=Response(), days=30, session=session)
+    await ReportService.get_category_sales(response=Response(), days=30, session=session)
+    await ReportService.get_category_sales(response=Response(), days=30, parent_id=fx.category_id, session=session)
+
+
+async def orders_export(session: AsyncSession, fx: Fixtures) -> None:
+    """Выгрузка заказов клиента за период (серверный курсор)"""
+    client = await get_current_client(fx.api_key)
+    today = datetime.now(timezone.utc).date()
+    result = await OrderExportRepository.stream_order_lines(
+        session, batch_size=100, date_from=today - timedelta(days=30), date_to=today, client_id=client.id
+    )
+    async for _ in result.partitions():
+        pass
+
+
+async def order_status(session: AsyncSession, fx: Fixtures) -> None:
+    """Смена статуса заказа с проверкой версии и массовая отмена с возвратом товаров"""
+    version = (await session.execute(select(Order.version).where(Order.id == fx.order_id))).scalar_one()
+    await OrderService.change_order_status(
+        order_id=fx.order_id,
+        request=OrderStatusChangeRequest(status="paid", version=version),
+        response=Response(),
+        session=session
+    )
+    await OrderService.change_orders_status_bulk(
+        request=BulkOrderStatusRequest(order_ids=[fx.order_id, fx.order_id + 1], status="cancelled"),
+        response=Response(),
+        session=session
+    )
+
+
+async def order_expiry(session: AsyncSession, fx: Fixtures) -> None:
+    """Поиск и отмена брошенных заказов (SKIP LOCKED)"""
+    await OrderService.cancel_abandoned_orders(session=session, limit=100)
+
+
+async def enable_stock_shards(session: AsyncSession, fx: Fixtures) -> None:
+    """Шардирование остатка товара (подготовка)"""
+    await NomenclatureRepository.set_stock_shards(session, fx.existing_product_id, 4)
+
+
+async def sharded_stock(session: AsyncSession, fx: Fixtures) -> None:
+    """Списание из шардов остатка, точный остаток и консолидация шардов"""
+    await NomenclatureRepository.reserve_sharded_stock(session, fx.existing_product_id, 1, 4)
+    await NomenclatureRepository.get_stock(session, fx.existing_product_id)
+    await NomenclatureRepository.list_sharded_ids(session)
+    await NomenclatureRepository.consolidate_stock_shards(session, fx.existing_product_id)
+
+
+SCENARIOS = [
+    Scenario("auth", auth),
+    Scenario("add_item_full", add_item_full),
+    Scenario("add_item_line", add_item_line),
+    Scenario("add_items_batch", add_items_batch),
+    Scenario("client_orders", client_orders),
+    Scenario("catalog", catalog),
+    Scenario("nomenclature_item", nomenclature_item),
+    Scenario("categories", categories),
+    Scenario("idempotency", idempotency),
+    Scenario("sales_refresh", sales_refresh, setup=full_sales_refresh),
+    Scenario("reports", reports, setup=full_sales_refresh),
+    Scenario("orders_export", orders_export),
+    Scenario("sharded_stock", sharded_stock, setup=enable_stock_shards),
+    Scenario("order_status", order_status),
+    Scenario("order_expiry", order_expiry),
+]
+
+
+def scan_nodes(plan: dict) -> Iterator[dict]:
+    """Узлы плана, читающие таблицы"""
+    if "Relation Name" in plan:
+        yield plan
+    for child in plan.get("Plans", ()):
+        yield from scan_nodes(child)
+
+
+def is_full_scan(node: dict) -> bool:
+    """
+    Узел читает всю таблицу. При enable_seqscan = off вместо Seq Scan планировщик
+    может пройти весь индекс без условия и отфильтровать строки — это тот же скан.
+    Полный проход индекса без фильтра (порядок для LIMIT, вход merge join) допустим.
+    """
+    if node["Node Type"] == "Seq Scan":
+        return True
+    return node["Node Type"] in ("Index Scan", "Index Only Scan") and "Index Cond" not in node and "Filter" in node
+
+
+capture = StatementCapture()
+
+
+async def _load_fixtures() -> Optional[Fixtures]:
+    """Находит в БД заказ для изменения, товары и категорию"""
+    try:
+        async with engine.connect() as conn:
+            if await conn.scalar(text("SELECT current_setting('is_superuser')")) != "on":
+                pytest.skip("Для подмены статистики в EXPLAIN нужна роль суперпользователя")
+            row = (await conn.execute(text(FIXTURES_SQL))).one_or_none()
+    finally:
+        await engine.dispose()
+    if row is None or None in row:
+        return None
+    return Fixtures(**row._mapping)
+
+
+async def _explain(statements: list[tuple[str, object]]) -> list[tuple[str, list[dict]]]:
+    """EXPLAIN каждого запроса с его параметрами; возвращает узлы чтения таблиц"""
+    plans = []
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        for statement in LARGE_TABLES_SQL:
+            await conn.exec_driver_sql(statement)
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar_one()[0]["Plan"]
+            plans.append((statement, list(scan_nodes(plan))))
+        await conn.rollback()
+    return plans
+
+
+async def _run_scenario(scenario: Scenario, fixtures: Fixtures) -> list[tuple[str, list[dict]]]:
+    """Выполняет сценарий в откатываемой транзакции и возвращает планы его запросов"""
+    # Кэши скрыли бы запросы к БД
+    client_cache.clear()
+    invalid_key_cache.clear()
+    nomenclature_cache.clear()
+    try:
+        async with AsyncSessionLocal() as session:
+            try:
+                if scenario.setup:
+                    await scenario.setup(session, fixtures)
+                capture.start()
+                try:
+                    await scenario.run(session, fixtures)
+                finally:
+                    statements = capture.stop()
+            finally:
+                await session.rollback()
+        return await _explain(statements)
+    finally:
+        # Каждый тест идёт в своём event loop: соединения прошлого loop не переиспользуются
+        await engine.dispose()
+
+
+async def _unindexed_foreign_keys() -> list:
+    try:
+        async with engine.connect() as conn:
+            return (await conn.execute(text(UNINDEXED_FK_SQL))).all()
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def fixtures() -> Fixtures:
+    try:
+        found = asyncio.run(_load_fixtures())
+    except (sa_exc.OperationalError, sa_exc.ProgrammingError, OSError) as exc:
+        pytest.skip(f"PostgreSQL с миграциями недоступен: {exc}")
+    if found is None:
+        pytest.skip(
+            "В БД нет подходящих данных: нужен заказ в статусе created с позицией в наличии, "
+            "товар не из этого заказа и корневая категория (database/seeds/mock_data.sql)"
+        )
+    return found
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda scenario: scenario.name)
+def test_no_full_scans(scenario: Scenario, fixtures: Fixtures):
+    plans = asyncio.run(_run_scenario(scenario, fixtures))
+    failures = [
+        f"full scan {', '.join(tables)}: {' '.join(statement.split())[:300]}"
+        for statement, nodes in plans
+        if (tables := sorted({node["Relation Name"] for node in nodes if is_full_scan(node)}))
+    ]
+    assert plans, "сценарий не отправил ни одного запроса"
+    assert not failures, "\n".join(failures)
+
+
+def test_foreign_keys_indexed(fixtures: Fixtures):
+    unindexed = asyncio.run(_unindexed_foreign_keys())
+    assert not unindexed, "\n".join(
+        f"{row.table_name}.{row.constraint_name} ({', '.join(row.columns)})" for row in unindexed
+    )
@@ -0,0 +1,128 @@
+"""
+Юнит-тесты ограничителей запросов (app.core.rate_limit).
+
+Время подменяется ручными часами, поэтому пополнение корзин
+проверяется без ожидания.
+
+Запуск:
+    python -m pytest tests/test_rate_limit.py -v
+"""
+import pytest
+
+from app.core.rate_limit import ConcurrencyLimiter, TokenBucketLimiter
+
+
+class FakeClock:
+    """Часы, которые идут только при вызове advance"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def test_burst_then_reject_with_retry_after(clock: FakeClock):
+    limiter = TokenBucketLimiter(rate=2, burst=3, max_keys=100, clock=clock)
+
+    assert [limiter.acquire("key") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("key") == pytest.approx(0.5)
+    assert (limiter.allowed, limiter.rejected) == (3, 1)
+
+
+def test_bucket_refills_at_rate(clock: FakeClock):
+    limiter = TokenBucketLimiter(rate=2, burst=3, max_keys=100, clock=clock)
+    for _ in range(3):
+        limiter.acquire("key")
+
+    clock.advance(0.25)
+    assert limiter.acquire("key") == pytest.approx(0.25), "полтокена накоплено, до целого ещё 0.25 с"
+    clock.advance(0.25)
+    assert limiter.acquire("key") == 0
+    assert limiter.acquire("key") > 0
+
+
+def test_rejected_request_does_not_spend_tokens(clock: FakeClock):
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=100, clock=clock)
+    limiter.acquire("key")
+    for _ in range(5):
+        limiter.acquire("key")
+
+    clock.advance(1)
+    assert limiter.acquire("key") == 0
+
+
+def test_bucket_never_exceeds_burst(clock: FakeClock):
+    limiter = TokenBucketLimiter(rate=10, burst=2, max_keys=100, clock=clock)
+    limiter.acquire("key")
+
+    clock.advance(60)
+    assert [limiter.acquire("key") == 0 for _ in range(3)] == [True, True, False]
+
+
+def test_keys_have_separate_buckets(clock: FakeClock):
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=100, clock=clock)
+
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("b") == 0
+
+
+def test_scale_multiplies_rate_and_burst(clock: FakeClock):
+    limiter = TokenBucketLimiter(rate=1, burst=2, max_keys=100, clock=clock)
+
+    assert [limiter.acquire("premium", scale=3) for _ in range(6)] == [0] * 6
+    assert limiter.acquire("premium", scale=3) == pytest.approx(1 / 3)
+
+
+def test_full_buckets_are_dropped(clock: FakeClock):
+    limiter = TokenBucketLimiter(rate=1, burst=2, max_keys=100, clock=clock)
+    limiter.acquire("idle")
+
+    clock.advance(1.5)
+    limiter.acquire("active")
+    assert len(limiter) == 2, "корзина ещё не наполнилась и хранит состояние"
+
+    clock.advance(0.5)
+    limiter.acquire("active")
+    assert len(limiter) == 1
+    assert limiter.evictions == 0, "наполнившаяся корзина удаляется без учёта в evictions"
+
+
+def test_max_keys_evicts_least_recent(clock: FakeClock):
+    limiter = TokenBucketLimiter(rate=1, burst=10, max_keys=2, clock=clock)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+
+    assert len(limiter) == 2
+    assert limiter.evictions == 1
+    stats = limiter.stats()
+    assert (stats["keys"], stats["allowed"], stats["rejected"]) == (2, 3, 0)
+
+
+def test_concurrency_limit_per_key():
+    limiter = ConcurrencyLimiter()
+
+    assert limiter.try_acquire("a", limit=2)
+    assert limiter.try_acquire("a", limit=2)
+    assert not limiter.try_acquire("a", limit=2)
+    assert limiter.try_acquire("b", limit=2)
+    assert limiter.stats() == {"keys": 2, "active": 3, "rejected": 1}
+
+
+def test_concurrency_release_frees_slot_and_key():
+    limiter = ConcurrencyLimiter()
+    limiter.try_acquire("a", limit=1)
+
+    limiter.release("a")
+    assert limiter.try_acquire("a", limit=1)
+    limiter.release("a")
+    assert limiter.stats() == {"keys": 0, "active": 0, "rejected": 0}
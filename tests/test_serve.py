@@ -0,0 +1,56 @@
+"""
+Юнит-тесты распределения соединений с БД между процессами (app.cli.serve).
+
+Запуск:
+    python -m pytest tests/test_serve.py -v
+"""
+import pytest
+
+from app.cli.serve import split_connection_budget
+
+
+def test_configured_pool_fits_as_is():
+    assert split_connection_budget(
+        workers=4, max_connections=100, reserved=10, pool_size=10, max_overflow=10
+    ) == (10, 10)
+
+
+def test_overflow_shrinks_before_pool_size():
+    # (100 - 10) // 4 = 22 соединения на процесс
+    assert split_connection_budget(
+        workers=4, max_connections=100, reserved=10, pool_size=10, max_overflow=20
+    ) == (10, 12)
+
+
+def test_pool_size_shrinks_when_overflow_is_gone():
+    # (100 - 10) // 16 = 5 соединений на процесс
+    assert split_connection_budget(
+        workers=16, max_connections=100, reserved=10, pool_size=10, max_overflow=20
+    ) == (5, 0)
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 7, 16, 45])
+def test_all_workers_stay_within_budget(workers: int):
+    max_connections, reserved = 100, 10
+
+    pool_size, max_overflow = split_connection_budget(workers, max_connections, reserved, 20, 30)
+
+    assert pool_size >= 1
+    assert max_overflow >= 0
+    assert workers * (pool_size + max_overflow) <= max_connections - reserved
+
+
+def test_one_connection_per_worker_is_enough():
+    assert split_connection_budget(
+        workers=10, max_connections=20, reserved=10, pool_size=5, max_overflow=5
+    ) == (1, 0)
+
+
+@pytest.mark.parametrize("workers, max_connections, reserved", [
+    (11, 20, 10),
+    (1, 10, 10),
+    (1, 5, 10),
+])
+def test_budget_too_small_raises(workers: int, max_connections: int, reserved: int):
+    with pytest.raises(ValueError, match="SERVER_WORKERS"):
+        split_connection_budget(workers, max_connections, reserved, pool_size=5, max_overflow=5)
@@ -0,0 +1,63 @@
+"""
+Юнит-тесты потоковой распаковки gzip (app.core.streaming).
+
+Запуск:
+    python -m pytest tests/test_streaming.py -v
+"""
+import asyncio
+import gzip
+import os
+import zlib
+from typing import AsyncIterator
+
+import pytest
+
+from app.core.streaming import CHUNK_SIZE, gunzip_chunks
+
+
+async def _iterate(data: bytes, size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _collect(chunks: AsyncIterator[bytes]) -> list[bytes]:
+    return [chunk async for chunk in chunks]
+
+
+def gunzip(data: bytes, size: int) -> list[bytes]:
+    return asyncio.run(_collect(gunzip_chunks(_iterate(data, size))))
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096, 1 << 20])
+def test_round_trip_with_any_chunk_boundaries(size: int):
+    original = os.urandom(50_000) + b"sku,name,price\n" * 5_000
+
+    assert b"".join(gunzip(gzip.compress(original), size)) == original
+
+
+def test_output_chunks_are_limited_for_gzip_bomb():
+    # 64 МБ нулей сжимаются примерно в 64 КБ: весь поток приходит одним куском
+    compressed = gzip.compress(bytes(64 * CHUNK_SIZE))
+
+    sizes = [len(chunk) for chunk in gunzip(compressed, len(compressed))]
+
+    assert max(sizes) <= CHUNK_SIZE, "распакованный кусок не должен превышать CHUNK_SIZE"
+    assert sum(sizes) == 64 * CHUNK_SIZE
+
+
+def test_truncated_stream_raises():
+    compressed = gzip.compress(b"x" * 10_000)
+
+    with pytest.raises(zlib.error, match="Truncated"):
+        gunzip(compressed[:-8], 1024)
+
+
+def test_empty_body_is_truncated_stream():
+    with pytest.raises(zlib.error):
+        gunzip(b"", 1024)
+
+
+def test_not_gzip_raises():
+    with pytest.raises(zlib.error):
+        gunzip(b"sku,name,price\nA,B,1\n", 1024)
+